@@ -1,10 +1,13 @@
 import os
+import threading
 from flask import Flask, jsonify
 from flask_cors import CORS
 from config import Config
 from routes.upload import upload_bp
-from routes.chat import chat_bp
+from routes.chat import chat_bp, get_tts_service, get_translator_service, get_canned_pack, get_vector_store
 from routes.audio import audio_bp
+from routes.documents import documents_bp
+from utils.audio_janitor import get_audio_janitor
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -21,11 +24,51 @@ CORS(app,
 app.register_blueprint(upload_bp, url_prefix='/api/upload')
 app.register_blueprint(chat_bp, url_prefix='/api/chat')
 app.register_blueprint(audio_bp, url_prefix='/api/audio')
+app.register_blueprint(documents_bp, url_prefix='/api/documents')
 
 # Create necessary directories
 os.makedirs('uploads', exist_ok=True)
 os.makedirs('audio', exist_ok=True)
 os.makedirs('temp', exist_ok=True)
+os.makedirs(Config.CATALOG_FOLDER, exist_ok=True)
+
+def bootstrap_vector_store():
+    """Check/create the Qdrant collection once so requests skip the control plane"""
+    try:
+        get_vector_store().create_collection_if_not_exists()
+    except Exception as e:
+        # Retried lazily by the first vector store operation
+        print(f"Warning: Qdrant bootstrap failed: {e}")
+
+bootstrap_vector_store()
+
+def prewarm_speech():
+    """Open Azure TTS connections for the configured voices off the startup path"""
+    try:
+        get_tts_service().prewarm()
+    except Exception as e:
+        print(f"Warning: TTS pre-warm failed: {e}")
+
+if Config.AZURE_TTS_PREWARM_LANGUAGES:
+    threading.Thread(target=prewarm_speech, name='tts-prewarm', daemon=True).start()
+
+def warm_canned_pack():
+    """Fill in canned replies for languages missing from the pack"""
+    try:
+        pack = get_canned_pack()
+        missing = pack.missing_languages()
+        if missing:
+            pack.build(get_translator_service(), get_tts_service(), languages=missing)
+            get_audio_janitor().pin(pack.audio_filenames())
+    except Exception as e:
+        print(f"Warning: canned response warmup failed: {e}")
+
+if Config.CANNED_PACK_WARMUP:
+    threading.Thread(target=warm_canned_pack, name='canned-warmup', daemon=True).start()
+
+# Size/age-capped retention for generated audio; canned audio is never evicted
+get_audio_janitor().pin(get_canned_pack().audio_filenames())
+get_audio_janitor().start()
 
 @app.route('/', methods=['GET'])
 def root():
@@ -36,7 +79,8 @@ def root():
             'health': '/api/health',
             'upload': '/api/upload/document',
             'chat': '/api/chat',
-            'audio': '/api/audio'
+            'audio': '/api/audio',
+            'documents': '/api/documents'
         }
     })
 
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Measure payload bytes and search latency of chunk payloads.
+
+Seeds two throwaway collections with the same chunks: one with the payload
+the upload route used to write (filename, file hash and document counts on
+every point) and one with the slim, chunk-level payload written now. Then
+runs the chat-turn context search against each, with the whole payload for
+the old layout and the CONTEXT_FIELDS projection for the new one, and
+reports the payload bytes returned per search and the search latency.
+
+Uses an in-memory Qdrant unless --remote is given, in which case QDRANT_URL
+from .env is used (the collections are dropped afterwards).
+
+Usage:
+    python bench_payload_projection.py [--points 300] [--queries 50] [--remote]
+"""
+import argparse
+import hashlib
+import json
+import random
+import statistics
+import time
+import uuid
+
+from qdrant_client import QdrantClient
+
+from config import Config
+from utils.retrieval_planner import CONTEXT_FIELDS
+from utils.vector_store import VectorStoreService
+
+WORDS = "photosynthesis energy cell plant light water carbon oxygen chapter unit process reaction".split()
+
+
+def chunk_payload(document_id, i, rng, legacy):
+    payload = {
+        'document_id': document_id,
+        'text': " ".join(rng.choice(WORDS) for _ in range(160))[:Config.CHUNK_SIZE],
+        'page': i // 4 + 1,
+        'chunk_index': i,
+        'chapter_number': i // 20 + 1,
+        'chapter_title': f"Chapter {i // 20 + 1}: Life Processes in Living Organisms",
+        'unit_number': i // 60 + 1,
+        'unit_title': f"Unit {i // 60 + 1}: The World of Living Things",
+    }
+    if legacy:
+        payload.update({
+            'file_hash': hashlib.sha256(document_id.encode()).hexdigest(),
+            'filename': "class_10_science_textbook_english_medium_2024.pdf",
+            'document_chapter_count': 15,
+            'document_unit_count': 5,
+            'document_page_count': 320,
+        })
+    return payload
+
+
+def make_store(name):
+    Config.QDRANT_COLLECTION_NAME = name
+    store = VectorStoreService()
+    store.create_collection_if_not_exists()
+    return store
+
+
+def seed(store, document_id, points, legacy):
+    rng = random.Random(1)
+    store.upsert_points_in_batches([
+        {
+            'id': str(uuid.uuid4()),
+            'vector': [rng.random() for _ in range(store.vector_size)],
+            'payload': chunk_payload(document_id, i, rng, legacy),
+        }
+        for i in range(points)
+    ], batch_size=64)
+
+
+def run(store, document_id, queries, with_payload, label):
+    rng = random.Random(7)
+    payload_bytes = []
+    latencies = []
+    for _ in range(queries):
+        vector = [rng.random() for _ in range(store.vector_size)]
+        started = time.perf_counter()
+        results = store.search_similar(vector, limit=10, filter_conditions={'document_id': document_id}, with_payload=with_payload)
+        latencies.append((time.perf_counter() - started) * 1000)
+        payload_bytes.append(sum(len(json.dumps(r['payload'], ensure_ascii=False)) for r in results))
+    latencies.sort()
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    mean_bytes = statistics.mean(payload_bytes)
+    print(f"{label:>8}: {mean_bytes:8.0f} payload bytes/search; "
+          f"latency p50 {statistics.median(latencies):.2f} ms, p95 {p95:.2f} ms")
+    return mean_bytes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--points', type=int, default=300)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--remote', action='store_true', help="use QDRANT_URL instead of an in-memory Qdrant")
+    args = parser.parse_args()
+
+    if args.remote:
+        url = Config.QDRANT_URL.strip()
+        if url.endswith(":6333"):
+            url = url[:-5]
+        client = QdrantClient(url=url, api_key=Config.QDRANT_API_KEY or None)
+    else:
+        client = QdrantClient(location=":memory:")
+        Config.QDRANT_URL = Config.QDRANT_URL or ":memory:"
+    VectorStoreService._shared_client = client
+
+    suffix = uuid.uuid4().hex[:8]
+    document_id = str(uuid.uuid4())
+    legacy_store = make_store(f"bench_payload_legacy_{suffix}")
+    slim_store = make_store(f"bench_payload_slim_{suffix}")
+
+    try:
+        seed(legacy_store, document_id, args.points, legacy=True)
+        seed(slim_store, document_id, args.points, legacy=False)
+        print(f"{args.queries} searches (limit 10) over {args.points} chunks, {'remote' if args.remote else 'in-memory'}\n")
+        before = run(legacy_store, document_id, args.queries, True, "before")
+        after = run(slim_store, document_id, args.queries, CONTEXT_FIELDS, "after")
+        print(f"\npayload bytes per search: {100 * (before - after) / before:.0f}% smaller")
+    finally:
+        client.delete_collection(legacy_store.collection_name)
+        client.delete_collection(slim_store.collection_name)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Compare the old and the prefix-stable prompt layouts against a local fake
+Chat Completions endpoint that models provider-side prefix caching.
+
+The fake endpoint caches prompts in 128-token blocks once they reach 1024
+tokens (as OpenAI does), reports `usage.prompt_tokens_details.cached_tokens`,
+and delays its reply in proportion to the uncached prompt tokens, so the
+measured latency stands in for time-to-first-token. The new layout is built
+the way production builds it: LLMService's PromptBuilder over the history
+MemoryService returns (with an instant stand-in summarizer).
+
+Usage:
+    python bench_prompt_cache.py [questions]
+"""
+import hashlib
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from openai import OpenAI
+
+from utils.llm_service import SYSTEM_PROMPT, cached_prompt_tokens
+from utils.memory_service import MemoryService
+from utils.prompt_builder import PromptBuilder, build_document_outline, format_context
+
+CHARS_PER_TOKEN = 4
+CACHE_BLOCK_TOKENS = 128
+CACHE_MIN_TOKENS = 1024
+BASE_LATENCY_MS = 20
+UNCACHED_MS_PER_1K_TOKENS = 40
+
+
+class FakeCompletionHandler(BaseHTTPRequestHandler):
+    cache = set()
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        serialized = "".join(f"<{m['role']}>{m['content']}" for m in body['messages'])
+        prompt_tokens = max(1, len(serialized) // CHARS_PER_TOKEN)
+
+        # Longest cached block-aligned prefix, then cache this prompt's blocks
+        cached_tokens = 0
+        blocks = prompt_tokens // CACHE_BLOCK_TOKENS if prompt_tokens >= CACHE_MIN_TOKENS else 0
+        digest = hashlib.sha256()
+        prefix_hashes = []
+        for block in range(blocks):
+            start = block * CACHE_BLOCK_TOKENS * CHARS_PER_TOKEN
+            digest.update(serialized[start:start + CACHE_BLOCK_TOKENS * CHARS_PER_TOKEN].encode('utf-8'))
+            prefix_hashes.append(digest.copy().hexdigest())
+        with self.lock:
+            for index, prefix_hash in enumerate(prefix_hashes):
+                if prefix_hash not in self.cache:
+                    break
+                cached_tokens = (index + 1) * CACHE_BLOCK_TOKENS
+            self.cache.update(prefix_hashes)
+
+        uncached = prompt_tokens - cached_tokens
+        time.sleep((BASE_LATENCY_MS + uncached * UNCACHED_MS_PER_1K_TOKENS / 1000) / 1000)
+
+        payload = json.dumps({
+            'id': 'chatcmpl-bench',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'fake'),
+            'choices': [{
+                'index': 0,
+                'finish_reason': 'stop',
+                'message': {'role': 'assistant', 'content': 'Answer.'},
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': 2,
+                'total_tokens': prompt_tokens + 2,
+                'prompt_tokens_details': {'cached_tokens': cached_tokens},
+            },
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def make_document(rng):
+    chapters = [f"Chapter {i}: Topic {i}" for i in range(1, 13)]
+    chunks = []
+    for index in range(60):
+        words = " ".join(rng.choice(["energy", "cell", "river", "trade", "force", "state", "plant", "map"]) for _ in range(150))
+        chunks.append({
+            'score': 0.0,
+            'payload': {
+                'text': words,
+                'page': index // 3 + 1,
+                'chunk_index': index,
+                'chapter_title': chapters[index // 5],
+            },
+        })
+    return chapters, chunks
+
+
+def retrieve(rng, chunks, limit=10):
+    """Overlapping top-k around a topic, in score (i.e. arbitrary) order"""
+    center = rng.randrange(len(chunks))
+    window = [chunk for chunk in chunks if abs(chunk['payload']['chunk_index'] - center) <= 8]
+    return rng.sample(window, min(limit, len(window)))
+
+
+def legacy_messages(question, results, outline, history):
+    """The layout before the prompt builder: variable history first, context inside the user turn"""
+    context_parts = []
+    for r in results:
+        chapter_info = f"[Chapter: {r['payload']['chapter_title']}] "
+        context_parts.append(chapter_info + r['payload']['text'])
+    context = f"\n\n[Document Metadata]\n{outline}\n\n" + "\n\n".join(context_parts)
+    prompt = f"<context>\n{context}\n</context>\n\nUser question:\n{question}\n\nIMPORTANT: Answer in English."
+    return [{"role": "system", "content": SYSTEM_PROMPT}] + history[-5:] + [{"role": "user", "content": prompt}]
+
+
+def run(client, layout, questions, seed):
+    rng = random.Random(seed)
+    chapters, chunks = make_document(rng)
+    outline = build_document_outline(chapters, [], chapter_count=len(chapters))
+    builder = PromptBuilder(SYSTEM_PROMPT)  # as LLMService builds it
+    memory = MemoryService(summarizer=lambda summary, messages: f"{summary or ''} {len(messages)} more messages".strip())
+    session_id = f"bench-{layout}-{seed}"
+    memory.clear_history(session_id)
+    history = []
+    latencies, prompt_tokens, cached_tokens, hits = [], 0, 0, 0
+    for turn in range(questions):
+        question = f"Question {turn}: explain {rng.choice(chapters)}?"
+        results = retrieve(rng, chunks)
+        if layout == 'legacy':
+            messages = legacy_messages(question, results, outline, history)
+        else:
+            messages = builder.build(
+                question, format_context(results), 'English', outline=outline,
+                conversation_history=memory.get_prompt_history(session_id)
+            )
+        started = time.perf_counter()
+        response = client.chat.completions.create(model='fake', messages=messages)
+        latencies.append((time.perf_counter() - started) * 1000)
+        cached = cached_prompt_tokens(response.usage)
+        prompt_tokens += response.usage.prompt_tokens
+        cached_tokens += cached
+        hits += 1 if cached else 0
+        history += [{"role": "user", "content": question}, {"role": "assistant", "content": "Answer."}]
+        memory.add_to_history(session_id, question, "Answer.")
+    return {
+        'prefix_hit_ratio': hits / questions,
+        'cached_token_ratio': cached_tokens / prompt_tokens,
+        'ttft_p50_ms': statistics.median(latencies),
+        'ttft_mean_ms': statistics.mean(latencies),
+    }
+
+
+if __name__ == '__main__':
+    questions = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeCompletionHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = OpenAI(api_key='bench', base_url=f"http://127.0.0.1:{server.server_address[1]}/v1")
+
+    print(f"{questions} questions per layout against a fake prefix-caching endpoint\n")
+    for layout in ('legacy', 'stable-prefix'):
+        FakeCompletionHandler.cache.clear()
+        result = run(client, layout, questions, seed=7)
+        print(
+            f"{layout:>14}: prefix hits {result['prefix_hit_ratio']:.0%}, "
+            f"cached tokens {result['cached_token_ratio']:.0%}, "
+            f"TTFT p50 {result['ttft_p50_ms']:.1f} ms, mean {result['ttft_mean_ms']:.1f} ms"
+        )
+    server.shutdown()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Recall/latency/memory tradeoffs of collection quantization settings.
+
+Loads the same synthetic, clustered embeddings into one throwaway collection
+per setting (float32, scalar int8, binary), built with the HNSW and on-disk
+settings from .env, then runs the same queries against each. Recall@k is
+measured against an exact (brute-force) search of the float32 collection,
+with rescoring on and off and at several oversampling factors. Vector RAM
+is estimated from the setting (Qdrant does not report it per collection).
+
+Needs a real Qdrant server: the in-memory client ignores quantization and
+HNSW settings. Start one locally with
+    docker run -p 6333:6333 qdrant/qdrant
+
+Usage:
+    python bench_qdrant_quantization.py [--url http://localhost:6333] [--points 10000] [--queries 100] [--k 10]
+"""
+import argparse
+import math
+import random
+import statistics
+import time
+import uuid
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import NamedVector, PointStruct, SearchParams
+
+from config import Config
+from utils.vector_store import build_search_params, collection_create_params
+
+# (label, quantization mode, rescore, oversampling)
+SETTINGS = [
+    ("float32", "none", None, None),
+    ("int8", "scalar", False, 1.0),
+    ("int8+rescore", "scalar", True, 1.0),
+    ("int8+rescore x2", "scalar", True, 2.0),
+    ("binary+rescore", "binary", True, 1.0),
+    ("binary+rescore x2", "binary", True, 2.0),
+    ("binary+rescore x4", "binary", True, 4.0),
+]
+
+BYTES_PER_DIMENSION = {"none": 4, "scalar": 1, "binary": 1 / 8}
+
+
+def unit(vector):
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def make_vectors(count, dim, clusters, rng):
+    """Clustered unit vectors, closer to real embeddings than uniform noise"""
+    centroids = [[rng.gauss(0, 1) for _ in range(dim)] for _ in range(clusters)]
+    vectors = []
+    for _ in range(count):
+        centroid = rng.choice(centroids)
+        vectors.append(unit([c + rng.gauss(0, 0.6) for c in centroid]))
+    return vectors
+
+
+def wait_until_indexed(client, name, timeout=600):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = client.get_collection(name)
+        if str(info.status).lower().endswith("green"):
+            return
+        time.sleep(1)
+    print(f"  warning: {name} still optimizing after {timeout}s")
+
+
+def load_collection(client, name, dim, mode, vectors):
+    client.create_collection(collection_name=name, **collection_create_params(dim, quantization=mode))
+    for start in range(0, len(vectors), 256):
+        client.upsert(
+            collection_name=name,
+            points=[
+                PointStruct(id=start + i, vector={"default": vector})
+                for i, vector in enumerate(vectors[start:start + 256])
+            ],
+            wait=True,
+        )
+    wait_until_indexed(client, name)
+
+
+def search_ids(client, name, query, k, params):
+    results = client.search(
+        collection_name=name,
+        query_vector=NamedVector(name="default", vector=query),
+        limit=k,
+        search_params=params,
+        with_payload=False,
+    )
+    return [r.id for r in results]
+
+
+def measure(client, name, queries, truth, k, params):
+    latencies = []
+    recalls = []
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        found = search_ids(client, name, query, k, params)
+        latencies.append((time.perf_counter() - started) * 1000)
+        recalls.append(len(set(found) & expected) / k)
+    latencies.sort()
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    return statistics.mean(recalls), statistics.median(latencies), p95
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default="http://localhost:6333")
+    parser.add_argument('--api-key', default=None)
+    parser.add_argument('--points', type=int, default=10000)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--dim', type=int, default=Config.QDRANT_VECTOR_SIZE or 1536)
+    args = parser.parse_args()
+
+    client = QdrantClient(url=args.url, api_key=args.api_key)
+    rng = random.Random(42)
+    print(f"Generating {args.points} x {args.dim} vectors...")
+    vectors = make_vectors(args.points, args.dim, clusters=50, rng=rng)
+    queries = make_vectors(args.queries, args.dim, clusters=50, rng=random.Random(7))
+
+    suffix = uuid.uuid4().hex[:8]
+    collections = {mode: f"bench_quant_{mode}_{suffix}" for mode in ("none", "scalar", "binary")}
+    print(
+        f"HNSW m={Config.QDRANT_HNSW_M} ef_construct={Config.QDRANT_HNSW_EF_CONSTRUCT} "
+        f"ef_search={Config.QDRANT_HNSW_EF_SEARCH or 'default'}, vectors_on_disk={Config.QDRANT_VECTORS_ON_DISK}\n"
+    )
+    try:
+        for mode, name in collections.items():
+            print(f"Loading {name}...")
+            load_collection(client, name, args.dim, mode, vectors)
+
+        exact = SearchParams(exact=True)
+        truth = [set(search_ids(client, collections["none"], query, args.k, exact)) for query in queries]
+
+        print(f"\n{'setting':>18} | recall@{args.k:<3}| p50 ms | p95 ms | vector RAM (est.)")
+        for label, mode, rescore, oversampling in SETTINGS:
+            params = build_search_params(quantization=mode, rescore=rescore, oversampling=oversampling)
+            recall, p50, p95 = measure(client, collections[mode], queries, truth, args.k, params)
+            ram_mb = args.points * args.dim * BYTES_PER_DIMENSION[mode] / (1024 * 1024)
+            if mode != "none" and not Config.QDRANT_VECTORS_ON_DISK:
+                ram_mb += args.points * args.dim * 4 / (1024 * 1024)  # originals kept in RAM too
+            print(f"{label:>18} | {recall:9.3f} | {p50:6.2f} | {p95:6.2f} | {ram_mb:8.1f} MB")
+    finally:
+        for name in collections.values():
+            try:
+                client.delete_collection(name)
+            except Exception:
+                pass
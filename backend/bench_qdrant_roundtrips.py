@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Count Qdrant round trips per chat turn.
+
+Runs the retrieval a chat turn needs against a Qdrant client wrapped to
+count every request: once as it used to be done (a get_collections() check
+before each operation, then a filtered search and a metadata scroll) and
+once with the current once-per-process bootstrap and the retrieval
+planner's single search_batch, with the structure sampled from Qdrant and
+with it read from the document catalog. Uses an in-memory Qdrant unless --remote is
+given, in which case QDRANT_URL from .env is used (a throwaway collection
+is created and dropped).
+
+Usage:
+    python bench_qdrant_roundtrips.py [--turns 20] [--rtt-ms 25] [--remote]
+"""
+import argparse
+import random
+import time
+import uuid
+from collections import Counter
+
+from qdrant_client import QdrantClient
+
+from config import Config
+from utils.retrieval_planner import RetrievalPlanner
+from utils.vector_store import VectorStoreService
+
+
+class CountingClient:
+    """Proxy that counts (and optionally delays) every Qdrant client call"""
+
+    def __init__(self, client, rtt_ms: float = 0.0):
+        self._client = client
+        self._rtt = rtt_ms / 1000
+        self.calls = Counter()
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        def counted(*args, **kwargs):
+            self.calls[name] += 1
+            if self._rtt:
+                time.sleep(self._rtt)
+            return attr(*args, **kwargs)
+        return counted
+
+
+def legacy_collection_check(self):
+    """The previous create_collection_if_not_exists fast path: one listing per operation"""
+    names = [c.name for c in self.client.get_collections().collections]
+    if self.collection_name not in names:
+        VectorStoreService._checked_collections.discard(self.collection_name)
+        original_check(self)
+
+
+def seed(store, document_id, points=200):
+    rng = random.Random(1)
+    store.upsert_points_in_batches([
+        {
+            'id': str(uuid.uuid4()),
+            'vector': [rng.random() for _ in range(store.vector_size)],
+            'payload': {
+                'document_id': document_id,
+                'text': f"chunk {i}",
+                'page': i // 4 + 1,
+                'chunk_index': i,
+                'chapter_title': f"Chapter {i // 20 + 1}",
+                'document_chapter_count': points // 20,
+            },
+        }
+        for i in range(points)
+    ], batch_size=64)
+
+
+def legacy_chat_turn(store, document_id, query_vector):
+    """The vector store calls send_message used to make for one question"""
+    results = store.search_similar(query_vector, limit=10, filter_conditions={'document_id': document_id})
+    if not results:
+        store.search_similar(query_vector, limit=10)
+    store.get_document_metadata_samples(document_id, limit=128)
+
+
+def planned_chat_turn(store, document_id, query_vector):
+    """The vector store calls send_message makes for a document without a catalog record"""
+    RetrievalPlanner(store).chat_turn(query_vector, document_id, context_limit=10, structure_sample=128)
+
+
+def catalog_chat_turn(store, document_id, query_vector):
+    """The vector store calls send_message makes when the catalog has the structure"""
+    RetrievalPlanner(store).chat_turn(query_vector, document_id, context_limit=10, structure_sample=0)
+
+
+def run(store, counting, document_id, turns, label, chat_turn):
+    rng = random.Random(7)
+    counting.calls.clear()
+    started = time.perf_counter()
+    for _ in range(turns):
+        chat_turn(store, document_id, [rng.random() for _ in range(store.vector_size)])
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    total = sum(counting.calls.values())
+    breakdown = ", ".join(f"{name}={count / turns:.1f}" for name, count in sorted(counting.calls.items()))
+    print(f"{label:>10}: {total / turns:.1f} round trips/turn ({breakdown}); {elapsed_ms / turns:.1f} ms/turn")
+
+
+original_check = VectorStoreService.create_collection_if_not_exists
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--turns', type=int, default=20)
+    parser.add_argument('--rtt-ms', type=float, default=25.0, help="simulated network round trip per call (in-memory mode)")
+    parser.add_argument('--remote', action='store_true', help="use QDRANT_URL instead of an in-memory Qdrant")
+    args = parser.parse_args()
+
+    if args.remote:
+        url = Config.QDRANT_URL.strip()
+        if url.endswith(":6333"):
+            url = url[:-5]
+        client = QdrantClient(url=url, api_key=Config.QDRANT_API_KEY or None)
+        rtt_ms = 0.0
+    else:
+        client = QdrantClient(location=":memory:")
+        rtt_ms = args.rtt_ms
+        Config.QDRANT_URL = Config.QDRANT_URL or ":memory:"
+
+    counting = CountingClient(client, rtt_ms)
+    VectorStoreService._shared_client = counting
+    Config.QDRANT_COLLECTION_NAME = f"bench_roundtrips_{uuid.uuid4().hex[:8]}"
+    store = VectorStoreService()
+    document_id = str(uuid.uuid4())
+
+    try:
+        seed(store, document_id)
+        print(f"{args.turns} chat turns, {'remote' if args.remote else f'in-memory, {rtt_ms:.0f} ms simulated RTT'}\n")
+
+        VectorStoreService.create_collection_if_not_exists = legacy_collection_check
+        run(store, counting, document_id, args.turns, "before", legacy_chat_turn)
+
+        VectorStoreService.create_collection_if_not_exists = original_check
+        run(store, counting, document_id, args.turns, "after", planned_chat_turn)
+        run(store, counting, document_id, args.turns, "catalog", catalog_chat_turn)
+    finally:
+        client.delete_collection(store.collection_name)
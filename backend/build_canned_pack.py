@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Build the canned-response pack: translated canned replies and their audio
+for every language in TTS_LANGUAGE_MAP. Re-running only fills in entries
+that are still missing (e.g. after a Translator or TTS outage).
+
+Usage:
+    python build_canned_pack.py [language ...]
+"""
+import os
+import sys
+
+from config import Config
+from utils.canned_responses import CannedResponsePack
+from utils.translator import TranslatorService
+from utils.tts import TTSService
+
+os.makedirs(Config.AUDIO_FOLDER, exist_ok=True)
+
+languages = sys.argv[1:] or None
+pack = CannedResponsePack()
+print(f"Building canned response pack at: {pack.path}")
+
+summary = pack.build(TranslatorService(), TTSService(), languages=languages)
+for code, entry in sorted(summary.items()):
+    print(
+        f"  {code}: texts={','.join(entry['texts']) or '-'} "
+        f"templates={len(entry['templates'])} suggestions={entry['suggestions']} "
+        f"audio={','.join(entry['audio']) or '-'}"
+    )
+
+missing = pack.missing_languages(languages)
+if missing:
+    print(f"⚠ Incomplete languages (re-run to retry): {', '.join(missing)}")
+    exit(1)
+print("✓ Canned response pack complete")
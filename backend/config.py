@@ -30,6 +30,21 @@ class Config:
     QDRANT_API_KEY = _get_env('QDRANT_API_KEY')
     QDRANT_COLLECTION_NAME = _get_env('QDRANT_COLLECTION_NAME', 'ai_tutor_documents')
     QDRANT_VECTOR_SIZE = int(_get_env('QDRANT_VECTOR_SIZE', 1536))
+    # Collection storage, applied when the collection is created (or by
+    # reset_qdrant_collection.py --update): quantization ('none', 'scalar'
+    # for int8, 'binary') with rescoring/oversampling at search time, HNSW
+    # graph parameters, and on-disk storage for original vectors/payloads
+    QDRANT_QUANTIZATION = (_get_env('QDRANT_QUANTIZATION', 'none') or 'none').lower()
+    QDRANT_SCALAR_QUANTILE = float(_get_env('QDRANT_SCALAR_QUANTILE', 0.99))
+    QDRANT_QUANTIZATION_ALWAYS_RAM = _get_env('QDRANT_QUANTIZATION_ALWAYS_RAM', 'true').lower() == 'true'
+    QDRANT_QUANTIZATION_RESCORE = _get_env('QDRANT_QUANTIZATION_RESCORE', 'true').lower() == 'true'
+    QDRANT_QUANTIZATION_OVERSAMPLING = float(_get_env('QDRANT_QUANTIZATION_OVERSAMPLING', 2.0))
+    QDRANT_HNSW_M = int(_get_env('QDRANT_HNSW_M', 16))
+    QDRANT_HNSW_EF_CONSTRUCT = int(_get_env('QDRANT_HNSW_EF_CONSTRUCT', 100))
+    QDRANT_HNSW_EF_SEARCH = int(_get_env('QDRANT_HNSW_EF_SEARCH', 0))  # 0 = server default
+    QDRANT_HNSW_ON_DISK = _get_env('QDRANT_HNSW_ON_DISK', 'false').lower() == 'true'
+    QDRANT_VECTORS_ON_DISK = _get_env('QDRANT_VECTORS_ON_DISK', 'false').lower() == 'true'
+    QDRANT_PAYLOAD_ON_DISK = _get_env('QDRANT_PAYLOAD_ON_DISK', 'false').lower() == 'true'
 
     # Frontend / CORS configuration
     FRONTEND_ALLOWED_ORIGINS = [
@@ -42,10 +57,46 @@ class Config:
     # Supabase Configuration
     SUPABASE_URL = _get_env('SUPABASE_URL')
     SUPABASE_KEY = _get_env('SUPABASE_KEY')
+    # Write-behind persistence of conversation turns: bulk inserts on a size
+    # or time trigger, retried with backoff, journaled locally while unreachable
+    SUPABASE_WRITE_BEHIND = _get_env('SUPABASE_WRITE_BEHIND', 'true').lower() == 'true'
+    SUPABASE_WRITE_BATCH_SIZE = int(_get_env('SUPABASE_WRITE_BATCH_SIZE', 50))
+    SUPABASE_WRITE_FLUSH_SECONDS = float(_get_env('SUPABASE_WRITE_FLUSH_SECONDS', 2))
+    SUPABASE_WRITE_MAX_BUFFER = int(_get_env('SUPABASE_WRITE_MAX_BUFFER', 5000))
+    SUPABASE_WRITE_MAX_RETRIES = int(_get_env('SUPABASE_WRITE_MAX_RETRIES', 4))
+    SUPABASE_WRITE_JOURNAL = _get_env('SUPABASE_WRITE_JOURNAL', 'journal/conversations.jsonl')
+    # Rows the database refuses outright (constraint/type errors) are set aside here
+    SUPABASE_WRITE_DEAD_LETTER = _get_env('SUPABASE_WRITE_DEAD_LETTER', 'journal/conversations.dead.jsonl')
+    # History reads: page sizes and the short-TTL read-through cache
+    HISTORY_PAGE_SIZE = int(_get_env('HISTORY_PAGE_SIZE', 50))
+    HISTORY_MAX_PAGE_SIZE = int(_get_env('HISTORY_MAX_PAGE_SIZE', 200))
+    HISTORY_CACHE_TTL_SECONDS = float(_get_env('HISTORY_CACHE_TTL_SECONDS', 15))
+    HISTORY_CACHE_SIZE = int(_get_env('HISTORY_CACHE_SIZE', 1024))
     
     # File Upload Configuration
     UPLOAD_FOLDER = 'uploads'
     AUDIO_FOLDER = 'audio'
+    # Audio retention: size cap, maximum idle age and sweep interval
+    AUDIO_MAX_TOTAL_MB = int(_get_env('AUDIO_MAX_TOTAL_MB', 500))
+    AUDIO_MAX_AGE_HOURS = float(_get_env('AUDIO_MAX_AGE_HOURS', 168))
+    AUDIO_MIN_IDLE_SECONDS = int(_get_env('AUDIO_MIN_IDLE_SECONDS', 300))
+    AUDIO_JANITOR_INTERVAL_SECONDS = int(_get_env('AUDIO_JANITOR_INTERVAL_SECONDS', 300))
+    # Audio serving: browser cache lifetime and optional proxy offload
+    # ('' to stream from Python, 'x-accel-redirect' for nginx, 'x-sendfile' for Apache/lighttpd)
+    AUDIO_CACHE_MAX_AGE = int(_get_env('AUDIO_CACHE_MAX_AGE', 31536000))
+    AUDIO_SENDFILE_MODE = (_get_env('AUDIO_SENDFILE_MODE', '') or '').lower()
+    AUDIO_ACCEL_REDIRECT_PREFIX = _get_env('AUDIO_ACCEL_REDIRECT_PREFIX', '/protected-audio/')
+    # Precomputed canned replies (text + audio per language); built by
+    # build_canned_pack.py, or at startup for missing languages if enabled
+    CANNED_PACK_PATH = _get_env('CANNED_PACK_PATH', 'canned/pack.json')
+    CANNED_PACK_WARMUP = _get_env('CANNED_PACK_WARMUP', 'false').lower() == 'true'
+    # Upload: seconds to wait for unacknowledged vector upserts to be applied
+    # before the upload reports success
+    INGEST_CONSISTENCY_TIMEOUT_SECONDS = float(_get_env('INGEST_CONSISTENCY_TIMEOUT_SECONDS', 30))
+    # Document catalog: one structure/ingest record per document, read through an LRU
+    CATALOG_FOLDER = _get_env('CATALOG_FOLDER', 'catalog')
+    CATALOG_CACHE_SIZE = int(_get_env('CATALOG_CACHE_SIZE', 256))
+    CATALOG_CACHE_TTL_SECONDS = float(_get_env('CATALOG_CACHE_TTL_SECONDS', 300))
     MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50MB max file size
     ALLOWED_EXTENSIONS = {'pdf', 'docx'}
     
@@ -69,7 +120,48 @@ class Config:
         'as': 'as',
         'ur': 'ur'
     }
+    # Characters per provider call; longer answers are split at sentence
+    # boundaries, synthesized concurrently and joined into one file
     TTS_MAX_CHARACTERS = int(_get_env('TTS_MAX_CHARACTERS', 4000))
+    # eager: synthesize before responding
+    # deferred: return the audio URL at once, synthesize on first fetch
+    # speculative: deferred, plus background synthesis at low priority
+    TTS_MODE = (_get_env('TTS_MODE', 'eager') or 'eager').lower()
+    TTS_SPECULATIVE_QUEUE_SIZE = int(_get_env('TTS_SPECULATIVE_QUEUE_SIZE', 32))
+    TTS_PENDING_WAIT_SECONDS = int(_get_env('TTS_PENDING_WAIT_SECONDS', 60))
+    # Compressed audio output: mp3 or opus (Ogg container), bitrate in kbps
+    TTS_AUDIO_FORMAT = (_get_env('TTS_AUDIO_FORMAT', 'mp3') or 'mp3').lower()
+    TTS_AUDIO_BITRATE_KBPS = int(_get_env('TTS_AUDIO_BITRATE_KBPS', 48))
+    # Per-provider TTS circuit breakers
+    TTS_BREAKER_FAILURE_THRESHOLD = int(_get_env('TTS_BREAKER_FAILURE_THRESHOLD', 3))
+    TTS_BREAKER_RESET_SECONDS = float(_get_env('TTS_BREAKER_RESET_SECONDS', 30))
+    TTS_BREAKER_WINDOW = int(_get_env('TTS_BREAKER_WINDOW', 20))
+    TTS_BREAKER_ERROR_RATE = float(_get_env('TTS_BREAKER_ERROR_RATE', 0.5))
+    # Progressive streaming of deferred audio, synthesized sentence by sentence
+    TTS_STREAMING = _get_env('TTS_STREAMING', 'false').lower() == 'true'
+    TTS_SEGMENT_CONCURRENCY = int(_get_env('TTS_SEGMENT_CONCURRENCY', 3))
+    TTS_SEGMENT_MAX_CHARS = int(_get_env('TTS_SEGMENT_MAX_CHARS', 400))
+    TTS_FIRST_SEGMENT_MAX_CHARS = int(_get_env('TTS_FIRST_SEGMENT_MAX_CHARS', 160))
+
+    # Background / fan-out execution
+    FANOUT_WORKERS = int(_get_env('FANOUT_WORKERS', 4))
+    BACKGROUND_WORKERS = int(_get_env('BACKGROUND_WORKERS', 2))
+    BACKGROUND_QUEUE_SIZE = int(_get_env('BACKGROUND_QUEUE_SIZE', 256))
+    # Conversation memory: recent turns kept verbatim, token budget for the
+    # history sent to the LLM, and how many aged-out turns trigger a summary
+    MEMORY_RECENT_TURNS = int(_get_env('MEMORY_RECENT_TURNS', 3))
+    MEMORY_HISTORY_TOKEN_BUDGET = int(_get_env('MEMORY_HISTORY_TOKEN_BUDGET', 1200))
+    MEMORY_COMPACT_BATCH_TURNS = int(_get_env('MEMORY_COMPACT_BATCH_TURNS', 2))
+    MEMORY_SUMMARY_MAX_TOKENS = int(_get_env('MEMORY_SUMMARY_MAX_TOKENS', 300))
+    # Session store: 'memory' (per process) or 'sqlite' (shared by the workers
+    # on one host, WAL mode); idle expiry and global caps
+    SESSION_STORE_BACKEND = (_get_env('SESSION_STORE_BACKEND', 'memory') or 'memory').lower()
+    SESSION_STORE_PATH = _get_env('SESSION_STORE_PATH', 'sessions/sessions.db')
+    SESSION_TTL_SECONDS = int(_get_env('SESSION_TTL_SECONDS', 21600))
+    SESSION_MAX_SESSIONS = int(_get_env('SESSION_MAX_SESSIONS', 5000))
+    SESSION_MAX_MB = int(_get_env('SESSION_MAX_MB', 64))
+    # Adds a Server-Timing header with per-stage timings to chat responses
+    CHAT_TIMING_HEADER = _get_env('CHAT_TIMING_HEADER', 'false').lower() == 'true'
     
     # Azure Document Intelligence Configuration
     # Note: Azure SDK expects endpoint without trailing slash, azure_ocr.py will handle formatting
@@ -84,6 +176,14 @@ class Config:
     # Azure Speech Service Configuration
     AZURE_SPEECH_KEY = _get_env('AZURE_SPEECH_KEY') or _get_env('AZURE_KEY')  # Fallback to AZURE_KEY if AZURE_SPEECH_KEY not set
     AZURE_SPEECH_REGION = _get_env('AZURE_SPEECH_REGION', 'eastus')
+    # Long-lived synthesizers kept per voice, and languages whose voices are
+    # connected at startup
+    AZURE_TTS_POOL_SIZE = int(_get_env('AZURE_TTS_POOL_SIZE', 2))
+    AZURE_TTS_POOL_TIMEOUT = float(_get_env('AZURE_TTS_POOL_TIMEOUT', 30))
+    AZURE_TTS_PREWARM_LANGUAGES = [
+        lang.strip() for lang in (_get_env('AZURE_TTS_PREWARM_LANGUAGES', 'en-IN,hi-IN') or '').split(',')
+        if lang.strip()
+    ]
     
     # Azure TTS Voice Map (Neural Voices)
     # Format: "language-code": "voice-name"
@@ -120,3 +220,8 @@ class Config:
     AZURE_TRANSLATOR_KEY = _get_env('AZURE_TRANSLATOR_KEY')
     AZURE_TRANSLATOR_REGION = _get_env('AZURE_TRANSLATOR_REGION', 'eastus')
     AZURE_TRANSLATOR_ENDPOINT = _get_env('AZURE_TRANSLATOR_ENDPOINT', 'https://api.cognitive.microsofttranslator.com')
+    # Keep-alive connections to the Translator endpoint and cached translations
+    TRANSLATOR_POOL_SIZE = int(_get_env('TRANSLATOR_POOL_SIZE', 8))
+    TRANSLATION_CACHE_SIZE = int(_get_env('TRANSLATION_CACHE_SIZE', 2048))
+    # Share of letters that must already be in the target script to skip translating a response
+    SCRIPT_MATCH_THRESHOLD = float(_get_env('SCRIPT_MATCH_THRESHOLD', 0.6))
@@ -1,35 +1,58 @@
 #!/usr/bin/env python3
 """
 Script to manually delete and recreate Qdrant collection.
-Use this if you're getting vector_name errors.
+Use this if you're getting vector_name errors, or to apply the collection
+storage settings from .env (QDRANT_QUANTIZATION, QDRANT_HNSW_*, QDRANT_*_ON_DISK).
+
+Usage:
+    python reset_qdrant_collection.py            # delete and recreate (documents must be re-uploaded)
+    python reset_qdrant_collection.py --update   # apply storage settings in place, keeping the points
 """
-import os
-from dotenv import load_dotenv
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance
+import argparse
+
+from qdrant_client.models import CollectionParamsDiff, Disabled, VectorParamsDiff
 
-load_dotenv()
+from config import Config
+from utils.document_catalog import get_document_catalog
+from utils.vector_store import VectorStoreService, build_quantization_config, collection_create_params
 
-QDRANT_URL = os.getenv('QDRANT_URL', '').strip()
-QDRANT_API_KEY = os.getenv('QDRANT_API_KEY', '')
-QDRANT_COLLECTION_NAME = os.getenv('QDRANT_COLLECTION_NAME', 'ai_tutor_documents')
-QDRANT_VECTOR_SIZE = int(os.getenv('QDRANT_VECTOR_SIZE', 1536))
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument('--update', action='store_true', help="update the existing collection instead of recreating it")
+args = parser.parse_args()
 
-if not QDRANT_URL:
+if not Config.QDRANT_URL:
     print("ERROR: QDRANT_URL not set in .env file")
     exit(1)
 
-if QDRANT_URL.endswith(":6333"):
-    QDRANT_URL = QDRANT_URL[:-5]
+store = VectorStoreService()
+client = store.client
+QDRANT_COLLECTION_NAME = store.collection_name
 
-print(f"Connecting to Qdrant at: {QDRANT_URL}")
+print(f"Connecting to Qdrant at: {Config.QDRANT_URL}")
 print(f"Collection name: {QDRANT_COLLECTION_NAME}")
-
-client = QdrantClient(
-    url=QDRANT_URL,
-    api_key=QDRANT_API_KEY or None,
+print(
+    f"Storage: quantization={Config.QDRANT_QUANTIZATION}, hnsw m={Config.QDRANT_HNSW_M} "
+    f"ef_construct={Config.QDRANT_HNSW_EF_CONSTRUCT} on_disk={Config.QDRANT_HNSW_ON_DISK}, "
+    f"vectors_on_disk={Config.QDRANT_VECTORS_ON_DISK}, payload_on_disk={Config.QDRANT_PAYLOAD_ON_DISK}"
 )
 
+if args.update:
+    # Qdrant rebuilds quantized vectors / HNSW graphs in the background
+    try:
+        params = collection_create_params(store.vector_size)
+        client.update_collection(
+            collection_name=QDRANT_COLLECTION_NAME,
+            vectors_config={"default": VectorParamsDiff(on_disk=Config.QDRANT_VECTORS_ON_DISK)},
+            hnsw_config=params["hnsw_config"],
+            quantization_config=build_quantization_config() or Disabled.DISABLED,
+            collection_params=CollectionParamsDiff(on_disk_payload=Config.QDRANT_PAYLOAD_ON_DISK),
+        )
+        print("✓ Collection updated; Qdrant re-optimizes segments in the background")
+    except Exception as e:
+        print(f"Error updating collection: {e}")
+        exit(1)
+    exit(0)
+
 # Delete collection if it exists
 try:
     collections = client.get_collections()
@@ -42,19 +65,12 @@ try:
 except Exception as e:
     print(f"Error deleting collection: {e}")
 
-# Create new collection
+# Create new collection (with payload indexes)
 try:
     print(f"Creating new collection: {QDRANT_COLLECTION_NAME}")
-    print(f"Using named vector 'default' with size={QDRANT_VECTOR_SIZE}, distance=Cosine")
-    client.create_collection(
-        collection_name=QDRANT_COLLECTION_NAME,
-        vectors_config={
-            "default": VectorParams(
-                size=QDRANT_VECTOR_SIZE,
-                distance=Distance.COSINE,
-            )
-        },
-    )
+    print(f"Using named vector 'default' with size={store.vector_size}, distance=Cosine")
+    VectorStoreService._checked_collections.discard(QDRANT_COLLECTION_NAME)
+    store.create_collection_if_not_exists()
     print("✓ Collection created successfully with vector_name='default'!")
     print("\n⚠ IMPORTANT: You need to re-upload your documents now.")
     print("The old collection has been deleted and recreated with named vector config.")
@@ -62,3 +78,7 @@ except Exception as e:
     print(f"Error creating collection: {e}")
     exit(1)
 
+# Catalog records would otherwise report re-uploads as duplicates
+catalog = get_document_catalog()
+removed = sum(catalog.delete(record['document_id']) for record in catalog.list(limit=1_000_000)['documents'])
+print(f"✓ Removed {removed} document catalog record(s)")
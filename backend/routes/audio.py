@@ -1,28 +1,112 @@
-from flask import Blueprint, send_file
+from flask import Blueprint, Response, request, send_file, jsonify, redirect, url_for
 import os
 from config import Config
+from routes.chat import get_tts_service
+from utils.tts import TTSService
+from utils.audio_janitor import get_audio_janitor
 
 audio_bp = Blueprint('audio', __name__)
 
+@audio_bp.route('/stats', methods=['GET'])
+def get_audio_stats():
+    """
+    Report TTS audio cache hit/miss counters and audio folder usage for this worker
+    """
+    return jsonify({
+        'success': True,
+        'cache': TTSService.cache_stats(),
+        'storage': get_audio_janitor().stats()
+    }), 200
+
+@audio_bp.route('/providers', methods=['GET'])
+def get_provider_health():
+    """
+    Report circuit-breaker state and rolling latency/error stats per TTS provider
+    """
+    return jsonify({'success': True, 'providers': TTSService.provider_stats()}), 200
+
+def set_immutable_cache_headers(response, etag: str):
+    """Mark a stored audio response as cacheable forever"""
+    response.set_etag(etag)  # strong ETag
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    response.cache_control.max_age = Config.AUDIO_CACHE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
 @audio_bp.route('/<filename>', methods=['GET'])
 def get_audio(filename):
     """
     Serve audio files with proper range request support for streaming
     """
+    janitor = get_audio_janitor()
+    # Hold the file against eviction until the response has been sent
+    janitor.acquire(filename)
+    released = False
     try:
         audio_path = os.path.join(Config.AUDIO_FOLDER, filename)
+        # Audio files never change once written (names are content hashes),
+        # so the name doubles as a strong ETag
+        etag = os.path.splitext(filename)[0]
+        if request.if_none_match.contains(etag) and os.path.exists(audio_path):
+            janitor.touch(filename)
+            return set_immutable_cache_headers(Response(status=304), etag)
+
         if not os.path.exists(audio_path):
-            return {'error': 'Audio file not found'}, 404
+            tts_service = get_tts_service()
+            # Progressive TTS: stream segments as they are synthesized
+            stream = tts_service.stream_audio(filename)
+            if stream is not None:
+                response = Response(
+                    stream,
+                    mimetype=tts_service.mime_type_for(filename),
+                    headers={'Cache-Control': 'no-store'}  # Incomplete until the stream ends
+                )
+                # The body is produced after this function returns: hold the
+                # file until the stream is closed
+                response.call_on_close(lambda: janitor.release(filename))
+                released = True
+                return response
+            # Deferred TTS: synthesize on first request (concurrent requests share one synthesis)
+            available = tts_service.ensure_audio(filename)
+            if not available:
+                return {'error': 'Audio file not found'}, 404
+            if available != filename:
+                # Only a fallback voice was available: its audio lives under its
+                # own (immutable) name, never under this one
+                response = redirect(url_for('audio.get_audio', filename=available), code=307)
+                response.headers['Cache-Control'] = 'no-store'
+                return response
         
+        janitor.touch(filename)
+        mimetype = TTSService.mime_type_for(filename)
+
+        # Let the front proxy move the bytes; Python only authorizes the request
+        offload = Config.AUDIO_SENDFILE_MODE
+        if offload == 'x-accel-redirect':
+            response = Response(status=200, mimetype=mimetype)
+            response.headers['X-Accel-Redirect'] = Config.AUDIO_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + filename
+            return set_immutable_cache_headers(response, etag)
+        if offload == 'x-sendfile':
+            response = Response(status=200, mimetype=mimetype)
+            response.headers['X-Sendfile'] = os.path.abspath(audio_path)
+            return set_immutable_cache_headers(response, etag)
+
         # Use send_file which automatically handles range requests (206 Partial Content)
         # This is perfect for audio streaming - browsers will request byte ranges
-        return send_file(
+        response = send_file(
             audio_path,
-            mimetype='audio/mpeg',
+            mimetype=mimetype,
             as_attachment=False,  # Stream, don't force download
-            conditional=True  # Enable conditional requests (ETag, Last-Modified)
+            conditional=True,  # Enable conditional requests (If-None-Match, If-Range)
+            etag=etag,
+            max_age=Config.AUDIO_CACHE_MAX_AGE
         )
+        response.call_on_close(lambda: janitor.release(filename))
+        released = True
+        return set_immutable_cache_headers(response, etag)
     except Exception as e:
         return {'error': str(e)}, 500
-
-
+    finally:
+        if not released:
+            janitor.release(filename)
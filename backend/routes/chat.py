@@ -1,4 +1,5 @@
 from flask import Blueprint, request, jsonify
+import time
 import uuid
 from typing import Dict
 
@@ -9,6 +10,11 @@ from utils.supabase_service import SupabaseService
 from utils.memory_service import MemoryService
 from utils.translator import TranslatorService
 from utils.vector_store import VectorStoreService
+from utils.prompt_builder import build_document_outline, format_context
+from utils.retrieval_planner import RetrievalPlanner
+from utils.document_catalog import get_document_catalog
+from utils.background import get_fanout_executor, get_background_executor, executor_stats
+from utils.canned_responses import CannedResponsePack, CANNED_TEXTS, CANNED_TEMPLATES, FALLBACK_SUGGESTIONS
 from config import Config
 
 chat_bp = Blueprint('chat', __name__)
@@ -21,6 +27,8 @@ tts_service = None
 supabase_service = None
 memory_service = None
 translator_service = None
+canned_pack = None
+retrieval_planner = None
 
 def get_embedding_service():
     global embedding_service
@@ -34,6 +42,12 @@ def get_vector_store():
         vector_store_service = VectorStoreService()
     return vector_store_service
 
+def get_retrieval_planner():
+    global retrieval_planner
+    if retrieval_planner is None:
+        retrieval_planner = RetrievalPlanner(get_vector_store())
+    return retrieval_planner
+
 def get_llm_service():
     global llm_service
     if llm_service is None:
@@ -59,7 +73,12 @@ def get_supabase_service():
 def get_memory_service():
     global memory_service
     if memory_service is None:
-        memory_service = MemoryService()
+        summarizer = None
+        try:
+            summarizer = get_llm_service().summarize_conversation
+        except Exception as e:
+            print(f"Warning: conversation summaries disabled: {e}")
+        memory_service = MemoryService(summarizer=summarizer)
     return memory_service
 
 def get_translator_service():
@@ -68,6 +87,32 @@ def get_translator_service():
         translator_service = TranslatorService()
     return translator_service
 
+def get_canned_pack():
+    global canned_pack
+    if canned_pack is None:
+        canned_pack = CannedResponsePack()
+    return canned_pack
+
+
+def timed_call(timings: Dict, stage: str, fn, *args, **kwargs):
+    """Run fn and record its wall time in milliseconds under timings[stage]"""
+    started = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        timings[stage] = (time.perf_counter() - started) * 1000
+
+
+def format_server_timing(timings: Dict) -> str:
+    """Render stage timings as a Server-Timing header value"""
+    parts = []
+    for stage, value in timings.items():
+        if isinstance(value, (int, float)):
+            parts.append(f"{stage};dur={value:.1f}")
+        else:
+            parts.append(f'{stage};desc="{value}"')
+    return ", ".join(parts)
+
 
 @chat_bp.route('/message', methods=['POST', 'OPTIONS'])
 def send_message():
@@ -111,12 +156,12 @@ def send_message():
         
         # Get services
         embedding_service = get_embedding_service()
-        vector_store = get_vector_store()
         llm_service = get_llm_service()
         tts_service = get_tts_service()
         supabase_service = get_supabase_service()
         memory_service = get_memory_service()
         translator_service = get_translator_service()
+        canned = get_canned_pack()
         
         def localize_text(text: str) -> str:
             if not text:
@@ -129,110 +174,83 @@ def send_message():
             except Exception as translate_error:
                 print(f"Warning: translation failed for language {language}: {translate_error}")
                 return text
-        
+
+        def render_canned(template_key: str, values: Dict) -> str:
+            # The template comes from the pack; only the dynamic values (chapter
+            # titles, topic) are translated live, in one batch.
+            template = canned.template(template_key, language)
+            if not template:
+                return localize_text(CANNED_TEMPLATES[template_key].format(**values))
+            text_keys = [key for key, value in values.items() if isinstance(value, str) and value]
+            language_value = (language or '').lower()
+            if text_keys and not language_value.startswith('en'):
+                try:
+                    translated = translator_service.translate_batch([values[key] for key in text_keys], language)
+                    values = {**values, **dict(zip(text_keys, translated))}
+                except Exception as translate_error:
+                    print(f"Warning: translation failed for language {language}: {translate_error}")
+            return template.format(**values)
+        
+        stage_timings = {}
+        request_started = time.perf_counter()
+
         # Generate embedding for user query
-        query_embedding = embedding_service.generate_embedding(user_message)
+        query_embedding = timed_call(stage_timings, 'embed', embedding_service.generate_embedding, user_message)
         if not query_embedding:
             return jsonify({'error': 'Failed to generate query embedding'}), 500
         
-        # Enhanced retrieval: Try multiple strategies
-        # Strategy 1: Direct semantic search with document filter
-        results = vector_store.search_similar(
-            query_vector=query_embedding,
-            limit=10,  # Increased limit for better context
-            filter_conditions={'document_id': document_id}
+        retrieval_started = time.perf_counter()
+
+        # Document structure (always sent as the prompt outline) comes from the
+        # catalog; documents ingested before the catalog existed fall back to
+        # a structure sample in the same batched Qdrant request as the context
+        catalog_record = get_document_catalog().get(document_id)
+        retrieval = get_retrieval_planner().chat_turn(
+            query_embedding,
+            document_id,
+            context_limit=10,
+            structure_sample=0 if catalog_record else 128
         )
+        results = retrieval['results']
         
-        # Strategy 2: If no results, try without filter (fallback)
-        if not results or len(results) == 0:
-            results = vector_store.search_similar(
-                query_vector=query_embedding,
-                limit=10,
-                filter_conditions=None
-            )
-            # Filter results by document_id manually
-            results = [r for r in results if r['payload'].get('document_id') == document_id]
-        
-        # Strategy 3: For chapter/unit count queries, get metadata directly
-        query_lower = user_message.lower()
-        is_count_query = any(keyword in query_lower for keyword in [
-            'how many chapters', 'how many units', 'number of chapters', 'number of units',
-            'what are the chapters', 'list of chapters', 'chapter names'
-        ])
-        
-        # Extract chapter/unit metadata from results
-        chapter_titles = set()
-        unit_titles = set()
-        chapter_count_from_metadata = None
-        unit_count_from_metadata = None
-        
-        for result in results:
-            payload = result.get('payload', {})
-            if payload.get('chapter_title'):
-                chapter_titles.add(payload['chapter_title'])
-            if payload.get('unit_title'):
-                unit_titles.add(payload['unit_title'])
-            if payload.get('document_chapter_count') is not None:
-                chapter_count_from_metadata = payload['document_chapter_count']
-            if payload.get('document_unit_count') is not None:
-                unit_count_from_metadata = payload['document_unit_count']
-
-        def enrich_document_structure():
-            nonlocal chapter_count_from_metadata, unit_count_from_metadata
-            try:
-                if not chapter_titles or not unit_titles or chapter_count_from_metadata is None or unit_count_from_metadata is None:
-                    samples = vector_store.get_document_metadata_samples(document_id, limit=128)
-                    for payload in samples:
-                        chapter_value = payload.get('chapter_title')
-                        unit_value = payload.get('unit_title')
-                        if chapter_value:
-                            chapter_titles.add(chapter_value)
-                        if unit_value:
-                            unit_titles.add(unit_value)
-                        if chapter_count_from_metadata is None and payload.get('document_chapter_count') is not None:
-                            chapter_count_from_metadata = payload.get('document_chapter_count')
-                        if unit_count_from_metadata is None and payload.get('document_unit_count') is not None:
-                            unit_count_from_metadata = payload.get('document_unit_count')
-            except Exception as meta_error:
-                print(f"Warning: failed to enrich document structure: {meta_error}")
-        
-        enrich_document_structure()
-
-        chapter_titles_list = sorted(chapter_titles, key=lambda title: title.lower()) if chapter_titles else []
-        unit_titles_list = sorted(unit_titles, key=lambda title: title.lower()) if unit_titles else []
+        if catalog_record:
+            chapter_titles_list = [chapter['title'] for chapter in catalog_record.get('chapters', [])]
+            unit_titles_list = [unit['title'] for unit in catalog_record.get('units', [])]
+            chapter_count_from_metadata = catalog_record.get('chapter_count')
+            unit_count_from_metadata = catalog_record.get('unit_count')
+        else:
+            chapter_titles = set()
+            unit_titles = set()
+            chapter_count_from_metadata = None
+            unit_count_from_metadata = None
+            
+            for payload in retrieval['structure']:
+                if payload.get('chapter_title'):
+                    chapter_titles.add(payload['chapter_title'])
+                if payload.get('unit_title'):
+                    unit_titles.add(payload['unit_title'])
+                if chapter_count_from_metadata is None and payload.get('document_chapter_count') is not None:
+                    chapter_count_from_metadata = payload['document_chapter_count']
+                if unit_count_from_metadata is None and payload.get('document_unit_count') is not None:
+                    unit_count_from_metadata = payload['document_unit_count']
+
+            chapter_titles_list = sorted(chapter_titles, key=lambda title: title.lower()) if chapter_titles else []
+            unit_titles_list = sorted(unit_titles, key=lambda title: title.lower()) if unit_titles else []
         
         if chapter_titles_list and chapter_count_from_metadata is None:
             chapter_count_from_metadata = len(chapter_titles_list)
         if unit_titles_list and unit_count_from_metadata is None:
             unit_count_from_metadata = len(unit_titles_list)
         
-        # Collect ALL retrieved text with metadata
-        retrieved_context_parts = []
-        for r in results:
-            text = r['payload'].get('text', '')
-            if text:
-                # Add chapter/unit context if available
-                chapter_info = ""
-                if r['payload'].get('chapter_title'):
-                    chapter_info = f"[Chapter: {r['payload'].get('chapter_title')}] "
-                if r['payload'].get('unit_title'):
-                    chapter_info += f"[Unit: {r['payload'].get('unit_title')}] "
-                retrieved_context_parts.append(chapter_info + text)
-        
-        retrieved_context = "\n\n".join(retrieved_context_parts)
-        
-        # For count queries, add explicit metadata to context
-        if (is_count_query or chapter_titles_list or unit_titles_list) and (chapter_count_from_metadata is not None or unit_count_from_metadata is not None):
-            metadata_context = "\n\n[Document Metadata]\n"
-            if chapter_count_from_metadata is not None:
-                metadata_context += f"Total chapters in this textbook: {chapter_count_from_metadata}\n"
-            if unit_count_from_metadata is not None:
-                metadata_context += f"Total units in this textbook: {unit_count_from_metadata}\n"
-            if chapter_titles_list:
-                metadata_context += f"Chapter titles found: {', '.join(chapter_titles_list)}\n"
-            if unit_titles_list:
-                metadata_context += f"Unit titles found: {', '.join(unit_titles_list)}\n"
-            retrieved_context = metadata_context + "\n" + retrieved_context
+        # Retrieved text in document order; the structure goes in the outline,
+        # which stays identical across questions on the same document
+        retrieved_context = format_context(results)
+        document_outline = build_document_outline(
+            chapter_titles_list,
+            unit_titles_list,
+            chapter_count=chapter_count_from_metadata,
+            unit_count=unit_count_from_metadata
+        )
         
         # Normalize language code (e.g., 'en' -> 'en-IN', 'hi' -> 'hi-IN')
         normalized_language = language
@@ -248,23 +266,13 @@ def send_message():
             }
             normalized_language = lang_map.get(normalized_language, 'en-IN')
         
-        # CRITICAL: If no context retrieved, try one more broad search
-        if not retrieved_context or not retrieved_context.strip():
-            try:
-                generic_query = "textbook content chapters units"
-                generic_embedding = embedding_service.generate_embedding(generic_query)
-                if generic_embedding:
-                    fallback_results = vector_store.search_similar(
-                        query_vector=generic_embedding,
-                        limit=5,
-                        filter_conditions={'document_id': document_id}
-                    )
-                    retrieved_context = "\n\n".join([r['payload'].get('text', '') for r in fallback_results if r['payload'].get('text')])
-            except Exception as e:
-                print(f"Fallback search failed: {e}")
-        
-        context_available = bool(retrieved_context and retrieved_context.strip())
-        unavailable_reply = "Sorry, the textbook does not contain this information."
+        context_available = bool((retrieved_context and retrieved_context.strip()) or document_outline)
+        stage_timings['retrieve'] = (time.perf_counter() - retrieval_started) * 1000
+        unavailable_reply = canned.text('unavailable', language)
+        # Pre-synthesized audio only matches the pack's own text
+        unavailable_audio = canned.audio('unavailable', language) if unavailable_reply else None
+        if not unavailable_reply:
+            unavailable_reply = localize_text(CANNED_TEXTS['unavailable'])
         
         # Helper: heuristic responses for chapter/unit queries
         user_message_lower = user_message.lower()
@@ -275,20 +283,20 @@ def send_message():
             chapter_sentence = "; ".join(chapter_titles_list)
             return chapter_sentence
 
-        def handle_chapter_specific_queries() -> str:
+        def handle_chapter_specific_queries():
             if not chapter_titles_list:
-                return ""
+                return None
             summary_sentence = build_chapter_summary_response()
             chapter_count = chapter_count_from_metadata or len(chapter_titles_list)
             if any(phrase in user_message_lower for phrase in ['how many chapters', 'number of chapters', 'total chapters']):
-                return f"This textbook contains {chapter_count} chapters. They are: {summary_sentence}."
+                return 'chapter_count', {'count': chapter_count, 'chapters': summary_sentence}
             if any(phrase in user_message_lower for phrase in ['what are the chapters', 'chapter names', 'list of chapters', 'chapters names']):
-                return f"The chapter names are: {summary_sentence}."
-            return ""
+                return 'chapter_names', {'chapters': summary_sentence}
+            return None
 
-        def handle_topic_absence_queries() -> str:
+        def handle_topic_absence_queries():
             if not chapter_titles_list:
-                return ""
+                return None
             topic_keywords = [
                 'history', 'science', 'math', 'physics', 'chemistry', 'biology',
                 'geography', 'civics', 'social', 'economics', 'politics'
@@ -298,57 +306,82 @@ def send_message():
                     topic_present = any(keyword in title.lower() for title in chapter_titles_list)
                     if not topic_present:
                         summary_sentence = build_chapter_summary_response()
-                        return (
-                            f"This textbook focuses on these chapters: {summary_sentence}. "
-                            f"It does not include any dedicated chapters about {keyword.title()}."
-                        )
-            return ""
-
-        # Build conversation history (prefer client data if provided)
-        conversation_history = []
-        if isinstance(history_from_client, list) and history_from_client:
-            for message in history_from_client[-5:]:  # Last 5 messages
-                role = message.get('role')
-                content = message.get('content')
-                if role in ('user', 'assistant') and content:
-                    conversation_history.append({'role': role, 'content': content})
-        else:
-            conversation_history = memory_service.get_conversation_history(session_id)
+                        return 'topic_absent', {'chapters': summary_sentence, 'topic': keyword.title()}
+            return None
+
+        # Build conversation history: rolling summary + recent turns under the
+        # token budget (client data is used when this session isn't in memory)
+        conversation_history = memory_service.get_prompt_history(
+            session_id,
+            fallback=history_from_client if isinstance(history_from_client, list) else None
+        )
         
         heuristic_reply = handle_chapter_specific_queries() or handle_topic_absence_queries()
         ai_response = None
+        canned_audio = None
 
         if heuristic_reply:
-            ai_response = localize_text(heuristic_reply)
+            ai_response = render_canned(*heuristic_reply)
         elif context_available:
-            ai_response = llm_service.generate_response(
+            ai_response = timed_call(
+                stage_timings, 'llm', llm_service.generate_response,
                 user_message=user_message,
                 context=retrieved_context,
                 conversation_history=conversation_history,
-                language=normalized_language
+                language=normalized_language,
+                outline=document_outline
             )
         else:
-            ai_response = localize_text(unavailable_reply)
+            ai_response, canned_audio = unavailable_reply, unavailable_audio
         
         if not ai_response:
-            ai_response = localize_text(unavailable_reply)
+            ai_response, canned_audio = unavailable_reply, unavailable_audio
         
-        # Convert response to speech (handle errors gracefully)
-        audio_filename = None
-        try:
-            audio_filename = tts_service.text_to_speech(ai_response, normalized_language, session_id)
-            if not audio_filename:
-                print(f"Warning: TTS service returned None for language: {normalized_language}")
-        except Exception as tts_error:
-            print(f"Warning: TTS generation failed: {tts_error}")
-            import traceback
-            traceback.print_exc()
-            # Continue without audio - don't fail the request
-        
-        # Save conversation to Supabase (optional - don't fail if it fails)
-        if supabase_service:
+        # Post-answer fan-out: TTS runs on the fan-out pool while the memory
+        # update runs on this thread; persistence is buffered once audio is known.
+        fanout_started = time.perf_counter()
+
+        def synthesize_audio():
+            if canned_audio:
+                return canned_audio
             try:
-                supabase_service.save_conversation(
+                if tts_service.mode in ('deferred', 'speculative'):
+                    # Synthesized on first fetch of /api/audio/<filename>
+                    filename = tts_service.defer_text_to_speech(ai_response, normalized_language, session_id)
+                else:
+                    filename = tts_service.text_to_speech(ai_response, normalized_language, session_id)
+                if not filename:
+                    print(f"Warning: TTS service returned None for language: {normalized_language}")
+                return filename
+            except Exception as tts_error:
+                print(f"Warning: TTS generation failed: {tts_error}")
+                import traceback
+                traceback.print_exc()
+                # Continue without audio - don't fail the request
+                return None
+
+        audio_future = get_fanout_executor().submit(timed_call, stage_timings, 'tts', synthesize_audio)
+
+        # Update conversation history in memory
+        timed_call(stage_timings, 'memory', memory_service.add_to_history, session_id, user_message, ai_response)
+
+        audio_filename = audio_future.result()
+        stage_timings['fanout'] = (time.perf_counter() - fanout_started) * 1000
+
+        # Save conversation to Supabase (optional - don't fail if it fails).
+        # With write-behind this only appends to an in-memory buffer.
+        if supabase_service:
+            if supabase_service.write_buffer is not None:
+                timed_call(stage_timings, 'persistence', supabase_service.save_conversation,
+                           session_id=session_id,
+                           document_id=document_id,
+                           user_message=user_message,
+                           ai_response=ai_response,
+                           audio_path=audio_filename,
+                           language=language)
+            else:
+                queued = get_background_executor().submit_nowait(
+                    supabase_service.save_conversation,
                     session_id=session_id,
                     document_id=document_id,
                     user_message=user_message,
@@ -356,11 +389,7 @@ def send_message():
                     audio_path=audio_filename,
                     language=language
                 )
-            except Exception as e:
-                print(f"Warning: Failed to save conversation to Supabase: {e}")
-        
-        # Update conversation history in memory
-        memory_service.add_to_history(session_id, user_message, ai_response)
+                stage_timings['persistence'] = 'queued' if queued else 'dropped'
         
         # Build sources payload
         sources_payload = []
@@ -372,14 +401,19 @@ def send_message():
                 'chunk_index': payload.get('chunk_index')
             })
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'session_id': session_id,
             'response': ai_response,
             'audio_url': f'/api/audio/{audio_filename}' if audio_filename else None,
+            'audio_mime_type': tts_service.mime_type_for(audio_filename) if audio_filename else None,
             'context_used': len(results),
             'sources': sources_payload
-        }), 200
+        })
+        if Config.CHAT_TIMING_HEADER:
+            stage_timings['total'] = (time.perf_counter() - request_started) * 1000
+            response.headers['Server-Timing'] = format_server_timing(stage_timings)
+        return response, 200
         
     except Exception as e:
         print(f"Error in send_message: {e}")
@@ -387,6 +421,18 @@ def send_message():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+def localize_suggestions(questions, language):
+    """Translate a list of suggested questions in a single Translator call"""
+    language_value = (language or '').lower()
+    if not language_value or language_value.startswith('en'):
+        return questions
+    try:
+        return get_translator_service().translate_batch(questions, language)
+    except Exception as translate_error:
+        print(f"Warning: suggestion translation failed for language {language}: {translate_error}")
+        return questions
+
+
 @chat_bp.route('/suggestions', methods=['POST'])
 def get_suggestions():
     """
@@ -415,10 +461,10 @@ def get_suggestions():
             return jsonify({'error': 'No document_id provided'}), 400
         
         # Get services
-        vector_store = get_vector_store()
         embedding_service = get_embedding_service()
         
-        # Try multiple search queries to get diverse content
+        # Several queries for diverse content: one embeddings call and one
+        # batched Qdrant request, results deduplicated across queries
         search_queries = [
             "introduction overview summary beginning",
             "main topics concepts key points",
@@ -426,36 +472,15 @@ def get_suggestions():
         ]
         
         all_chunks = []
-        for query_text in search_queries:
-            try:
-                query_embedding = embedding_service.generate_embedding(query_text)
-                if query_embedding:
-                    search_results = vector_store.search_similar(
-                        query_vector=query_embedding,
-                        limit=2,
-                        filter_conditions={'document_id': document_id}
-                    )
-                    for result in search_results:
-                        chunk_text = result['payload'].get('text', '')
-                        if chunk_text and chunk_text not in all_chunks:
-                            all_chunks.append(chunk_text)
-            except Exception as e:
-                print(f"Error in search query '{query_text}': {e}")
-                continue
-        
-        # If no chunks found, try a broader search
-        if not all_chunks:
-            try:
-                query_embedding = embedding_service.generate_embedding("textbook content")
-                if query_embedding:
-                    search_results = vector_store.search_similar(
-                        query_vector=query_embedding,
-                        limit=5,
-                        filter_conditions={'document_id': document_id}
-                    )
-                    all_chunks = [result['payload'].get('text', '') for result in search_results if result['payload'].get('text')]
-            except Exception as e:
-                print(f"Error in fallback search: {e}")
+        try:
+            query_embeddings = embedding_service.generate_embeddings_batch(search_queries)
+            search_results = get_retrieval_planner().multi_query(query_embeddings, document_id, limit_per_query=2, fields=['text'])
+            for result in search_results:
+                chunk_text = result['payload'].get('text', '')
+                if chunk_text and chunk_text not in all_chunks:
+                    all_chunks.append(chunk_text)
+        except Exception as e:
+            print(f"Error in suggestion search: {e}")
         
         # Build context from retrieved chunks (limit to first 2000 chars)
         context = "\n\n".join(all_chunks[:5])[:2000]
@@ -510,18 +535,13 @@ Output format: Write each question on a separate line. Do not include any explan
                 if question_list and len(question_list) >= 3:
                     return jsonify({
                         'success': True,
-                        'suggestions': question_list
+                        'suggestions': localize_suggestions(question_list, language)
                     }), 200
             except Exception as e:
                 print(f"Error generating suggestions with LLM: {e}")
         
         # Fallback: Return generic but useful questions
-        fallback_questions = [
-            "What is the main topic of this textbook?",
-            "Can you summarize the key points?",
-            "What are the important concepts I should learn?",
-            "Can you explain the basics in simpler terms?"
-        ]
+        fallback_questions = get_canned_pack().suggestions(language) or localize_suggestions(FALLBACK_SUGGESTIONS, language)
         
         return jsonify({
             'success': True,
@@ -532,29 +552,71 @@ Output format: Write each question on a separate line. Do not include any explan
         print(f"Error in get_suggestions: {e}")
         return jsonify({
             'success': True,
-            'suggestions': [
-                "What is the main topic of this textbook?",
-                "Can you summarize the key points?",
-                "What are the important concepts I should learn?",
-                "Can you explain the basics in simpler terms?"
-            ]
+            'suggestions': list(FALLBACK_SUGGESTIONS)
         }), 200
 
+@chat_bp.route('/stats', methods=['GET'])
+def get_chat_stats():
+    """
+    Report translation, prompt-cache, session-store, catalog, persistence and
+    background-executor counters for this worker
+    """
+    supabase_service = get_supabase_service()
+    return jsonify({
+        'success': True,
+        'post_translation': LLMService.translation_stats(),
+        'prompt_cache': LLMService.prompt_cache_stats(),
+        'sessions': get_memory_service().stats(),
+        'document_catalog': get_document_catalog().stats(),
+        'persistence': supabase_service.persistence_stats() if supabase_service else {},
+        'translation_cache': TranslatorService.cache_stats(),
+        'executors': executor_stats()
+    }), 200
+
 @chat_bp.route('/history/<session_id>', methods=['GET'])
 def get_conversation_history(session_id):
     """
     Retrieve conversation history for a session
+
+    Query params:
+        limit: Rows per page
+        cursor: next_cursor of the previous page, to load older turns
     """
     try:
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor') or None
         supabase_service = get_supabase_service()
         if supabase_service:
-            history = supabase_service.get_conversation_history(session_id)
-            return jsonify({'success': True, 'history': history}), 200
+            try:
+                page = supabase_service.get_conversation_page(session_id, limit=limit, cursor=cursor)
+            except ValueError as cursor_error:
+                return jsonify({'error': str(cursor_error)}), 400
+            return jsonify({
+                'success': True,
+                'history': page['items'],
+                'next_cursor': page['next_cursor'],
+                'has_more': page['has_more']
+            }), 200
         else:
             # Return in-memory history if Supabase is not available
             memory_service = get_memory_service()
             history = memory_service.get_conversation_history(session_id)
-            return jsonify({'success': True, 'history': history}), 200
+            return jsonify({'success': True, 'history': history, 'next_cursor': None, 'has_more': False}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@chat_bp.route('/sessions/<document_id>', methods=['GET'])
+def get_document_sessions(document_id):
+    """
+    List the sessions for a document, most recently active first
+    """
+    try:
+        supabase_service = get_supabase_service()
+        if not supabase_service:
+            return jsonify({'success': True, 'sessions': []}), 200
+        limit = max(1, min(request.args.get('limit', 100, type=int), Config.HISTORY_MAX_PAGE_SIZE))
+        sessions = supabase_service.get_sessions_by_document(document_id, limit=limit)
+        return jsonify({'success': True, 'sessions': sessions}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -568,4 +630,8 @@ def add_chat_cors_headers(response):
     response.headers['Access-Control-Allow-Credentials'] = 'true'
     response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Requested-With, Accept'
     response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS, PATCH'
+    if Config.CHAT_TIMING_HEADER and origin in Config.FRONTEND_ALLOWED_ORIGINS:
+        # Same-origin requests see Server-Timing anyway; only allowed origins get it cross-origin
+        response.headers['Access-Control-Expose-Headers'] = 'Server-Timing'
+        response.headers['Timing-Allow-Origin'] = origin
     return response
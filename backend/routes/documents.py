@@ -0,0 +1,102 @@
+from flask import Blueprint, request, jsonify
+import os
+from config import Config
+from routes.chat import get_vector_store
+from utils.document_catalog import get_document_catalog
+
+documents_bp = Blueprint('documents', __name__)
+
+@documents_bp.route('', methods=['GET'])
+def list_documents():
+    """
+    List ingested documents from the catalog, newest first
+
+    Query params:
+        limit: Documents per page (max 200)
+        offset: Documents to skip
+    """
+    try:
+        limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+        offset = max(0, request.args.get('offset', 0, type=int))
+        page = get_document_catalog().list(limit=limit, offset=offset)
+        return jsonify({
+            'success': True,
+            'documents': page['documents'],
+            'total': page['total'],
+            'limit': limit,
+            'offset': offset
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@documents_bp.route('/<document_id>', methods=['GET'])
+def get_document(document_id):
+    """
+    Catalog record for one document: filename, hash, page count, outline,
+    chunk count and ingest timings
+    """
+    try:
+        record = get_document_catalog().get(document_id)
+        if record is None:
+            return jsonify({'error': 'Document not found'}), 404
+        return jsonify({'success': True, 'document': record}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@documents_bp.route('/<document_id>', methods=['DELETE'])
+def delete_document(document_id):
+    """
+    Delete a document in one pass: its vectors, the stored original and its
+    catalog record
+
+    Conversation history is kept. Audio is left to the janitor's LRU
+    eviction: files are content-addressed, so the same answer audio may be
+    shared with other documents' conversations.
+    """
+    if not document_id or os.path.basename(document_id) != document_id or document_id.startswith('.'):
+        return jsonify({'error': 'Invalid document id'}), 400
+
+    def log_progress(stage, report):
+        print(f"[delete_document] {document_id}: {stage} {report}")
+
+    try:
+        catalog = get_document_catalog()
+        record = catalog.get(document_id)
+
+        # Vectors: server-side filter delete, counted before and after
+        vectors = get_vector_store().delete_document(document_id, progress=log_progress)
+
+        # Stored original (extension is in the catalog; older documents aren't)
+        extensions = [record['file_ext']] if record and record.get('file_ext') else sorted(Config.ALLOWED_EXTENSIONS)
+        files_removed = 0
+        for ext in extensions:
+            try:
+                os.remove(os.path.join(Config.UPLOAD_FOLDER, f"{document_id}.{ext}"))
+                files_removed += 1
+            except FileNotFoundError:
+                pass
+        log_progress('files', {'removed': files_removed})
+
+        if not (record or vectors['matched'] or files_removed):
+            return jsonify({'error': 'Document not found'}), 404
+        if vectors['remaining']:
+            # Keep the catalog record so the document stays listed until a retry succeeds
+            return jsonify({
+                'error': 'Some vectors could not be deleted, please retry',
+                'document_id': document_id,
+                'vectors': vectors
+            }), 500
+
+        catalog_removed = catalog.delete(document_id)
+
+        return jsonify({
+            'success': True,
+            'document_id': document_id,
+            'vectors': vectors,
+            'files_removed': files_removed,
+            'catalog_removed': catalog_removed
+        }), 200
+    except Exception as e:
+        import traceback
+        print(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 import os
+import time
 import uuid
 from datetime import datetime
 from math import ceil
@@ -7,7 +8,8 @@ from werkzeug.utils import secure_filename
 
 from utils.document_parser import DocumentParser, compute_file_hash
 from utils.embedding_service import EmbeddingService
-from utils.vector_store import VectorStoreService
+from utils.vector_store import VectorStoreService, chunk_point_id, document_id_for_hash
+from utils.document_catalog import build_outline, get_document_catalog
 from config import Config
 
 upload_bp = Blueprint('upload', __name__)
@@ -47,10 +49,14 @@ def upload_document():
         # Ensure collection exists with named vector "default" before any operations
         vector_store.create_collection_if_not_exists()
 
-        existing_docs = vector_store.search_by_hash(file_hash)
+        # The catalog knows every document ingested since it was introduced;
+        # older documents still carry the hash in their chunk payloads
+        existing = get_document_catalog().find_by_hash(file_hash)
+        if existing is None:
+            existing_docs = vector_store.search_by_hash(file_hash)
+            existing = existing_docs[0] if existing_docs else None
 
-        if existing_docs:
-            existing = existing_docs[0]
+        if existing:
             try: os.remove(temp_path)
             except: pass
 
@@ -66,9 +72,11 @@ def upload_document():
         if reprocess:
             vector_store.delete_by_hash(file_hash)
 
-        document_id = str(uuid.uuid4())
+        # Derived from the content hash, so an interrupted or retried ingest
+        # of the same file writes to the same document and point ids
+        document_id = document_id_for_hash(file_hash)
         final_path = os.path.join(Config.UPLOAD_FOLDER, f"{document_id}.{file_ext}")
-        os.rename(temp_path, final_path)
+        os.replace(temp_path, final_path)
 
         # Lazy-load Document Parser to avoid startup crash
         print(f"[upload_document] Initializing DocumentParser for file: {filename} ({file_ext})")
@@ -78,10 +86,14 @@ def upload_document():
             print(f"[upload_document] Using Azure OCR only — no fallback.")
         
         document_parser = DocumentParser()
+        timings = {}
+        ingest_started = time.perf_counter()
 
         try:
             print(f"[upload_document] Starting document parsing for: {filename}")
+            stage_started = time.perf_counter()
             text_content, metadata = document_parser.parse_document(final_path, file_ext)
+            timings['parse_ms'] = round((time.perf_counter() - stage_started) * 1000, 1)
             extraction_source = metadata.get('source', 'unknown')
             print(f"[upload_document] [OK] Document parsing successful using: {extraction_source}")
             print(f"[upload_document] Extracted text length: {len(text_content)} characters")
@@ -109,12 +121,14 @@ def upload_document():
             return jsonify({'error': 'File contains no readable text'}), 400
 
         # Chunk text
+        stage_started = time.perf_counter()
         chunks = document_parser.chunk_text(
             text_content,
             chunk_size=Config.CHUNK_SIZE,
             chunk_overlap=Config.CHUNK_OVERLAP,
             metadata=metadata
         )
+        timings['chunk_ms'] = round((time.perf_counter() - stage_started) * 1000, 1)
 
         if not chunks:
             try: os.remove(final_path)
@@ -129,9 +143,14 @@ def upload_document():
 
         stored = 0
         pending_points = []
+        point_ids = []
+        embed_seconds = 0.0
+        store_seconds = 0.0
 
         for chunk in chunks:
+            stage_started = time.perf_counter()
             embedding = embedding_service.generate_embedding(chunk['text'])
+            embed_seconds += time.perf_counter() - stage_started
             if not embedding:
                 continue
 
@@ -143,35 +162,38 @@ def upload_document():
             else:
                 page_number = 1
 
+            # Chunk-level fields only; filename, hash and counts live once in
+            # the document catalog
             payload = {
                 'document_id': document_id,
-                'file_hash': file_hash,
-                'filename': filename,
                 'text': chunk['text'],
                 'page': page_number,
                 'chunk_index': chunk['chunk_index'],
                 'chapter_number': chunk.get('chapter_number'),
                 'chapter_title': chunk.get('chapter_title'),
                 'unit_number': chunk.get('unit_number'),
-                'unit_title': chunk.get('unit_title'),
-                'document_chapter_count': metadata.get('chapter_count'),
-                'document_unit_count': metadata.get('unit_count'),
-                'document_page_count': metadata.get('page_count')
+                'unit_title': chunk.get('unit_title')
             }
 
+            point_id = chunk_point_id(document_id, chunk['chunk_index'], chunk['text'])
+            point_ids.append(point_id)
             pending_points.append({
-                'id': str(uuid.uuid4()),
+                'id': point_id,
                 'vector': embedding,
                 'payload': payload
             })
 
             if len(pending_points) >= 48:
+                stage_started = time.perf_counter()
                 vector_store.upsert_points_in_batches(pending_points, batch_size=48)
+                store_seconds += time.perf_counter() - stage_started
                 stored += len(pending_points)
                 pending_points = []
 
         if pending_points:
+            stage_started = time.perf_counter()
             vector_store.upsert_points_in_batches(pending_points, batch_size=48)
+            store_seconds += time.perf_counter() - stage_started
             stored += len(pending_points)
 
         if stored == 0:
@@ -179,12 +201,58 @@ def upload_document():
             except: pass
             return jsonify({'error': 'Failed to generate embeddings'}), 500
 
+        # Batches above are fire-and-forget; only report success once every
+        # chunk is searchable, so the first question sees the whole document
+        stage_started = time.perf_counter()
+        try:
+            vector_store.finalize_document(document_id, point_ids)
+        except TimeoutError as e:
+            print(f"[upload_document] [ERROR] {e}")
+            return jsonify({'error': 'Document is still being indexed, please retry the upload shortly', 'document_id': document_id}), 503
+        store_seconds += time.perf_counter() - stage_started
+
+        timings['embed_ms'] = round(embed_seconds * 1000, 1)
+        timings['store_ms'] = round(store_seconds * 1000, 1)
+        timings['total_ms'] = round((time.perf_counter() - ingest_started) * 1000, 1)
+
+        # Structure manifest: chat turns read the outline from here, not Qdrant
+        outline = build_outline(chunks)
+        try:
+            get_document_catalog().put({
+                'document_id': document_id,
+                'filename': filename,
+                'file_hash': file_hash,
+                'file_ext': file_ext,
+                'file_size': os.path.getsize(final_path),
+                'extraction_source': extraction_source,
+                'page_count': page_count,
+                'chapter_count': metadata.get('chapter_count') or len(outline['chapters']) or None,
+                'unit_count': metadata.get('unit_count') or len(outline['units']) or None,
+                'chapters': outline['chapters'],
+                'units': outline['units'],
+                'chunk_count': len(chunks),
+                'stored_chunks': stored,
+                'total_chars': total_chars,
+                'timings': timings,
+            })
+        except Exception as catalog_error:
+            # The catalog is the only record of the file hash (chunk payloads
+            # don't carry it), so without it a re-upload isn't seen as a
+            # duplicate. Fail so the client retries; ids are derived from the
+            # hash, so the retry overwrites these points instead of adding more.
+            print(f"[upload_document] [ERROR] catalog write failed: {catalog_error}")
+            return jsonify({
+                'error': 'Document was indexed but could not be recorded, please retry the upload',
+                'document_id': document_id
+            }), 500
+
         return jsonify({
             'success': True,
             'document_id': document_id,
             'filename': filename,
             'stored_chunks': stored,
             'total_chunks': len(chunks),
+            'timings': timings,
             'message': 'Document processed successfully'
         }), 200
 
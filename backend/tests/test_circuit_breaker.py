@@ -0,0 +1,22 @@
+from utils.circuit_breaker import CircuitBreaker
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow_request()
+        breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_recovered_breaker_does_not_reopen_on_one_failure():
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=0, window=10, min_calls=3)
+    trip(breaker)
+
+    assert breaker.allow_request()  # half-open probe
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.allow_request()
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()['consecutive_failures'] == 1
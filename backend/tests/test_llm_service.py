@@ -0,0 +1,126 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('dotenv')
+pytest.importorskip('openai')
+
+from openai import OpenAI
+from openai.types.chat import ChatCompletion
+
+from bench_prompt_cache import FakeCompletionHandler
+from config import Config
+from utils.llm_service import LLMService
+from utils.memory_service import MemoryService
+from utils.prompt_builder import PromptBuilder, build_document_outline
+
+
+def fake_completion(prompt_tokens, cached_tokens):
+    """A Chat Completions response as openai 1.12 parses it from the wire"""
+    return ChatCompletion.model_validate({
+        'id': 'chatcmpl-test',
+        'object': 'chat.completion',
+        'created': 0,
+        'model': 'gpt-4o-mini',
+        'choices': [{
+            'index': 0,
+            'finish_reason': 'stop',
+            'message': {'role': 'assistant', 'content': 'Answer'},
+        }],
+        'usage': {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': 5,
+            'total_tokens': prompt_tokens + 5,
+            'prompt_tokens_details': {'cached_tokens': cached_tokens},
+        },
+    })
+
+
+@pytest.fixture(autouse=True)
+def reset_prompt_cache_stats(monkeypatch):
+    monkeypatch.setattr(LLMService, '_prompt_cache_stats', {'requests': 0, 'prompt_tokens': 0, 'cached_tokens': 0})
+
+
+@pytest.fixture
+def fake_endpoint():
+    """Local Chat Completions endpoint that models provider prefix caching"""
+    FakeCompletionHandler.cache.clear()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeCompletionHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+def test_record_usage_counts_cached_tokens_from_completion():
+    LLMService._record_usage(fake_completion(2048, 1536).usage)
+    LLMService._record_usage(fake_completion(2048, 0).usage)
+
+    stats = LLMService.prompt_cache_stats()
+    assert stats['requests'] == 2
+    assert stats['prompt_tokens'] == 4096
+    assert stats['cached_tokens'] == 1536
+    assert stats['cached_ratio'] == 0.375
+
+
+def test_record_usage_without_details():
+    completion = fake_completion(100, 0)
+    completion.usage.prompt_tokens_details = None
+    LLMService._record_usage(completion.usage)
+    LLMService._record_usage(None)
+
+    stats = LLMService.prompt_cache_stats()
+    assert stats['requests'] == 1
+    assert stats['cached_tokens'] == 0
+
+
+def test_prompt_layout_keeps_history_in_the_stable_prefix():
+    builder = PromptBuilder("system", history_limit=None)
+    history = [
+        {'role': 'system', 'content': 'summary'},
+        {'role': 'user', 'content': 'q1'},
+        {'role': 'assistant', 'content': 'a1'},
+    ]
+    first = builder.build('q2', 'context for q2', 'English', outline='outline', conversation_history=history)
+    second = builder.build(
+        'q3', 'context for q3', 'English', outline='outline',
+        conversation_history=history + [{'role': 'user', 'content': 'q2'}, {'role': 'assistant', 'content': 'a2'}]
+    )
+
+    contents = [message['content'] for message in first]
+    assert contents[1:4] == ['summary', 'q1', 'a1']
+    assert first[-2]['content'] == '<context>\ncontext for q2\n</context>'
+    # Everything before this turn's context is reused by the next turn
+    assert second[:4] == first[:4]
+
+
+def test_turns_through_llm_service_reuse_the_cached_prefix(fake_endpoint, monkeypatch):
+    monkeypatch.setattr(Config, 'OPENAI_API_KEY', 'test')
+    monkeypatch.setattr(Config, 'SESSION_STORE_BACKEND', 'memory')
+    service = LLMService()
+    service.client = OpenAI(api_key='test', base_url=fake_endpoint)
+    memory = MemoryService()
+
+    # Long enough that the stable prefix alone passes the 1024-token caching threshold
+    chapters = [f"Chapter {i}: Life processes, energy and the environment, part {i}" for i in range(1, 81)]
+    outline = build_document_outline(chapters, [], chapter_count=len(chapters))
+
+    turns = 4
+    for turn in range(turns):
+        question = f"Question {turn}: what is photosynthesis?"
+        answer = service.generate_response(
+            question,
+            f"Textbook passage {turn} about plants. " * 40,
+            conversation_history=memory.get_prompt_history('session'),
+            language='en',
+            outline=outline,
+        )
+        assert answer == 'Answer.'
+        memory.add_to_history('session', question, answer)
+
+    stats = LLMService.prompt_cache_stats()
+    assert stats['requests'] == turns
+    assert stats['prompt_tokens'] > 0
+    assert 0 < stats['cached_tokens'] < stats['prompt_tokens']
+    assert stats['cached_ratio'] > 0
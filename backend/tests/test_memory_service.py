@@ -0,0 +1,77 @@
+import pytest
+
+pytest.importorskip('dotenv')
+
+import utils.memory_service as memory_module
+from utils.memory_service import MemoryService
+
+
+class InlineExecutor:
+    """Runs background compactions immediately so the test is deterministic"""
+
+    def submit_nowait(self, fn, *args, **kwargs):
+        fn(*args, **kwargs)
+        return True
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    monkeypatch.setattr(memory_module, 'get_background_executor', lambda: InlineExecutor())
+    monkeypatch.setattr(memory_module.Config, 'SESSION_STORE_BACKEND', 'memory')
+    monkeypatch.setattr(memory_module.Config, 'MEMORY_RECENT_TURNS', 3)
+    monkeypatch.setattr(memory_module.Config, 'MEMORY_COMPACT_BATCH_TURNS', 2)
+    monkeypatch.setattr(memory_module.Config, 'MEMORY_HISTORY_TOKEN_BUDGET', 100000)
+    compactions = []
+
+    def summarizer(previous, messages):
+        compactions.append(len(messages))
+        return f"summary {len(compactions)}"
+
+    service = MemoryService(summarizer=summarizer)
+    service.compactions = compactions
+    return service
+
+
+def run_turns(service, session_id, turns):
+    """History sent on each turn, and how many compactions had run by then"""
+    histories = []
+    for turn in range(1, turns + 1):
+        histories.append((service.get_prompt_history(session_id), len(service.compactions)))
+        service.add_to_history(session_id, f"q{turn}", f"a{turn}")
+    return histories
+
+
+def assert_prefix_between_compactions(histories):
+    changes = 0
+    for (previous, compactions_before), (current, compactions_now) in zip(histories, histories[1:]):
+        if compactions_now != compactions_before:
+            changes += 1
+            continue
+        assert current[:len(previous)] == previous
+        assert len(current) == len(previous) + 2
+    return changes
+
+
+def test_history_only_changes_at_compaction(memory):
+    histories = run_turns(memory, 'session', 12)
+
+    assert memory.compactions, "expected at least one compaction"
+    assert assert_prefix_between_compactions(histories) == len(memory.compactions)
+    # Compaction keeps the history bounded: summary + recent and batch turns
+    assert max(len(history) for history, _ in histories) <= 1 + (3 + 2) * 2
+
+
+def test_history_without_summarizer_moves_in_batches(memory):
+    memory.summarizer = None
+    histories = []
+    for turn in range(1, 13):
+        histories.append(memory.get_prompt_history('plain'))
+        memory.add_to_history('plain', f"q{turn}", f"a{turn}")
+
+    shifts = 0
+    for previous, current in zip(histories, histories[1:]):
+        if current[:len(previous)] != previous:
+            shifts += 1
+    # One shift per batch of two turns once the recent window is full
+    assert shifts <= len(histories) // 2
+    assert all(len(history) <= (3 + 2) * 2 for history in histories)
@@ -0,0 +1,111 @@
+import os
+
+import pytest
+
+pytest.importorskip('dotenv')
+
+from utils.tts import TTSService
+
+
+@pytest.fixture
+def tts(tmp_path, monkeypatch):
+    """TTSService writing MP3 into tmp_path, with a fake provider chain"""
+    service = TTSService()
+    service.audio_folder = str(tmp_path)
+    service.pending_folder = str(tmp_path / 'pending')
+    os.makedirs(service.pending_folder)
+    service.mode = 'deferred'
+    service.spoken = []
+
+    def synthesize(text, language, file_path):
+        service.spoken.append(text)
+        with open(file_path, 'wb') as f:
+            f.write(text.encode('utf-8'))
+        return service._voice_key(language)
+
+    monkeypatch.setattr(service, '_synthesize_with_fallbacks', synthesize)
+    return service
+
+
+@pytest.fixture
+def opus_tts(tts):
+    tts.output_format = 'opus'
+    tts.audio_extension = 'ogg'
+    tts.max_chars = 60
+    return tts
+
+
+LONG_TEXT = "Photosynthesis turns light into chemical energy in the leaves of green plants. " * 3
+
+
+def test_long_opus_text_is_stored_under_the_reported_filename(opus_tts):
+    filename = opus_tts.text_to_speech(LONG_TEXT, 'en-IN')
+
+    assert filename == opus_tts.audio_filename_for(LONG_TEXT, 'en-IN')
+    assert os.path.exists(os.path.join(opus_tts.audio_folder, filename))
+    assert len(opus_tts.spoken) == 1 and len(opus_tts.spoken[0]) <= opus_tts.max_chars
+
+    # The second request finds the stored file instead of synthesizing again
+    assert opus_tts.text_to_speech(LONG_TEXT, 'en-IN') == filename
+    assert len(opus_tts.spoken) == 1
+
+
+def test_long_opus_deferred_job_is_cleared_once_stored(opus_tts):
+    filename = opus_tts.defer_text_to_speech(LONG_TEXT, 'en-IN')
+    assert opus_tts.is_pending(filename)
+
+    assert opus_tts.ensure_audio(filename) == filename
+    assert not opus_tts.is_pending(filename)
+    assert opus_tts.ensure_audio(filename) == filename
+    assert len(opus_tts.spoken) == 1
+
+
+def test_stream_without_pending_job_is_not_an_empty_stream(tts, monkeypatch):
+    tts.streaming = True
+    filename = tts.defer_text_to_speech("Plants make food from sunlight.", 'en-IN')
+    # Expired by the janitor right after an existence check said it was there
+    monkeypatch.setattr(tts, 'is_pending', lambda name: True)
+    os.remove(tts._pending_path(filename))
+
+    assert tts.stream_audio(filename) is None
+    assert tts.ensure_audio(filename) is None
+
+
+def test_stream_stores_the_audio_it_sent(tts):
+    tts.streaming = True
+    filename = tts.defer_text_to_speech("Plants make food from sunlight. They need water too.", 'en-IN')
+
+    streamed = b"".join(tts.stream_audio(filename))
+
+    assert streamed
+    with open(os.path.join(tts.audio_folder, filename), 'rb') as f:
+        assert f.read() == streamed
+    assert not tts.is_pending(filename)
+
+
+def test_fallback_audio_is_reused_while_the_preferred_provider_is_down(tts, monkeypatch):
+    monkeypatch.setattr(tts, '_provider_available', lambda provider: provider in ('openai', 'gtts'))
+    breaker = TTSService._breakers['openai']
+    monkeypatch.setattr(breaker, '_state', breaker.OPEN)
+    producing = {'voice_key': 'gtts:pa'}
+
+    def synthesize(text, language, file_path):
+        tts.spoken.append(text)
+        with open(file_path, 'wb') as f:
+            f.write(text.encode('utf-8'))
+        return producing['voice_key']
+
+    monkeypatch.setattr(tts, '_synthesize_with_fallbacks', synthesize)
+    text = "Plants make food from sunlight."
+    preferred = tts.audio_filename_for(text, 'pa-IN')
+
+    fallback = tts.text_to_speech(text, 'pa-IN')
+    assert fallback not in (None, preferred)
+    assert tts.text_to_speech(text, 'pa-IN') == fallback
+    assert len(tts.spoken) == 1
+
+    # Recovered: the preferred voice is synthesized and stored under its own name
+    monkeypatch.setattr(breaker, '_state', breaker.CLOSED)
+    producing['voice_key'] = 'openai:alloy'
+    assert tts.text_to_speech(text, 'pa-IN') == preferred
+    assert len(tts.spoken) == 2
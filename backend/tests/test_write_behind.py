@@ -0,0 +1,65 @@
+import json
+import os
+
+from utils.write_behind import WriteBehindBuffer
+
+
+class Rejected(Exception):
+    pass
+
+
+class FakeTable:
+    """Bulk insert that refuses the whole batch if any row lacks audio_path"""
+
+    def __init__(self, outage=False):
+        self.rows = []
+        self.outage = outage
+
+    def write(self, rows):
+        if self.outage:
+            raise ConnectionError("database unreachable")
+        if any(row.get('audio_path') is None for row in rows):
+            raise Rejected("null value in column \"audio_path\" violates not-null constraint")
+        self.rows.extend(rows)
+
+
+def make_buffer(tmp_path, table):
+    return WriteBehindBuffer(
+        'test', table.write,
+        journal_path=str(tmp_path / 'journal.jsonl'),
+        is_permanent=lambda error: isinstance(error, Rejected),
+        max_retries=0,
+    )
+
+
+def read_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_rejected_row_is_dead_lettered_and_the_rest_written(tmp_path):
+    table = FakeTable()
+    buffer = make_buffer(tmp_path, table)
+    rows = [{'id': str(i), 'audio_path': None if i == 1 else f"{i}.mp3"} for i in range(4)]
+
+    assert buffer._write_with_retry(rows)
+
+    assert [row['id'] for row in table.rows] == ['0', '2', '3']
+    assert not os.path.exists(buffer.journal_path)
+    dead = read_lines(buffer.dead_letter_path)
+    assert [entry['row']['id'] for entry in dead] == ['1']
+    assert buffer.stats()['dead_lettered'] == 1
+
+
+def test_replay_does_not_rejournal_rejected_rows(tmp_path):
+    table = FakeTable(outage=True)
+    buffer = make_buffer(tmp_path, table)
+    buffer._write_with_retry([{'id': 'a', 'audio_path': None}, {'id': 'b', 'audio_path': 'b.mp3'}])
+    assert len(read_lines(buffer.journal_path)) == 2
+
+    table.outage = False
+    buffer._replay_journal()
+
+    assert [row['id'] for row in table.rows] == ['b']
+    assert not os.path.exists(buffer.journal_path)
+    assert [entry['row']['id'] for entry in read_lines(buffer.dead_letter_path)] == ['a']
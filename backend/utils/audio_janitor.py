@@ -0,0 +1,238 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process sweep lock
+    fcntl = None
+
+from config import Config
+
+
+class AudioJanitor:
+    """
+    Background retention for the audio folder.
+
+    Files are evicted when they have not been accessed for `max_age_seconds`,
+    then least-recently-accessed first until the folder is under `max_bytes`.
+    Last access is the file's atime, which the audio route refreshes
+    explicitly (so it works on noatime mounts too).
+
+    Files currently being served by this process are never deleted, and files
+    accessed within `min_idle_seconds` are skipped, which also covers requests
+    served by other worker processes. Pinned files (the canned-response
+    audio) are never evicted.
+    """
+
+    # Temporary synthesis output older than this is considered abandoned
+    TEMP_FILE_GRACE_SECONDS = 3600
+    # Don't rewrite atime more often than this for the same file
+    TOUCH_INTERVAL_SECONDS = 60
+
+    def __init__(
+        self,
+        folder: str,
+        max_bytes: int,
+        max_age_seconds: float,
+        min_idle_seconds: float = 300,
+        interval_seconds: float = 300,
+    ):
+        self.folder = folder
+        self.pending_folder = os.path.join(folder, "pending")
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.min_idle_seconds = min_idle_seconds
+        self.interval_seconds = interval_seconds
+        self._in_use: Dict[str, int] = defaultdict(int)
+        self._pinned: Set[str] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_sweep: Dict = {}
+        self._totals = {'evicted_files': 0, 'evicted_bytes': 0, 'sweeps': 0}
+
+    ##########################################################################
+    #  SERVING HOOKS
+    ##########################################################################
+    def acquire(self, filename: str) -> None:
+        """Mark a file as being served; it will not be evicted until released"""
+        with self._lock:
+            self._in_use[filename] += 1
+
+    def release(self, filename: str) -> None:
+        with self._lock:
+            self._in_use[filename] -= 1
+            if self._in_use[filename] <= 0:
+                del self._in_use[filename]
+
+    def pin(self, filenames: Iterable[str]) -> None:
+        """Exempt files from eviction for the lifetime of this process"""
+        with self._lock:
+            self._pinned.update(filenames)
+
+    def touch(self, filename: str) -> None:
+        """Record an access by bumping atime (mtime is left untouched)"""
+        path = os.path.join(self.folder, filename)
+        try:
+            st = os.stat(path)
+            now = time.time()
+            if now - st.st_atime >= self.TOUCH_INTERVAL_SECONDS:
+                os.utime(path, (now, st.st_mtime))
+        except OSError:
+            pass
+
+    ##########################################################################
+    #  SWEEP
+    ##########################################################################
+    def _remove(self, path: str, filename: Optional[str] = None) -> bool:
+        with self._lock:
+            if filename is not None and (filename in self._in_use or filename in self._pinned):
+                return False
+            try:
+                os.remove(path)
+                return True
+            except OSError:
+                return False
+
+    def _sweep_pending(self, now: float) -> None:
+        """Drop stale deferred-TTS jobs and abandoned segment files"""
+        try:
+            entries = list(os.scandir(self.pending_folder))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            try:
+                age = now - entry.stat().st_mtime
+            except OSError:
+                continue
+            is_segment = entry.name.startswith("segment_")
+            if (is_segment and age > self.TEMP_FILE_GRACE_SECONDS) or (not is_segment and age > self.max_age_seconds):
+                self._remove(entry.path)
+
+    def sweep(self) -> Dict:
+        """Run one eviction pass and return usage metrics"""
+        started = time.monotonic()
+        now = time.time()
+        files = []
+        for entry in os.scandir(self.folder):
+            if not entry.is_file():
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            files.append((max(st.st_atime, st.st_mtime), st.st_size, entry.name, entry.path))
+
+        total_bytes = sum(size for _, size, _, _ in files)
+        evicted_files = 0
+        evicted_bytes = 0
+        skipped_in_use = 0
+
+        # Least recently accessed first
+        files.sort()
+        for last_access, size, name, path in files:
+            idle = now - last_access
+            if ".part" in name or name.endswith("_temp.mp3"):
+                # In-progress synthesis; only clean up if clearly abandoned
+                expired = idle > self.TEMP_FILE_GRACE_SECONDS
+            else:
+                expired = idle > self.max_age_seconds or total_bytes > self.max_bytes
+            if not expired:
+                continue
+            if idle < self.min_idle_seconds:
+                skipped_in_use += 1
+                continue
+            if self._remove(path, name):
+                total_bytes -= size
+                evicted_files += 1
+                evicted_bytes += size
+            else:
+                skipped_in_use += 1
+
+        self._sweep_pending(now)
+
+        with self._lock:
+            self._totals['sweeps'] += 1
+            self._totals['evicted_files'] += evicted_files
+            self._totals['evicted_bytes'] += evicted_bytes
+            self._last_sweep = {
+                'at': now,
+                'duration_ms': round((time.monotonic() - started) * 1000, 1),
+                'file_count': len(files) - evicted_files,
+                'total_bytes': total_bytes,
+                'evicted_files': evicted_files,
+                'evicted_bytes': evicted_bytes,
+                'skipped_in_use': skipped_in_use,
+            }
+        if evicted_files:
+            print(f"Audio janitor evicted {evicted_files} file(s), {evicted_bytes} bytes; {total_bytes} bytes in use")
+        return dict(self._last_sweep)
+
+    def _sweep_exclusive(self) -> None:
+        """Sweep unless another worker process is already sweeping"""
+        if fcntl is None:
+            self.sweep()
+            return
+        lock_path = os.path.join(self.pending_folder, ".janitor.lock")
+        os.makedirs(self.pending_folder, exist_ok=True)
+        with open(lock_path, "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return
+            try:
+                self.sweep()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._sweep_exclusive()
+            except Exception as e:
+                print(f"Warning: audio janitor sweep failed: {e}")
+            self._stop.wait(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="audio-janitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'max_bytes': self.max_bytes,
+                'max_age_seconds': self.max_age_seconds,
+                'files_in_use': len(self._in_use),
+                'files_pinned': len(self._pinned),
+                'last_sweep': dict(self._last_sweep),
+                **self._totals,
+            }
+
+
+_janitor: Optional[AudioJanitor] = None
+_janitor_lock = threading.Lock()
+
+
+def get_audio_janitor() -> AudioJanitor:
+    global _janitor
+    if _janitor is None:
+        with _janitor_lock:
+            if _janitor is None:
+                _janitor = AudioJanitor(
+                    Config.AUDIO_FOLDER,
+                    max_bytes=Config.AUDIO_MAX_TOTAL_MB * 1024 * 1024,
+                    max_age_seconds=Config.AUDIO_MAX_AGE_HOURS * 3600,
+                    min_idle_seconds=Config.AUDIO_MIN_IDLE_SECONDS,
+                    interval_seconds=Config.AUDIO_JANITOR_INTERVAL_SECONDS,
+                )
+    return _janitor
@@ -0,0 +1,83 @@
+from typing import Iterable, Optional
+
+# MPEG audio Layer III bitrates (kbps) by bitrate index
+_MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],  # MPEG-1
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],      # MPEG-2 / 2.5
+}
+# Sample rates (Hz) by version bits (0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1)
+_MP3_SAMPLE_RATES = {
+    0: [11025, 12000, 8000],
+    2: [22050, 24000, 16000],
+    3: [44100, 48000, 32000],
+}
+
+
+def _id3v2_length(data: bytes) -> int:
+    """Size of a leading ID3v2 tag (0 if there is none)"""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _mp3_frame_length(header: bytes) -> Optional[int]:
+    """Length in bytes of the Layer III frame starting with header, None if not a frame"""
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = (header[1] >> 1) & 0x03
+    bitrate_index = (header[2] >> 4) & 0x0F
+    sample_rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    bitrate = _MP3_BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][sample_rate_index]
+    coefficient = 144 if version == 3 else 72
+    return coefficient * bitrate // sample_rate + padding
+
+
+def _is_info_frame(frame: bytes) -> bool:
+    """Whether a frame is a Xing/Info/VBRI header frame (metadata, no audio)"""
+    return b"Xing" in frame[4:48] or b"Info" in frame[4:48] or frame[36:40] == b"VBRI"
+
+
+def clean_mp3_segment(data: bytes, keep_id3: bool = False) -> bytes:
+    """
+    Prepare one MP3 segment for concatenation.
+
+    Drops the ID3v2 tag (unless keep_id3), a trailing ID3v1 tag, and the
+    Xing/Info header frame. That header describes only this segment's length,
+    so players would report the wrong duration for the joined file.
+    """
+    tag_length = _id3v2_length(data)
+    end = len(data)
+    if end - tag_length >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+
+    body_start = tag_length
+    frame_length = _mp3_frame_length(data[body_start:body_start + 4])
+    if frame_length and _is_info_frame(data[body_start:body_start + frame_length]):
+        body_start += frame_length
+
+    head = data[:tag_length] if keep_id3 else b""
+    return head + data[body_start:end]
+
+
+def join_audio_segments(segments: Iterable[bytes], audio_format: str) -> bytes:
+    """
+    Join separately synthesized MP3 segments into one file without re-encoding.
+
+    Per-segment tags and Xing/Info headers are dropped and the frames are
+    concatenated. Other formats are refused: Ogg/Opus segments would need
+    remuxing (serial numbers, page sequence and granule positions), and
+    players handle chained streams inconsistently.
+    """
+    if audio_format != "mp3":
+        raise ValueError(f"Cannot join {audio_format} segments without remuxing; only mp3 is supported")
+    return b"".join(
+        clean_mp3_segment(segment, keep_id3=(index == 0))
+        for index, segment in enumerate(segments)
+    )
@@ -0,0 +1,113 @@
+import atexit
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from config import Config
+
+
+class BackgroundExecutor:
+    """
+    Thread pool wrapper for work that runs alongside or after a request.
+
+    `submit` returns a Future for work the request waits on. `submit_nowait`
+    is fire-and-forget: at most `max_pending` such tasks may be queued or
+    running, anything beyond that is dropped instead of piling up in memory.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(1, max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._pending = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        with self._lock:
+            self.submitted += 1
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def submit_nowait(self, fn: Callable, *args, **kwargs) -> bool:
+        """Queue a detached task. Returns False if the queue is full."""
+        if not self._pending.acquire(blocking=False):
+            with self._lock:
+                self.dropped += 1
+            print(f"Warning: {self.name} queue full ({self.max_pending}), dropping {getattr(fn, '__name__', fn)}")
+            return False
+        try:
+            future = self._executor.submit(self._run_detached, fn, args, kwargs)
+        except RuntimeError:
+            # Executor already shut down (interpreter exit)
+            self._pending.release()
+            return False
+        with self._lock:
+            self.submitted += 1
+        future.add_done_callback(lambda _future: self._pending.release())
+        return True
+
+    def _run_detached(self, fn: Callable, args, kwargs) -> None:
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            print(f"Warning: background task {getattr(fn, '__name__', fn)} failed: {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'submitted': self.submitted,
+                'dropped': self.dropped,
+                'failed': self.failed,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+_executors: Dict[str, BackgroundExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name: str, max_workers: Optional[int] = None, max_pending: Optional[int] = None) -> BackgroundExecutor:
+    """Return the process-wide executor registered under `name`, creating it on first use."""
+    executor = _executors.get(name)
+    if executor is not None:
+        return executor
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = BackgroundExecutor(
+                name,
+                max_workers or Config.BACKGROUND_WORKERS,
+                max_pending or Config.BACKGROUND_QUEUE_SIZE,
+            )
+            _executors[name] = executor
+        return executor
+
+
+def get_fanout_executor() -> BackgroundExecutor:
+    """Executor for request-path stages that run concurrently and are awaited."""
+    return get_executor('fanout', Config.FANOUT_WORKERS, Config.FANOUT_WORKERS * 4)
+
+
+def get_background_executor() -> BackgroundExecutor:
+    """Executor for fire-and-forget work (persistence and similar)."""
+    return get_executor('background', Config.BACKGROUND_WORKERS, Config.BACKGROUND_QUEUE_SIZE)
+
+
+def executor_stats() -> Dict[str, Dict]:
+    return {name: executor.stats() for name, executor in list(_executors.items())}
+
+
+@atexit.register
+def _shutdown_executors() -> None:
+    # Let queued persistence finish before the worker exits
+    for executor in list(_executors.values()):
+        executor.shutdown(wait=True)
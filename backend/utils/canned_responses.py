@@ -0,0 +1,199 @@
+import json
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from config import Config
+
+# Fixed replies, spoken as-is
+CANNED_TEXTS = {
+    'unavailable': "Sorry, the textbook does not contain this information.",
+}
+
+# Replies with dynamic parts; placeholders are filled at request time
+CANNED_TEMPLATES = {
+    'chapter_count': "This textbook contains {count} chapters. They are: {chapters}.",
+    'chapter_names': "The chapter names are: {chapters}.",
+    'topic_absent': (
+        "This textbook focuses on these chapters: {chapters}. "
+        "It does not include any dedicated chapters about {topic}."
+    ),
+}
+
+FALLBACK_SUGGESTIONS = [
+    "What is the main topic of this textbook?",
+    "Can you summarize the key points?",
+    "What are the important concepts I should learn?",
+    "Can you explain the basics in simpler terms?",
+]
+
+# Canned texts that also get pre-synthesized audio
+AUDIO_KEYS = ('unavailable',)
+
+_PLACEHOLDER = re.compile(r'\{(\w+)\}')
+
+
+def base_language(language: Optional[str]) -> str:
+    """'hi-IN' -> 'hi', 'en-IN' -> 'en'"""
+    return (language or 'en').lower().split('-')[0]
+
+
+def tts_language(code: str) -> str:
+    """Language code the chat route synthesizes with for a base code"""
+    return f"{code}-IN"
+
+
+class CannedResponsePack:
+    """
+    Per-language pack of the chat route's canned texts and their audio.
+
+    Built ahead of time (build_canned_pack.py or the startup warmup) for every
+    language in Config.TTS_LANGUAGE_MAP, so serving a canned reply makes no
+    Translator or TTS call. Templates whose placeholders did not survive
+    translation are left out; callers then fall back to live translation.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or Config.CANNED_PACK_PATH
+        self.languages: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    ##########################################################################
+    #  STORAGE
+    ##########################################################################
+    def load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.languages = data.get('languages', {})
+        except FileNotFoundError:
+            self.languages = {}
+        except Exception as e:
+            print(f"Warning: could not load canned response pack {self.path}: {e}")
+            self.languages = {}
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'languages': self.languages}, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+
+    ##########################################################################
+    #  LOOKUP
+    ##########################################################################
+    def _entry(self, language: Optional[str]) -> Dict:
+        return self.languages.get(base_language(language), {})
+
+    def text(self, key: str, language: Optional[str]) -> Optional[str]:
+        if base_language(language) == 'en':
+            return CANNED_TEXTS.get(key)
+        return self._entry(language).get('texts', {}).get(key)
+
+    def audio(self, key: str, language: Optional[str]) -> Optional[str]:
+        """Pre-synthesized audio filename for a canned text, if present on disk"""
+        filename = self._entry(language).get('audio', {}).get(key)
+        if filename and os.path.exists(os.path.join(Config.AUDIO_FOLDER, filename)):
+            return filename
+        return None
+
+    def template(self, key: str, language: Optional[str]) -> Optional[str]:
+        if base_language(language) == 'en':
+            return CANNED_TEMPLATES.get(key)
+        return self._entry(language).get('templates', {}).get(key)
+
+    def suggestions(self, language: Optional[str]) -> Optional[List[str]]:
+        if base_language(language) == 'en':
+            return list(FALLBACK_SUGGESTIONS)
+        return self._entry(language).get('suggestions')
+
+    def audio_filenames(self) -> List[str]:
+        return [
+            filename
+            for entry in self.languages.values()
+            for filename in entry.get('audio', {}).values()
+            if filename
+        ]
+
+    ##########################################################################
+    #  BUILD
+    ##########################################################################
+    def missing_languages(self, languages: Optional[Iterable[str]] = None) -> List[str]:
+        codes = languages or sorted(set(Config.TTS_LANGUAGE_MAP.values()))
+        missing = []
+        for code in codes:
+            entry = self.languages.get(code, {})
+            complete = (
+                all(key in entry.get('texts', {}) for key in CANNED_TEXTS)
+                and entry.get('suggestions')
+                and all(key in entry.get('audio', {}) for key in AUDIO_KEYS)
+            )
+            if not complete:
+                missing.append(code)
+        return missing
+
+    def build(self, translator, tts_service, languages: Optional[Iterable[str]] = None, with_audio: bool = True) -> Dict[str, Dict]:
+        """
+        Translate and synthesize the canned texts for each language and save the pack.
+
+        Only entries that are missing are produced, so the build can be re-run
+        to fill gaps left by earlier failures.
+
+        Returns:
+            Per-language summary of what the pack now contains
+        """
+        codes = list(languages or sorted(set(Config.TTS_LANGUAGE_MAP.values())))
+        summary = {}
+        for code in codes:
+            with self._lock:
+                entry = self.languages.setdefault(code, {})
+            texts = entry.setdefault('texts', {})
+            templates = entry.setdefault('templates', {})
+            audio = entry.setdefault('audio', {})
+
+            if code == 'en':
+                texts.update(CANNED_TEXTS)
+                templates.update(CANNED_TEMPLATES)
+                entry['suggestions'] = list(FALLBACK_SUGGESTIONS)
+            else:
+                self._translate_missing(translator, code, CANNED_TEXTS, texts)
+                self._translate_missing(translator, code, CANNED_TEMPLATES, templates, check_placeholders=True)
+                if not entry.get('suggestions'):
+                    translated = translator.translate_batch(FALLBACK_SUGGESTIONS, code)
+                    if translated != FALLBACK_SUGGESTIONS:
+                        entry['suggestions'] = translated
+
+            if with_audio:
+                for key in AUDIO_KEYS:
+                    if key in texts and not audio.get(key):
+                        filename = tts_service.text_to_speech(texts[key], tts_language(code))
+                        if filename:
+                            audio[key] = filename
+
+            summary[code] = {
+                'texts': sorted(texts),
+                'templates': sorted(templates),
+                'suggestions': len(entry.get('suggestions') or []),
+                'audio': sorted(audio),
+            }
+        self.save()
+        return summary
+
+    @staticmethod
+    def _translate_missing(translator, code: str, source: Dict[str, str], target: Dict[str, str], check_placeholders: bool = False) -> None:
+        keys = [key for key in source if key not in target]
+        if not keys:
+            return
+        translated = translator.translate_batch([source[key] for key in keys], code)
+        for key, value in zip(keys, translated):
+            if not value or value == source[key]:
+                # Translator unavailable or failed; leave it for the next build
+                continue
+            if check_placeholders and set(_PLACEHOLDER.findall(value)) != set(_PLACEHOLDER.findall(source[key])):
+                print(f"Warning: canned template '{key}' lost its placeholders in '{code}', skipping")
+                continue
+            target[key] = value
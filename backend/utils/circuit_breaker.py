@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+
+class CircuitBreaker:
+    """
+    Per-dependency circuit breaker with rolling latency/error statistics.
+
+    closed:    calls pass through; the breaker opens after `failure_threshold`
+               consecutive failures, or when the error rate over the rolling
+               window reaches `error_rate_threshold`
+    open:      calls are rejected until `reset_timeout` seconds have passed
+    half_open: a single probe call is let through; success closes the
+               breaker, failure opens it again
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        window: int = 20,
+        error_rate_threshold: float = 0.5,
+        min_calls: int = 5,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.error_rate_threshold = error_rate_threshold
+        self.min_calls = min_calls
+        self._calls = deque(maxlen=max(1, window))  # (succeeded, latency_seconds)
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a call may be attempted now (may start a half-open probe)"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                # The window is full of the failures that opened the breaker;
+                # keeping them would re-open it on the first failure after recovery
+                self._calls.clear()
+                print(f"Circuit '{self.name}' closed")
+            self._calls.append((True, latency))
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            self._state = self.CLOSED
+
+    def release(self) -> None:
+        """An allowed call ended without reaching the dependency: record nothing, free the probe slot"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self, latency: float) -> None:
+        with self._lock:
+            self._calls.append((False, latency))
+            self._consecutive_failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._should_open():
+                if self._state != self.OPEN:
+                    print(f"Circuit '{self.name}' opened after {self._consecutive_failures} consecutive failure(s)")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def _should_open(self) -> bool:
+        if self._consecutive_failures >= self.failure_threshold:
+            return True
+        if len(self._calls) < self.min_calls:
+            return False
+        failures = sum(1 for succeeded, _ in self._calls if not succeeded)
+        return failures / len(self._calls) >= self.error_rate_threshold
+
+    def stats(self) -> Dict:
+        with self._lock:
+            calls = list(self._calls)
+            state = self._state
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)) if state == self.OPEN else 0.0
+            consecutive_failures = self._consecutive_failures
+
+        latencies = sorted(latency for _, latency in calls)
+        failures = sum(1 for succeeded, _ in calls if not succeeded)
+
+        def percentile(fraction: float):
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(round(fraction * (len(latencies) - 1))))
+            return round(latencies[index] * 1000, 1)
+
+        return {
+            'state': state,
+            'window_calls': len(calls),
+            'error_rate': round(failures / len(calls), 3) if calls else 0.0,
+            'consecutive_failures': consecutive_failures,
+            'latency_p50_ms': percentile(0.5),
+            'latency_p95_ms': percentile(0.95),
+            'retry_in_seconds': round(retry_in, 1),
+        }
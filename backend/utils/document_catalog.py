@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from config import Config
+from utils.lru_cache import LRUCache
+from utils.vector_store import document_id_for_hash
+
+
+def build_outline(chunks: Iterable[Dict]) -> Dict:
+    """
+    Chapter and unit outline of a document from its chunks
+
+    Args:
+        chunks: Chunks as returned by DocumentParser.chunk_text
+
+    Returns:
+        {'chapters': [{'number', 'title'}], 'units': [{'number', 'title'}]}
+        in document order, each heading once
+    """
+    outline = {'chapters': [], 'units': []}
+    seen = {'chapters': set(), 'units': set()}
+    for chunk in sorted(chunks, key=lambda c: c.get('chunk_index', 0)):
+        for kind, prefix in (('chapters', 'chapter'), ('units', 'unit')):
+            title = chunk.get(f'{prefix}_title')
+            if not title:
+                continue
+            number = chunk.get(f'{prefix}_number')
+            key = (number, title)
+            if key in seen[kind]:
+                continue
+            seen[kind].add(key)
+            outline[kind].append({'number': number, 'title': title})
+    return outline
+
+
+class DocumentCatalog:
+    """
+    One JSON record per ingested document: filename, hash, page count,
+    chapter/unit outline, chunk count and ingest timings.
+
+    Records are written once at ingest and read through a bounded in-process
+    LRU, so a chat turn gets a document's structure without touching Qdrant.
+    Files live in a shared folder, so every worker sees new documents; the
+    cache TTL bounds how long another worker may serve a removed record.
+    """
+
+    def __init__(self, folder: Optional[str] = None, cache_size: Optional[int] = None, cache_ttl: Optional[float] = None):
+        self.folder = folder or Config.CATALOG_FOLDER
+        self._cache = LRUCache(
+            cache_size or Config.CATALOG_CACHE_SIZE,
+            ttl=cache_ttl if cache_ttl is not None else Config.CATALOG_CACHE_TTL_SECONDS
+        )
+        os.makedirs(self.folder, exist_ok=True)
+
+    def _path(self, document_id: str) -> str:
+        # Ids are generated by the upload route; refuse anything path-like
+        if not document_id or os.path.basename(document_id) != document_id or document_id.startswith('.'):
+            raise ValueError(f"Invalid document id: {document_id!r}")
+        return os.path.join(self.folder, f"{document_id}.json")
+
+    ##########################################################################
+    #  WRITE
+    ##########################################################################
+    def put(self, record: Dict) -> Dict:
+        """
+        Store a document record (replacing any previous one)
+
+        Args:
+            record: Must contain 'document_id'; 'created_at' is filled in if missing
+
+        Returns:
+            The stored record
+        """
+        record = dict(record)
+        record.setdefault('created_at', datetime.now(timezone.utc).isoformat())
+        path = self._path(record['document_id'])
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+        self._cache.set(record['document_id'], record)
+        return record
+
+    def delete(self, document_id: str) -> bool:
+        """Remove a document record; returns whether one existed"""
+        self._cache.delete(document_id)
+        try:
+            os.remove(self._path(document_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    ##########################################################################
+    #  READ
+    ##########################################################################
+    def get(self, document_id: str) -> Optional[Dict]:
+        """
+        Record for a document, from the LRU or its file
+
+        Returns:
+            The record, or None if the document is not in the catalog
+        """
+        record = self._cache.get(document_id)
+        if record is not None:
+            return record
+        try:
+            path = self._path(document_id)
+        except ValueError:
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Warning: could not read catalog record {path}: {e}")
+            return None
+        self._cache.set(document_id, record)
+        return record
+
+    def find_by_hash(self, file_hash: str) -> Optional[Dict]:
+        """
+        Record of the document with this file hash, if one was ingested
+
+        Document ids are derived from the hash (document_id_for_hash), so
+        this is a single record lookup rather than a scan of the catalog.
+        """
+        record = self.get(document_id_for_hash(file_hash))
+        if record is not None and record.get('file_hash') == file_hash:
+            return record
+        return None
+
+    def list(self, limit: int = 100, offset: int = 0) -> Dict:
+        """
+        Catalog records, newest first
+
+        Args:
+            limit: Records to return
+            offset: Records to skip
+
+        Returns:
+            {'documents': records, 'total': number of documents}
+        """
+        try:
+            entries = [
+                entry for entry in os.scandir(self.folder)
+                if entry.is_file() and entry.name.endswith('.json')
+            ]
+        except FileNotFoundError:
+            return {'documents': [], 'total': 0}
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        documents = []
+        for entry in entries[offset:offset + limit]:
+            record = self.get(entry.name[:-len('.json')])
+            if record is not None:
+                documents.append(record)
+        return {'documents': documents, 'total': len(entries)}
+
+    def stats(self) -> Dict:
+        return self._cache.stats()
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_document_catalog() -> DocumentCatalog:
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = DocumentCatalog()
+    return _catalog
@@ -5,6 +5,9 @@ from config import Config
 class EmbeddingService:
     """Generate embeddings using OpenAI API"""
     
+    # Inputs per embeddings request (API limit is 2048)
+    MAX_BATCH_INPUTS = 2048
+    
     def __init__(self):
         if not Config.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY is not set in environment variables")
@@ -39,19 +42,27 @@ class EmbeddingService:
     
     def generate_embeddings_batch(self, texts: list) -> list:
         """
-        Generate embeddings for multiple texts
+        Generate embeddings for multiple texts in as few API calls as possible
         
         Args:
             texts: List of texts to generate embeddings for
         
         Returns:
-            List of embedding lists
+            List aligned with texts: an embedding, or None for empty texts
+            and texts whose request failed
         """
-        embeddings = []
-        for text in texts:
-            embedding = self.generate_embedding(text)
-            if embedding:
-                embeddings.append(embedding)
+        cleaned = [(text or "").replace("\n", " ").strip() for text in texts]
+        embeddings = [None] * len(texts)
+        indexes = [i for i, text in enumerate(cleaned) if text]
+        for start in range(0, len(indexes), self.MAX_BATCH_INPUTS):
+            batch = indexes[start:start + self.MAX_BATCH_INPUTS]
+            try:
+                response = self.client.embeddings.create(
+                    model=self.model,
+                    input=[cleaned[i] for i in batch]
+                )
+                for item in response.data:
+                    embeddings[batch[item.index]] = item.embedding
+            except Exception as e:
+                print(f"Error generating embeddings batch: {e}")
         return embeddings
-
-
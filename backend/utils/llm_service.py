@@ -1,7 +1,10 @@
+import threading
 from openai import OpenAI
 from typing import List, Dict, Optional
 from config import Config
 from utils.translator import TranslatorService
+from utils.script_detector import is_mostly_in_language_script
+from utils.prompt_builder import PromptBuilder
 
 # System prompt that enforces strict textbook-only answers
 SYSTEM_PROMPT = """You are an AI Tutor. You MUST answer strictly and ONLY using the textbook content provided in the context. 
@@ -13,22 +16,41 @@ If the answer does not exist in the textbook, say:
 Do not guess. Do not hallucinate. Do not add extra information beyond the textbook context."""
 
 
+def cached_prompt_tokens(usage) -> int:
+    """Prompt tokens the provider served from its prefix cache, per a completion's usage"""
+    # openai 1.12 has no model for prompt_tokens_details, so it comes back
+    # as a plain dict; newer SDKs return an object
+    details = getattr(usage, 'prompt_tokens_details', None)
+    if isinstance(details, dict):
+        return details.get('cached_tokens') or 0
+    return getattr(details, 'cached_tokens', 0) or 0
+
+
 class LLMService:
     """Service for interacting with OpenAI Chat Completions API"""
     
+    # Post-translation counters shared by all instances
+    _translation_stats = {'checked': 0, 'skipped': 0, 'translated': 0}
+    _stats_lock = threading.Lock()
+    # Prompt tokens served from the provider's prefix cache
+    _prompt_cache_stats = {'requests': 0, 'prompt_tokens': 0, 'cached_tokens': 0}
+    
     def __init__(self):
         if not Config.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY is not set in environment variables")
         self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
         self.model = Config.OPENAI_CHAT_MODEL
         self.translator = TranslatorService()
+        # History is already bounded (summary + uncompacted turns) by MemoryService
+        self.prompt_builder = PromptBuilder(SYSTEM_PROMPT)
     
     def generate_response(
         self,
         user_message: str,
         context: str,
         conversation_history: Optional[List[Dict]] = None,
-        language: str = 'en'
+        language: str = 'en',
+        outline: Optional[str] = None
     ) -> str:
         """
         Generate AI response using OpenAI Chat Completions
@@ -38,13 +60,14 @@ class LLMService:
             context: Retrieved context from vector database
             conversation_history: Previous conversation messages
             language: Language code for response (e.g., 'en-IN', 'hi', 'ta', etc.)
+            outline: Per-document outline (counts and titles), placed in the stable prompt prefix
         
         Returns:
             AI-generated response text
         """
         try:
             # If no context, return immediately
-            if not context or not context.strip():
+            if (not context or not context.strip()) and not outline:
                 return "Sorry, the textbook does not contain this information."
             
             # Map language codes to language names for the prompt
@@ -78,33 +101,14 @@ class LLMService:
             }
             target_language = language_map.get(language, 'English')
             
-            # Build prompt with context and language instruction
-            prompt = f"""<context>
-{context}
-</context>
-
-User question:
-{user_message}
-
-IMPORTANT: Answer the question using ONLY the textbook context above. Your response MUST be in {target_language} language. If the user asked in {target_language}, respond in {target_language}. Do not translate the textbook content, but explain it in {target_language}."""
-
-            # Build messages
-            messages = [
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": prompt}
-            ]
-            
-            # Add conversation history if provided (limited to last 5 for context)
-            if conversation_history:
-                history_messages = []
-                for msg in conversation_history[-5:]:  # Last 5 messages for context
-                    if msg.get('role') == 'user':
-                        history_messages.append({"role": "user", "content": msg.get('content', '')})
-                    elif msg.get('role') == 'assistant':
-                        history_messages.append({"role": "assistant", "content": msg.get('content', '')})
-                
-                # Insert history before the current user message
-                messages = [messages[0]] + history_messages + [messages[1]]
+            # Stable material first so the provider can reuse the cached prefix
+            messages = self.prompt_builder.build(
+                user_message=user_message,
+                context=context,
+                target_language=target_language,
+                outline=outline,
+                conversation_history=conversation_history
+            )
             
             # Generate response
             response = self.client.chat.completions.create(
@@ -114,14 +118,91 @@ IMPORTANT: Answer the question using ONLY the textbook context above. Your respo
                 max_tokens=1000
             )
 
+            self._record_usage(getattr(response, 'usage', None))
             ai_text = response.choices[0].message.content.strip()
 
-            # Ensure language compliance using Azure Translator when needed
+            # Ensure language compliance using Azure Translator when needed.
+            # Skip the round trip if the model already answered in the target script.
             target_lang_code = language if language else 'en'
             if target_language != 'English':
-                ai_text = self.translator.translate(ai_text, target_lang_code)
+                already_localized = is_mostly_in_language_script(
+                    ai_text, target_lang_code, threshold=Config.SCRIPT_MATCH_THRESHOLD
+                )
+                self._count_translation('skipped' if already_localized else 'translated')
+                if not already_localized:
+                    ai_text = self.translator.translate(ai_text, target_lang_code)
             
             return ai_text
         except Exception as e:
             print(f"Error generating LLM response: {e}")
             return None
+
+    @classmethod
+    def _count_translation(cls, outcome: str) -> None:
+        with cls._stats_lock:
+            cls._translation_stats['checked'] += 1
+            cls._translation_stats[outcome] += 1
+
+    def summarize_conversation(self, previous_summary: Optional[str], messages: List[Dict]) -> Optional[str]:
+        """
+        Fold older conversation turns into a rolling summary
+
+        Args:
+            previous_summary: Summary produced by the last compaction, if any
+            messages: Turns to fold in, oldest first
+
+        Returns:
+            Updated summary, or None if summarization failed
+        """
+        transcript = "\n".join(
+            f"{'Student' if msg.get('role') == 'user' else 'Tutor'}: {msg.get('content', '')}"
+            for msg in messages
+        )
+        prompt = f"""Existing summary:
+{previous_summary or '(none)'}
+
+New conversation turns:
+{transcript}
+
+Update the summary so it covers the existing summary and the new turns. Keep the topics the student asked about, what was explained, and any open questions. Write it in the language of the conversation, in at most {Config.MEMORY_SUMMARY_MAX_TOKENS // 2} words."""
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "You summarize tutoring conversations concisely and factually."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.2,
+                max_tokens=Config.MEMORY_SUMMARY_MAX_TOKENS
+            )
+            summary = (response.choices[0].message.content or '').strip()
+            return summary or None
+        except Exception as e:
+            print(f"Error summarizing conversation: {e}")
+            return None
+
+    @classmethod
+    def _record_usage(cls, usage) -> None:
+        if usage is None:
+            return
+        cached_tokens = cached_prompt_tokens(usage)
+        with cls._stats_lock:
+            cls._prompt_cache_stats['requests'] += 1
+            cls._prompt_cache_stats['prompt_tokens'] += getattr(usage, 'prompt_tokens', 0) or 0
+            cls._prompt_cache_stats['cached_tokens'] += cached_tokens
+
+    @classmethod
+    def prompt_cache_stats(cls) -> Dict:
+        """Share of prompt tokens the provider served from its prefix cache"""
+        with cls._stats_lock:
+            stats = dict(cls._prompt_cache_stats)
+        stats['cached_ratio'] = round(stats['cached_tokens'] / stats['prompt_tokens'], 4) if stats['prompt_tokens'] else 0.0
+        return stats
+
+    @classmethod
+    def translation_stats(cls) -> Dict:
+        """How often post-translation of responses was skipped"""
+        with cls._stats_lock:
+            stats = dict(cls._translation_stats)
+        stats['skip_ratio'] = round(stats['skipped'] / stats['checked'], 4) if stats['checked'] else 0.0
+        return stats
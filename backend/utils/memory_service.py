@@ -1,69 +1,191 @@
-from typing import List, Dict, Optional
-from collections import defaultdict
+from typing import Callable, List, Dict, Optional
+
+from config import Config
+from utils.background import get_background_executor
+from utils.session_store import create_session_store
+
+# Rough token estimate (~4 characters per token) used for the history budget
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text or '') + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
 
 class MemoryService:
     """
     Service for managing conversational memory using LangChain-style approach
-    In-memory storage for conversation history (can be extended to use persistent storage)
+    Sessions are held in a bounded, TTL-expiring session store, either in
+    process or shared between workers (see utils/session_store.py)
+
+    Each session keeps a rolling summary of older turns plus the recent
+    messages. Once enough turns have aged out of the recent window they are
+    folded into the summary on the background executor, so the history sent
+    to the LLM stays bounded however long the session runs, and only changes
+    (other than by growing) when a batch is folded in.
     """
-    
-    def __init__(self):
-        # In-memory storage for conversation history
-        # Format: {session_id: [{'role': 'user'|'assistant', 'content': '...'}, ...]}
-        self.conversations: Dict[str, List[Dict]] = defaultdict(list)
-        self.max_history_length = 20  # Keep last 20 messages per session
-    
+
+    # A compaction that hasn't finished within this long may be retried
+    COMPACTION_LEASE_SECONDS = 120
+
+    def __init__(self, summarizer: Optional[Callable[[Optional[str], List[Dict]], Optional[str]]] = None):
+        """
+        Args:
+            summarizer: fn(previous_summary, messages) -> new summary. Without
+                one, old turns are simply dropped.
+        """
+        self.max_history_length = 20  # Hard cap on raw messages per session
+        self.store = create_session_store(max_messages=self.max_history_length)
+        self.recent_turns = Config.MEMORY_RECENT_TURNS
+        self.token_budget = Config.MEMORY_HISTORY_TOKEN_BUDGET
+        self.compact_batch_turns = Config.MEMORY_COMPACT_BATCH_TURNS
+        self.summarizer = summarizer
+
     def add_to_history(self, session_id: str, user_message: str, ai_response: str):
         """
         Add conversation turn to memory
-        
+
         Args:
             session_id: Session identifier
             user_message: User's message
             ai_response: AI's response
         """
-        self.conversations[session_id].append({
-            'role': 'user',
-            'content': user_message
-        })
-        self.conversations[session_id].append({
-            'role': 'assistant',
-            'content': ai_response
-        })
-        
-        # Trim history if too long
-        if len(self.conversations[session_id]) > self.max_history_length:
-            self.conversations[session_id] = self.conversations[session_id][-self.max_history_length:]
-    
+        # Turns trimmed by the store's hard cap never reach the summary
+        state = self.store.append(session_id, [
+            {'role': 'user', 'content': user_message},
+            {'role': 'assistant', 'content': ai_response},
+        ])
+
+        old_messages = len(state['messages']) - self.recent_turns * 2
+        if self.summarizer is None or old_messages < self.compact_batch_turns * 2:
+            return
+        if not self.store.try_begin_compaction(session_id, self.COMPACTION_LEASE_SECONDS):
+            return
+        if not get_background_executor().submit_nowait(self._compact, session_id):
+            self.store.end_compaction(session_id)
+
+    def _compact(self, session_id: str) -> None:
+        """Fold messages older than the recent window into the session summary"""
+        try:
+            state = self.store.load(session_id)
+            if state is None:
+                return
+            keep = self.recent_turns * 2
+            old = state['messages'][:-keep] if keep else state['messages']
+            if not old:
+                return
+            # Messages may be trimmed or appended meanwhile; the store drops
+            # only the ones before `end`, which went into the summary
+            end = state['base'] + len(old)
+            summary = self.summarizer(state['summary'], old)
+            if summary:
+                self.store.apply_summary(session_id, summary, end)
+        except Exception as e:
+            print(f"Warning: conversation compaction failed for {session_id}: {e}")
+        finally:
+            self.store.end_compaction(session_id)
+
+    def get_prompt_history(self, session_id: str, fallback: Optional[List[Dict]] = None) -> List[Dict]:
+        """
+        Get the history to send to the LLM: the rolling summary (as a system
+        message) followed by every message not yet folded into it, within the
+        token budget.
+
+        Between compactions a turn's history is a prefix of the next turn's,
+        so the prompt prefix stays cacheable; it only changes when a batch of
+        old turns is summarized (or, without a summarizer, dropped).
+
+        Args:
+            session_id: Session identifier
+            fallback: Client-supplied history, used when this session is unknown here
+
+        Returns:
+            List of conversation messages
+        """
+        state = self.store.load(session_id)
+        if state is not None and state['messages']:
+            summary = state['summary']
+            messages = state['messages']
+            base = state['base']
+            compacted = self.summarizer is not None
+        else:
+            summary = None
+            messages = [
+                {'role': m.get('role'), 'content': m.get('content')}
+                for m in (fallback or [])
+                if isinstance(m, dict) and m.get('role') in ('user', 'assistant') and m.get('content')
+            ]
+            base = 0
+            compacted = False
+
+        keep = self.recent_turns * 2
+        step = max(1, self.compact_batch_turns) * 2
+        if not keep:
+            messages = []
+        elif not compacted:
+            # Nothing folds these messages away, so drop the old ones in whole
+            # batches at the positions compaction would: the window then grows
+            # by a turn per request and only moves every compact_batch_turns
+            end = base + len(messages)
+            start = max(base, (end - keep) // step * step)
+            messages = messages[start - base:]
+
+        budget = self.token_budget
+        if summary:
+            summary_message = {'role': 'system', 'content': f"Summary of the earlier conversation:\n{summary}"}
+            budget -= estimate_tokens(summary_message['content'])
+
+        # A single long message is clipped rather than pushing everything else out
+        per_message_cap = max(1, self.token_budget // 2) * CHARS_PER_TOKEN
+        history = []
+        for message in messages:
+            content = message['content']
+            if len(content) > per_message_cap:
+                content = content[:per_message_cap] + "..."
+            history.append({'role': message['role'], 'content': content})
+
+        # Over budget: drop the oldest messages a batch at a time (never the newest)
+        costs = [estimate_tokens(message['content']) for message in history]
+        start = 0
+        while start < len(history) - 1 and sum(costs[start:]) > budget:
+            start = min(start + step, len(history) - 1)
+        history = history[start:]
+
+        if summary:
+            history.insert(0, summary_message)
+        return history
+
     def get_conversation_history(self, session_id: str) -> List[Dict]:
         """
         Get conversation history for a session
-        
+
         Args:
             session_id: Session identifier
-        
+
         Returns:
             List of conversation messages
         """
-        return self.conversations.get(session_id, [])
-    
+        state = self.store.load(session_id)
+        return state['messages'] if state else []
+
     def clear_history(self, session_id: str):
         """
         Clear conversation history for a session
-        
+
         Args:
             session_id: Session identifier
         """
-        if session_id in self.conversations:
-            del self.conversations[session_id]
-    
+        self.store.delete(session_id)
+
     def get_all_sessions(self) -> List[str]:
         """
         Get all session IDs
-        
+
         Returns:
             List of session IDs
         """
-        return list(self.conversations.keys())
-
+        return self.store.session_ids()
 
+    def stats(self) -> Dict:
+        """Session count and memory use of the session store"""
+        return self.store.stats()
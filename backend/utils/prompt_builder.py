@@ -0,0 +1,140 @@
+from typing import Dict, List, Optional
+
+
+def build_document_outline(
+    chapter_titles: List[str],
+    unit_titles: List[str],
+    chapter_count: Optional[int] = None,
+    unit_count: Optional[int] = None,
+) -> str:
+    """
+    Render a document's structure as a block that is identical on every
+    request for that document (titles must already be in a fixed order).
+
+    Args:
+        chapter_titles: Sorted chapter titles
+        unit_titles: Sorted unit titles
+        chapter_count: Total chapters, if known
+        unit_count: Total units, if known
+
+    Returns:
+        Outline text, or '' if nothing is known about the document
+    """
+    lines = []
+    if chapter_count is not None:
+        lines.append(f"Total chapters in this textbook: {chapter_count}")
+    if unit_count is not None:
+        lines.append(f"Total units in this textbook: {unit_count}")
+    if chapter_titles:
+        lines.append(f"Chapter titles: {', '.join(chapter_titles)}")
+    if unit_titles:
+        lines.append(f"Unit titles: {', '.join(unit_titles)}")
+    return "\n".join(lines)
+
+
+def format_context(results: List[Dict]) -> str:
+    """
+    Join retrieved chunks in document order (page, then chunk index).
+
+    Ordering by position rather than by score means two questions that
+    retrieve overlapping chunks produce prompts sharing a longer prefix.
+    """
+    def position(result):
+        payload = result.get('payload', {})
+        page = payload.get('page')
+        chunk_index = payload.get('chunk_index')
+        return (
+            page if isinstance(page, int) else float('inf'),
+            chunk_index if isinstance(chunk_index, int) else float('inf'),
+        )
+
+    parts = []
+    for result in sorted(results, key=position):
+        payload = result.get('payload', {})
+        text = payload.get('text', '')
+        if not text:
+            continue
+        chapter_info = ""
+        if payload.get('chapter_title'):
+            chapter_info = f"[Chapter: {payload.get('chapter_title')}] "
+        if payload.get('unit_title'):
+            chapter_info += f"[Unit: {payload.get('unit_title')}] "
+        parts.append(chapter_info + text)
+    return "\n\n".join(parts)
+
+
+class PromptBuilder:
+    """
+    Lays out chat messages from most to least stable so provider-side prefix
+    caching can reuse as much of the prompt as possible:
+
+        1. system prompt                  (same for every request)
+        2. document outline               (same for every request on a document)
+        3. conversation summary           (changes only when older turns are compacted)
+        4. history not yet summarized     (grows by one turn per request)
+        5. retrieved context, in order    (new for every question)
+        6. the question and the per-language answer instructions
+
+    Anything that varies per request (context, question, language) comes
+    last. Between compactions, layers 1-4 of one turn's prompt are a prefix
+    of the next turn's, provided the history passed in only grows (as
+    MemoryService.get_prompt_history's does); a `history_limit` window
+    slides every turn once full and gives that up.
+    """
+
+    def __init__(self, system_prompt: str, history_limit: Optional[int] = None):
+        """
+        Args:
+            system_prompt: Layer 1
+            history_limit: Keep only the last N history messages (None keeps
+                all of them; bound the history upstream instead)
+        """
+        self.system_prompt = system_prompt
+        self.history_limit = history_limit
+
+    def build(
+        self,
+        user_message: str,
+        context: str,
+        target_language: str,
+        outline: Optional[str] = None,
+        conversation_history: Optional[List[Dict]] = None,
+    ) -> List[Dict]:
+        """
+        Args:
+            user_message: User's question
+            context: Retrieved textbook context, already in document order
+            target_language: Language name the answer must be written in
+            outline: Per-document outline from build_document_outline
+            conversation_history: Previous messages (role/content dicts); a
+                leading system message is kept as the conversation summary
+
+        Returns:
+            Messages for the Chat Completions API
+        """
+        system_content = self.system_prompt
+        if outline:
+            system_content += f"\n\n<document_outline>\n{outline}\n</document_outline>"
+
+        messages = [{"role": "system", "content": system_content}]
+
+        history = conversation_history or []
+        if history and history[0].get('role') == 'system':
+            messages.append({"role": "system", "content": history[0].get('content', '')})
+        turns = [msg for msg in history if msg.get('role') in ('user', 'assistant')]
+        if self.history_limit:
+            turns = turns[-self.history_limit:]
+        for msg in turns:
+            messages.append({"role": msg['role'], "content": msg.get('content', '')})
+
+        if context:
+            messages.append({"role": "system", "content": f"<context>\n{context}\n</context>"})
+
+        messages.append({
+            "role": "user",
+            "content": f"""User question:
+{user_message}
+
+IMPORTANT: Answer the question using ONLY the textbook context above. Your response MUST be in {target_language} language. If the user asked in {target_language}, respond in {target_language}. Do not translate the textbook content, but explain it in {target_language}."""
+        })
+        return messages
@@ -0,0 +1,101 @@
+from typing import Dict, Iterable, List, Optional
+
+# Payload fields a context chunk needs (prompt text, ordering and sources)
+CONTEXT_FIELDS = ['text', 'page', 'chunk_index', 'chapter_title', 'unit_title']
+
+# Payload fields that describe a document's structure; the counts only exist
+# on points ingested before the document catalog
+STRUCTURE_FIELDS = ['chapter_title', 'unit_title', 'document_chapter_count', 'document_unit_count']
+
+
+def dedupe_results(result_lists: Iterable[List[Dict]]) -> List[Dict]:
+    """Merge result lists, keeping the first occurrence of each point id"""
+    seen = set()
+    merged = []
+    for results in result_lists:
+        for result in results:
+            point_id = result.get('id')
+            if point_id is not None:
+                if point_id in seen:
+                    continue
+                seen.add(point_id)
+            merged.append(result)
+    return merged
+
+
+class RetrievalPlanner:
+    """
+    Plans every vector store read a request needs as a single search_batch
+    call, instead of a cascade of sequential searches and scrolls.
+
+    Searches are always filtered to the document, so an empty result means
+    the document has no points; no unfiltered or generic fallback searches
+    are needed.
+    """
+
+    def __init__(self, vector_store):
+        self.vector_store = vector_store
+        # Fixed probe for the structure sample, so the same chunks (and hence
+        # the same outline) come back on every turn for a document
+        self._structure_probe = [1.0] * vector_store.vector_size
+
+    def chat_turn(self, query_vector: List[float], document_id: str, context_limit: int = 10, structure_sample: int = 128) -> Dict:
+        """
+        Context chunks for a question plus a structure sample of the document
+
+        Args:
+            query_vector: Embedding of the user's question
+            document_id: Document to search
+            context_limit: Number of context chunks
+            structure_sample: Number of chunks whose structure fields are
+                sampled; 0 when the structure is known (e.g. from the
+                document catalog), which leaves a single search
+
+        Returns:
+            {'results': context chunks, 'structure': structure payloads}
+        """
+        document_filter = {'document_id': document_id}
+        searches = [{
+            'vector': query_vector,
+            'limit': context_limit,
+            'filter_conditions': document_filter,
+            'with_payload': CONTEXT_FIELDS,
+        }]
+        if structure_sample:
+            searches.append({
+                'vector': self._structure_probe,
+                'limit': structure_sample,
+                'filter_conditions': document_filter,
+                'with_payload': STRUCTURE_FIELDS,
+            })
+        batches = self.vector_store.search_batch(searches)
+        context = batches[0]
+        structure = []
+        if structure_sample:
+            structure = [result['payload'] for result in dedupe_results([context, batches[1]])]
+        return {'results': context, 'structure': structure}
+
+    def multi_query(self, query_vectors: List[List[float]], document_id: str, limit_per_query: int, fields: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Several queries against one document, merged and deduplicated
+
+        Args:
+            query_vectors: Embeddings (None entries are skipped)
+            document_id: Document to search
+            limit_per_query: Results per query
+            fields: Payload fields to return (defaults to CONTEXT_FIELDS)
+
+        Returns:
+            Results in query order, each point at most once
+        """
+        document_filter = {'document_id': document_id}
+        searches = [
+            {
+                'vector': vector,
+                'limit': limit_per_query,
+                'filter_conditions': document_filter,
+                'with_payload': fields or CONTEXT_FIELDS,
+            }
+            for vector in query_vectors if vector
+        ]
+        return dedupe_results(self.vector_store.search_batch(searches))
@@ -0,0 +1,69 @@
+import re
+from typing import Optional
+
+# Unicode blocks of the scripts used by the supported languages
+SCRIPT_RANGES = {
+    'latin': 'A-Za-z\u00C0-\u024F',
+    'devanagari': '\u0900-\u097F',
+    'bengali': '\u0980-\u09FF',
+    'gurmukhi': '\u0A00-\u0A7F',
+    'gujarati': '\u0A80-\u0AFF',
+    'oriya': '\u0B00-\u0B7F',
+    'tamil': '\u0B80-\u0BFF',
+    'telugu': '\u0C00-\u0C7F',
+    'kannada': '\u0C80-\u0CFF',
+    'malayalam': '\u0D00-\u0D7F',
+    'arabic': '\u0600-\u06FF\u0750-\u077F\uFB50-\uFDFF\uFE70-\uFEFC',
+}
+
+# Base language code -> script it is written in
+LANGUAGE_SCRIPTS = {
+    'en': 'latin',
+    'hi': 'devanagari',
+    'mr': 'devanagari',
+    'bn': 'bengali',
+    'as': 'bengali',
+    'pa': 'gurmukhi',
+    'gu': 'gujarati',
+    'or': 'oriya',
+    'ta': 'tamil',
+    'te': 'telugu',
+    'kn': 'kannada',
+    'ml': 'malayalam',
+    'ur': 'arabic',
+}
+
+# Digits, punctuation and whitespace match none of these, so they don't count
+# towards either side of the ratio.
+_SCRIPT_PATTERNS = {script: re.compile(f'[{ranges}]') for script, ranges in SCRIPT_RANGES.items()}
+_ANY_SCRIPT = re.compile('[' + ''.join(SCRIPT_RANGES.values()) + ']')
+
+
+def script_for_language(language: Optional[str]) -> Optional[str]:
+    """Script a language code (e.g. 'hi', 'ta-IN') is written in, if known"""
+    if not language:
+        return None
+    return LANGUAGE_SCRIPTS.get(language.lower().split('-')[0])
+
+
+def script_ratio(text: str, script: str) -> float:
+    """Fraction of script characters in text that belong to `script`"""
+    if not text or script not in _SCRIPT_PATTERNS:
+        return 0.0
+    total = len(_ANY_SCRIPT.findall(text))
+    if not total:
+        return 0.0
+    return len(_SCRIPT_PATTERNS[script].findall(text)) / total
+
+
+def is_mostly_in_language_script(text: str, language: Optional[str], threshold: float = 0.6) -> bool:
+    """
+    Whether text is already written mostly in the script of `language`.
+
+    Runs as two regex scans in C, so it is cheap enough to call on every
+    response. Languages with an unknown script always return False.
+    """
+    script = script_for_language(language)
+    if not script:
+        return False
+    return script_ratio(text, script) >= threshold
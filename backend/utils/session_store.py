@@ -0,0 +1,384 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+from config import Config
+
+# Rough per-message bookkeeping cost (dict, deque slot, strings) for accounting
+MESSAGE_OVERHEAD_BYTES = 120
+
+
+class InMemorySessionStore:
+    """
+    Process-local conversation store.
+
+    Sessions live in an LRU-ordered dict: each holds a bounded deque of
+    messages plus its rolling summary. Sessions idle for longer than
+    `ttl_seconds` expire, and the least recently used ones are evicted once
+    there are more than `max_sessions` or the stored text exceeds `max_bytes`.
+
+    Message positions are absolute: `base` is the index of the oldest
+    message still held, so callers can tell which messages were dropped.
+    """
+
+    # Expired sessions are looked for at most this often
+    EXPIRY_INTERVAL_SECONDS = 60
+
+    def __init__(self, max_messages: int, ttl_seconds: float, max_sessions: int, max_bytes: int):
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self._last_expiry = 0.0
+        self._evicted = {'expired': 0, 'lru': 0}
+
+    @staticmethod
+    def _message_bytes(message: Dict) -> int:
+        return len(message['content'].encode('utf-8')) + MESSAGE_OVERHEAD_BYTES
+
+    def _snapshot(self, state: Dict) -> Dict:
+        return {'summary': state['summary'], 'messages': list(state['messages']), 'base': state['base']}
+
+    def _drop(self, session_id: str, reason: str) -> None:
+        state = self._sessions.pop(session_id)
+        self._total_bytes -= state['bytes']
+        self._evicted[reason] += 1
+
+    def _enforce_limits(self, now: float) -> None:
+        if now - self._last_expiry >= self.EXPIRY_INTERVAL_SECONDS:
+            self._last_expiry = now
+            # LRU order is last-access order, so expired sessions are at the front
+            while self._sessions:
+                session_id, state = next(iter(self._sessions.items()))
+                if now - state['last_access'] <= self.ttl_seconds:
+                    break
+                self._drop(session_id, 'expired')
+        while len(self._sessions) > self.max_sessions or (self._total_bytes > self.max_bytes and len(self._sessions) > 1):
+            self._drop(next(iter(self._sessions)), 'lru')
+
+    def _get(self, session_id: str, now: float) -> Optional[Dict]:
+        state = self._sessions.get(session_id)
+        if state is None:
+            return None
+        if now - state['last_access'] > self.ttl_seconds:
+            self._drop(session_id, 'expired')
+            return None
+        state['last_access'] = now
+        self._sessions.move_to_end(session_id)
+        return state
+
+    def load(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            state = self._get(session_id, time.time())
+            return self._snapshot(state) if state else None
+
+    def append(self, session_id: str, messages: List[Dict]) -> Dict:
+        now = time.time()
+        with self._lock:
+            state = self._get(session_id, now)
+            if state is None:
+                state = {
+                    'summary': None,
+                    'messages': deque(maxlen=self.max_messages),
+                    'base': 0,
+                    'bytes': 0,
+                    'compacting_until': 0.0,
+                    'last_access': now,
+                }
+                self._sessions[session_id] = state
+            for message in messages:
+                if len(state['messages']) == self.max_messages:
+                    dropped = state['messages'][0]
+                    state['bytes'] -= self._message_bytes(dropped)
+                    self._total_bytes -= self._message_bytes(dropped)
+                    state['base'] += 1
+                state['messages'].append(message)
+                size = self._message_bytes(message)
+                state['bytes'] += size
+                self._total_bytes += size
+            snapshot = self._snapshot(state)
+            self._enforce_limits(now)
+            return snapshot
+
+    def apply_summary(self, session_id: str, summary: str, end: int) -> None:
+        """Store a new summary covering all messages before absolute index `end`"""
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                return
+            while state['messages'] and state['base'] < end:
+                dropped = state['messages'].popleft()
+                state['bytes'] -= self._message_bytes(dropped)
+                self._total_bytes -= self._message_bytes(dropped)
+                state['base'] += 1
+            old_summary = len((state['summary'] or '').encode('utf-8'))
+            new_summary = len(summary.encode('utf-8'))
+            state['summary'] = summary
+            state['bytes'] += new_summary - old_summary
+            self._total_bytes += new_summary - old_summary
+
+    def try_begin_compaction(self, session_id: str, lease_seconds: float) -> bool:
+        now = time.time()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None or state['compacting_until'] > now:
+                return False
+            state['compacting_until'] = now + lease_seconds
+            return True
+
+    def end_compaction(self, session_id: str) -> None:
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is not None:
+                state['compacting_until'] = 0.0
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            state = self._sessions.pop(session_id, None)
+            if state is not None:
+                self._total_bytes -= state['bytes']
+
+    def session_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._sessions.keys())
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'messages': sum(len(state['messages']) for state in self._sessions.values()),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'evicted_expired': self._evicted['expired'],
+                'evicted_lru': self._evicted['lru'],
+            }
+
+
+class SQLiteSessionStore:
+    """
+    Conversation store shared by all worker processes on one host.
+
+    Uses a SQLite database in WAL mode on local disk, so readers never block
+    the writer and every gunicorn worker sees the same history. Same
+    interface and limits as InMemorySessionStore; `max_bytes` is not
+    enforced here since the data lives on disk.
+    """
+
+    EXPIRY_INTERVAL_SECONDS = 60
+
+    def __init__(self, path: str, max_messages: int, ttl_seconds: float, max_sessions: int):
+        self.path = path
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._local = threading.local()
+        self._last_expiry = 0.0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                summary TEXT,
+                compacting_until REAL NOT NULL DEFAULT 0,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_sessions_last_access ON sessions (last_access);
+            CREATE TABLE IF NOT EXISTS messages (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            ) WITHOUT ROWID;
+        """)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit; write transactions are opened explicitly
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _load(self, conn: sqlite3.Connection, session_id: str, now: float) -> Optional[Dict]:
+        row = conn.execute(
+            "SELECT summary, last_access FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None or now - row[1] > self.ttl_seconds:
+            return None
+        rows = conn.execute(
+            "SELECT seq, role, content FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+        ).fetchall()
+        return {
+            'summary': row[0],
+            'messages': [{'role': role, 'content': content} for _, role, content in rows],
+            'base': rows[0][0] if rows else 0,
+        }
+
+    def load(self, session_id: str) -> Optional[Dict]:
+        return self._load(self._connection(), session_id, time.time())
+
+    def append(self, session_id: str, messages: List[Dict]) -> Dict:
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT last_access FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is not None and now - row[0] > self.ttl_seconds:
+                self._delete(conn, session_id)
+                row = None
+            if row is None:
+                conn.execute(
+                    "INSERT INTO sessions (session_id, summary, last_access) VALUES (?, NULL, ?)",
+                    (session_id, now)
+                )
+            else:
+                conn.execute("UPDATE sessions SET last_access = ? WHERE session_id = ?", (now, session_id))
+            next_seq = conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM messages WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            conn.executemany(
+                "INSERT INTO messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                [(session_id, next_seq + i, m['role'], m['content']) for i, m in enumerate(messages)]
+            )
+            conn.execute(
+                "DELETE FROM messages WHERE session_id = ? AND seq < ?",
+                (session_id, next_seq + len(messages) - self.max_messages)
+            )
+            state = self._load(conn, session_id, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._enforce_limits(now)
+        return state
+
+    def _enforce_limits(self, now: float) -> None:
+        """Expire idle sessions and apply the LRU cap, once per interval per process"""
+        if now - self._last_expiry < self.EXPIRY_INTERVAL_SECONDS:
+            return
+        self._last_expiry = now
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS evict (session_id TEXT PRIMARY KEY)"
+            )
+            conn.execute("DELETE FROM evict")
+            conn.execute(
+                "INSERT OR IGNORE INTO evict SELECT session_id FROM sessions WHERE last_access < ?",
+                (now - self.ttl_seconds,)
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO evict SELECT session_id FROM sessions "
+                "ORDER BY last_access DESC LIMIT -1 OFFSET ?",
+                (self.max_sessions,)
+            )
+            conn.execute("DELETE FROM messages WHERE session_id IN (SELECT session_id FROM evict)")
+            conn.execute("DELETE FROM sessions WHERE session_id IN (SELECT session_id FROM evict)")
+            conn.execute("COMMIT")
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            print(f"Warning: session store expiry failed: {e}")
+
+    def apply_summary(self, session_id: str, summary: str, end: int) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            updated = conn.execute(
+                "UPDATE sessions SET summary = ? WHERE session_id = ?", (summary, session_id)
+            ).rowcount
+            if updated:
+                conn.execute("DELETE FROM messages WHERE session_id = ? AND seq < ?", (session_id, end))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def try_begin_compaction(self, session_id: str, lease_seconds: float) -> bool:
+        now = time.time()
+        cursor = self._connection().execute(
+            "UPDATE sessions SET compacting_until = ? WHERE session_id = ? AND compacting_until <= ?",
+            (now + lease_seconds, session_id, now)
+        )
+        return cursor.rowcount == 1
+
+    def end_compaction(self, session_id: str) -> None:
+        self._connection().execute(
+            "UPDATE sessions SET compacting_until = 0 WHERE session_id = ?", (session_id,)
+        )
+
+    def _delete(self, conn: sqlite3.Connection, session_id: str) -> None:
+        conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def delete(self, session_id: str) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._delete(conn, session_id)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def session_ids(self) -> List[str]:
+        rows = self._connection().execute(
+            "SELECT session_id FROM sessions WHERE last_access >= ?", (time.time() - self.ttl_seconds,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def stats(self) -> Dict:
+        conn = self._connection()
+        sessions = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        messages, text_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0) FROM messages"
+        ).fetchone()
+        file_bytes = 0
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                file_bytes += os.path.getsize(self.path + suffix)
+            except OSError:
+                pass
+        return {
+            'backend': 'sqlite',
+            'sessions': sessions,
+            'max_sessions': self.max_sessions,
+            'messages': messages,
+            'bytes': text_bytes,
+            'file_bytes': file_bytes,
+        }
+
+
+def create_session_store(max_messages: int):
+    """Session store selected by Config.SESSION_STORE_BACKEND ('memory' or 'sqlite')"""
+    if Config.SESSION_STORE_BACKEND == 'sqlite':
+        try:
+            return SQLiteSessionStore(
+                Config.SESSION_STORE_PATH,
+                max_messages=max_messages,
+                ttl_seconds=Config.SESSION_TTL_SECONDS,
+                max_sessions=Config.SESSION_MAX_SESSIONS,
+            )
+        except Exception as e:
+            print(f"Warning: SQLite session store unavailable ({e}), using in-memory sessions")
+    return InMemorySessionStore(
+        max_messages=max_messages,
+        ttl_seconds=Config.SESSION_TTL_SECONDS,
+        max_sessions=Config.SESSION_MAX_SESSIONS,
+        max_bytes=Config.SESSION_MAX_MB * 1024 * 1024,
+    )
@@ -0,0 +1,147 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+try:
+    from azure.cognitiveservices.speech import (
+        Connection,
+        SpeechSynthesizer,
+        ResultReason
+    )
+    AZURE_SPEECH_AVAILABLE = True
+except ImportError:
+    AZURE_SPEECH_AVAILABLE = False
+
+
+class PoolTimeout(Exception):
+    """No pooled synthesizer became free within acquire_timeout (local load, not an Azure failure)"""
+
+
+class _SynthesisCanceled(Exception):
+    """Raised inside acquire() so the canceled synthesizer is discarded, not reused"""
+
+
+class AzureSynthesizerPool:
+    """
+    Pool of long-lived Azure SpeechSynthesizer instances, one pool per voice.
+
+    Synthesizers are created without an audio output so results come back as
+    in-memory bytes, and their service connection is opened ahead of time so
+    requests skip connection setup and the TLS handshake.
+    """
+
+    def __init__(self, speech_config, size_per_voice: int = 2, acquire_timeout: float = 30.0):
+        if not AZURE_SPEECH_AVAILABLE:
+            raise RuntimeError("Azure Speech SDK not installed")
+        self.speech_config = speech_config
+        self.size_per_voice = max(1, size_per_voice)
+        self.acquire_timeout = acquire_timeout
+        self._idle: Dict[str, queue.LifoQueue] = {}
+        self._created: Dict[str, int] = {}
+        # Connection objects must stay referenced for the link to stay open
+        self._connections: Dict[int, object] = {}
+        self._lock = threading.Lock()
+
+    def _create(self, voice_name: str):
+        # The synthesizer copies the config's properties when it is constructed,
+        # so the shared config can be re-pointed at another voice afterwards.
+        with self._lock:
+            self.speech_config.speech_synthesis_voice_name = voice_name
+            synthesizer = SpeechSynthesizer(speech_config=self.speech_config, audio_config=None)
+        try:
+            connection = Connection.from_speech_synthesizer(synthesizer)
+            connection.open(True)
+            self._connections[id(synthesizer)] = connection
+        except Exception as e:
+            # The synthesizer still works, it just connects on first use
+            print(f"WARNING: Could not pre-open Azure TTS connection for {voice_name}: {e}")
+        return synthesizer
+
+    def _discard(self, voice_name: str, synthesizer) -> None:
+        connection = self._connections.pop(id(synthesizer), None)
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        with self._lock:
+            self._created[voice_name] = max(0, self._created.get(voice_name, 1) - 1)
+
+    @contextmanager
+    def acquire(self, voice_name: str):
+        """Borrow a synthesizer for voice_name; broken synthesizers are dropped"""
+        with self._lock:
+            idle = self._idle.setdefault(voice_name, queue.LifoQueue())
+            may_create = idle.empty() and self._created.get(voice_name, 0) < self.size_per_voice
+            if may_create:
+                self._created[voice_name] = self._created.get(voice_name, 0) + 1
+
+        if may_create:
+            try:
+                synthesizer = self._create(voice_name)
+            except Exception:
+                with self._lock:
+                    self._created[voice_name] -= 1
+                raise
+        else:
+            try:
+                synthesizer = idle.get(timeout=self.acquire_timeout)
+            except queue.Empty:
+                raise PoolTimeout(
+                    f"no Azure synthesizer for {voice_name} free after {self.acquire_timeout}s"
+                ) from None
+
+        try:
+            yield synthesizer
+        except Exception:
+            self._discard(voice_name, synthesizer)
+            raise
+        else:
+            idle.put(synthesizer)
+
+    def prewarm(self, voice_names: Iterable[str]) -> None:
+        """Open one connection per voice ahead of the first request"""
+        for voice_name in voice_names:
+            try:
+                with self.acquire(voice_name):
+                    pass
+                print(f"Azure TTS connection pre-warmed for voice: {voice_name}")
+            except Exception as e:
+                print(f"WARNING: Azure TTS pre-warm failed for {voice_name}: {e}")
+
+    def synthesize(self, text: str, voice_name: str) -> Optional[bytes]:
+        """
+        Synthesize text with a pooled synthesizer.
+
+        Raises PoolTimeout when every synthesizer for the voice stays busy.
+
+        Returns:
+            Audio bytes if successful, None otherwise
+        """
+        try:
+            with self.acquire(voice_name) as synthesizer:
+                result = synthesizer.speak_text_async(text).get()
+                if result.reason == ResultReason.Canceled:
+                    # The connection behind a canceled synthesizer may be dead;
+                    # drop it so the next acquire() builds a fresh one
+                    raise _SynthesisCanceled(result.cancellation_details)
+        except _SynthesisCanceled as canceled:
+            cancellation_details = canceled.args[0]
+            error_msg = f"Azure TTS canceled: {cancellation_details.reason}"
+            if getattr(cancellation_details, 'error_details', None):
+                error_msg += f" - {cancellation_details.error_details}"
+            print(f"ERROR: {error_msg}")
+            return None
+
+        if result.reason == ResultReason.SynthesizingAudioCompleted:
+            return result.audio_data
+        print(f"ERROR: Azure TTS failed with reason: {result.reason}")
+        return None
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                voice: {'created': self._created.get(voice, 0), 'idle': idle.qsize()}
+                for voice, idle in self._idle.items()
+            }
@@ -1,7 +1,34 @@
 from supabase import create_client, Client
+from postgrest.exceptions import APIError
 from typing import List, Dict, Optional
 from config import Config
-from datetime import datetime
+from datetime import datetime, timezone
+import base64
+import json
+import uuid
+from utils.lru_cache import LRUCache
+from utils.write_behind import WriteBehindBuffer
+
+# Columns the history views need (no document_id/session_id repeated per row)
+HISTORY_COLUMNS = 'id,user_message,ai_response,audio_path,language,created_at'
+
+
+def is_permanent_write_error(error: Exception) -> bool:
+    """
+    Whether the database refused the rows themselves, so retrying cannot help
+
+    Postgres data (22xxx), integrity (23xxx) and syntax/schema (42xxx) errors,
+    PostgREST request errors (PGRST1xx/2xx) and other 4xx responses are
+    permanent; network errors, timeouts, 408/429 and 5xx are transient.
+    """
+    if not isinstance(error, APIError):
+        return False
+    code = str(error.code or '')
+    if code[:2] in ('22', '23', '42') and len(code) == 5:
+        return True
+    if code.startswith('PGRST1') or code.startswith('PGRST2'):
+        return True
+    return code.isdigit() and 400 <= int(code) < 500 and int(code) not in (408, 429)
 
 class SupabaseService:
     """Service for interacting with Supabase database"""
@@ -17,6 +44,27 @@ class SupabaseService:
             self._ensure_table_exists()
         except Exception as e:
             raise ValueError(f"Failed to initialize Supabase client: {e}")
+        
+        # Short-TTL read-through cache for history and session lists; entries
+        # are keyed on a per-session/per-document version bumped on insert
+        self._read_cache = LRUCache(Config.HISTORY_CACHE_SIZE, ttl=Config.HISTORY_CACHE_TTL_SECONDS)
+        self._versions = LRUCache(Config.HISTORY_CACHE_SIZE * 4)
+        
+        # Conversation turns are written behind the request in bulk inserts
+        self.write_buffer = None
+        if Config.SUPABASE_WRITE_BEHIND:
+            self.write_buffer = WriteBehindBuffer(
+                'supabase-conversations',
+                self.insert_conversations,
+                journal_path=Config.SUPABASE_WRITE_JOURNAL,
+                dead_letter_path=Config.SUPABASE_WRITE_DEAD_LETTER,
+                is_permanent=is_permanent_write_error,
+                batch_size=Config.SUPABASE_WRITE_BATCH_SIZE,
+                flush_interval=Config.SUPABASE_WRITE_FLUSH_SECONDS,
+                max_buffer=Config.SUPABASE_WRITE_MAX_BUFFER,
+                max_retries=Config.SUPABASE_WRITE_MAX_RETRIES,
+            )
+            self.write_buffer.start()
     
     def _ensure_table_exists(self):
         """Ensure conversations table exists (manual setup required in Supabase)"""
@@ -34,7 +82,7 @@ class SupabaseService:
         language: str = 'en'
     ):
         """
-        Save conversation turn to Supabase
+        Save conversation turn to Supabase (buffered when write-behind is enabled)
         
         Args:
             session_id: Session identifier
@@ -44,23 +92,127 @@ class SupabaseService:
             audio_path: Path to audio file
             language: Language code
         """
+        data = {
+            # Client-side id so a batch that is retried or replayed after a
+            # partial failure is written once (see insert_conversations)
+            'id': str(uuid.uuid4()),
+            'session_id': session_id,
+            'document_id': document_id,
+            'user_message': user_message,
+            'ai_response': ai_response,
+            'audio_path': audio_path,
+            'language': language,
+            # Stamped now, not at flush time, so turns keep their order; UTC
+            # like the column's NOW() default, whatever the worker's time zone
+            'created_at': datetime.now(timezone.utc).isoformat()
+        }
+        if self.write_buffer is not None:
+            self.write_buffer.add(data)
+            return
         try:
-            data = {
-                'session_id': session_id,
-                'document_id': document_id,
-                'user_message': user_message,
-                'ai_response': ai_response,
-                'audio_path': audio_path,
-                'language': language,
-                'created_at': datetime.now().isoformat()
-            }
-            
-            self.client.table(self.table_name).insert(data).execute()
+            self.insert_conversations([data])
         except Exception as e:
             print(f"Error saving conversation to Supabase: {e}")
             # Don't raise - allow conversation to continue even if DB save fails
             pass
     
+    def insert_conversations(self, rows: List[Dict]):
+        """
+        Insert conversation turns in a single request
+        
+        Rows already stored under the same id are skipped, so retrying a
+        batch whose first attempt reached the database adds no duplicates.
+        
+        Args:
+            rows: Conversation rows
+        
+        Raises:
+            Exception: if the insert fails (the write-behind buffer retries)
+        """
+        for row in rows:
+            # Journaled before rows carried ids; a bulk upsert needs the same keys on every row
+            row.setdefault('id', str(uuid.uuid4()))
+        self.client.table(self.table_name).upsert(rows, on_conflict='id', ignore_duplicates=True).execute()
+        self._invalidate(rows)
+    
+    def persistence_stats(self) -> Dict:
+        """Write-behind buffer counters (empty when writes are synchronous)"""
+        return self.write_buffer.stats() if self.write_buffer is not None else {}
+    
+    def _cache_version(self, kind: str, key: str) -> int:
+        return self._versions.get((kind, key), 0)
+    
+    def _invalidate(self, rows: List[Dict]):
+        """New rows change the first history page of their session and the session lists of their document"""
+        for kind, key in {('session', row.get('session_id')) for row in rows} | {('document', row.get('document_id')) for row in rows}:
+            self._versions.set((kind, key), self._cache_version(kind, key) + 1)
+    
+    @staticmethod
+    def encode_cursor(row: Dict) -> str:
+        raw = json.dumps([row.get('created_at'), row.get('id')]).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+    
+    @staticmethod
+    def decode_cursor(cursor: str):
+        """Returns (created_at, id); raises ValueError on a malformed cursor"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            created_at, row_id = json.loads(raw)
+        except Exception:
+            raise ValueError("Invalid cursor")
+        if not isinstance(created_at, str) or not isinstance(row_id, str):
+            raise ValueError("Invalid cursor")
+        return created_at, row_id
+    
+    def get_conversation_page(self, session_id: str, limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict:
+        """
+        Retrieve one page of a session's history, newest page first
+        
+        Pages are keyset-paginated on (created_at, id) going back in time;
+        each page's rows are in chronological order. Older pages never change,
+        and the first page is served from a short-TTL cache.
+        
+        Args:
+            session_id: Session identifier
+            limit: Rows per page (capped at HISTORY_MAX_PAGE_SIZE)
+            cursor: next_cursor from the previous page, None for the latest rows
+        
+        Returns:
+            {'items': [...], 'next_cursor': str|None, 'has_more': bool}
+        
+        Raises:
+            ValueError: if the cursor is malformed
+        """
+        limit = max(1, min(limit or Config.HISTORY_PAGE_SIZE, Config.HISTORY_MAX_PAGE_SIZE))
+        before = self.decode_cursor(cursor) if cursor else None
+        cache_key = ('history', session_id, self._cache_version('session', session_id), cursor, limit)
+        cached = self._read_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        query = self.client.table(self.table_name)\
+            .select(HISTORY_COLUMNS)\
+            .eq('session_id', session_id)
+        if before:
+            created_at, row_id = before
+            query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id})')
+        response = query\
+            .order('created_at', desc=True)\
+            .order('id', desc=True)\
+            .limit(limit + 1)\
+            .execute()
+        
+        rows = response.data or []
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        page = {
+            'items': list(reversed(rows)),
+            'next_cursor': self.encode_cursor(rows[-1]) if has_more else None,
+            'has_more': has_more,
+        }
+        self._read_cache.set(cache_key, page)
+        return page
+    
     def get_conversation_history(self, session_id: str) -> List[Dict]:
         """
         Retrieve conversation history for a session
@@ -69,41 +221,57 @@ class SupabaseService:
             session_id: Session identifier
         
         Returns:
-            List of conversation messages
+            List of conversation messages (the latest page, oldest first)
         """
         try:
-            response = self.client.table(self.table_name)\
-                .select('*')\
-                .eq('session_id', session_id)\
-                .order('created_at', desc=False)\
-                .execute()
-            
-            return response.data if response.data else []
+            return self.get_conversation_page(session_id)['items']
         except Exception as e:
             print(f"Error retrieving conversation history: {e}")
             return []
     
-    def get_sessions_by_document(self, document_id: str) -> List[Dict]:
+    def get_sessions_by_document(self, document_id: str, limit: int = 100) -> List[Dict]:
         """
         Get all sessions for a document
         
+        Uses the `sessions_for_document` SQL function (see README), which
+        groups on the server and returns one row per session with its turn
+        count and last activity, most recent first.
+        
         Args:
             document_id: Document identifier
+            limit: Maximum number of sessions
         
         Returns:
             List of session data
         """
+        cache_key = ('sessions', document_id, self._cache_version('document', document_id), limit)
+        cached = self._read_cache.get(cache_key)
+        if cached is not None:
+            return cached
         try:
-            response = self.client.table(self.table_name)\
-                .select('session_id')\
-                .eq('document_id', document_id)\
-                .execute()
-            
-            # Get unique session IDs
-            session_ids = list(set([row['session_id'] for row in response.data]))
-            return [{'session_id': sid} for sid in session_ids]
+            response = self.client.rpc(
+                'sessions_for_document',
+                {'p_document_id': document_id, 'p_limit': limit}
+            ).execute()
+            sessions = response.data or []
         except Exception as e:
-            print(f"Error retrieving sessions: {e}")
-            return []
-
-
+            print(f"Warning: sessions_for_document RPC unavailable ({e}), falling back to a projected scan")
+            try:
+                response = self.client.table(self.table_name)\
+                    .select('session_id,created_at')\
+                    .eq('document_id', document_id)\
+                    .order('created_at', desc=True)\
+                    .limit(Config.HISTORY_MAX_PAGE_SIZE * 10)\
+                    .execute()
+                sessions = []
+                seen = set()
+                for row in response.data or []:
+                    if row['session_id'] not in seen:
+                        seen.add(row['session_id'])
+                        sessions.append({'session_id': row['session_id'], 'last_message_at': row.get('created_at')})
+                sessions = sessions[:limit]
+            except Exception as e:
+                print(f"Error retrieving sessions: {e}")
+                return []
+        self._read_cache.set(cache_key, sessions)
+        return sessions
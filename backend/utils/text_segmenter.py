@@ -0,0 +1,100 @@
+import re
+from typing import List
+
+# Sentence terminators across the scripts we serve:
+#   . ! ?    Latin punctuation (also used in most Indic text)
+#   । ॥      Devanagari danda / double danda (Hindi, Marathi, Bengali, Assamese, Odia, Punjabi)
+#   ۔ ؟      Urdu full stop / Arabic question mark
+SENTENCE_TERMINATORS = '.!?।॥۔؟'
+
+# A terminator (plus any closing quotes/brackets) followed by whitespace ends a
+# sentence. Requiring whitespace keeps decimals ("3.14") intact. Line breaks
+# always end a sentence.
+_SENTENCE_BOUNDARY = re.compile(
+    r'(?<=[' + SENTENCE_TERMINATORS + r'])\s+'
+    r'|(?<=[' + SENTENCE_TERMINATORS + r']["\'”’)\]])\s+'
+    r'|\n+'
+)
+
+# Softer break points used when a single sentence is too long
+_CLAUSE_BOUNDARY = re.compile(r'(?<=[,;:،])\s+')
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences at script-aware boundaries.
+
+    Args:
+        text: Text in any of the supported scripts
+
+    Returns:
+        List of non-empty, stripped sentences in order
+    """
+    if not text:
+        return []
+    return [part.strip() for part in _SENTENCE_BOUNDARY.split(text) if part and part.strip()]
+
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    """Break an over-long sentence at clause boundaries, then at whitespace"""
+    if len(sentence) <= max_chars:
+        return [sentence]
+
+    pieces = []
+    for clause in _CLAUSE_BOUNDARY.split(sentence):
+        while len(clause) > max_chars:
+            cut = clause.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            pieces.append(clause[:cut].strip())
+            clause = clause[cut:].strip()
+        if clause:
+            pieces.append(clause)
+    return _pack(pieces, max_chars)
+
+
+def _pack(pieces: List[str], max_chars: int) -> List[str]:
+    """Greedily join consecutive pieces into chunks of at most max_chars"""
+    packed = []
+    current = ''
+    for piece in pieces:
+        candidate = f"{current} {piece}" if current else piece
+        if current and len(candidate) > max_chars:
+            packed.append(current)
+            current = piece
+        else:
+            current = candidate
+    if current:
+        packed.append(current)
+    return packed
+
+
+def segment_for_speech(text: str, max_chars: int, first_max_chars: int = None) -> List[str]:
+    """
+    Split text into speech segments for progressive synthesis.
+
+    The first segment is kept short (a single sentence, at most
+    first_max_chars) so playback can start quickly; later sentences are
+    packed together up to max_chars to limit the number of provider calls.
+
+    Args:
+        text: Text to segment
+        max_chars: Maximum characters per segment
+        first_max_chars: Maximum characters for the first segment
+
+    Returns:
+        List of segments in playback order
+    """
+    max_chars = max(1, max_chars)
+    first_max_chars = max(1, min(first_max_chars or max_chars, max_chars))
+
+    sentences = split_sentences(text)
+    if not sentences:
+        return []
+
+    first_pieces = _split_long(sentences[0], first_max_chars)
+    rest = first_pieces[1:]
+    for sentence in sentences[1:]:
+        rest.extend(_split_long(sentence, max_chars))
+
+    return [first_pieces[0]] + _pack(rest, max_chars)
@@ -1,18 +1,41 @@
+import hashlib
 import uuid
-from typing import Optional
+from typing import Dict, List, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from config import Config
+from utils.lru_cache import LRUCache
 
 
 class TranslatorService:
-    """Lightweight Azure Translator wrapper."""
+    """
+    Lightweight Azure Translator wrapper.
+
+    All instances share one keep-alive connection pool and one bounded
+    translation cache keyed on (text hash, target language), so LLMService
+    and the chat routes reuse each other's translations.
+    """
+
+    # Azure Translator request limits
+    MAX_TEXTS_PER_REQUEST = 100
+    MAX_CHARS_PER_REQUEST = 40000
+
+    _session: Optional[requests.Session] = None
+    _cache = LRUCache(Config.TRANSLATION_CACHE_SIZE)
 
     def __init__(self):
         self.key = Config.AZURE_TRANSLATOR_KEY
         self.endpoint = (Config.AZURE_TRANSLATOR_ENDPOINT or "https://api.cognitive.microsofttranslator.com").rstrip("/")
         self.region = Config.AZURE_TRANSLATOR_REGION or "eastus"
+        if TranslatorService._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=Config.TRANSLATOR_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            TranslatorService._session = session
+        self.session = TranslatorService._session
 
     def _normalize_language_code(self, language: Optional[str]) -> str:
         if not language:
@@ -29,16 +52,68 @@ class TranslatorService:
             return lang.split("-")[0]
         return lang
 
+    @staticmethod
+    def _cache_key(text: str, translator_code: str):
+        return (hashlib.sha1(text.encode("utf-8")).hexdigest(), translator_code)
+
+    @classmethod
+    def cache_stats(cls) -> Dict:
+        return cls._cache.stats()
+
     def translate(self, text: str, target_language: Optional[str]) -> str:
         if not text or not target_language:
             return text
-        if not self.key:
-            return text
+        return self.translate_batch([text], target_language)[0]
+
+    def translate_batch(self, texts: List[str], target_language: Optional[str]) -> List[str]:
+        """
+        Translate many texts with as few requests as possible.
+
+        Cached translations are served locally; the rest are sent together
+        (split only to stay within the API's per-request limits). Texts that
+        fail to translate are returned unchanged.
+        """
+        if not texts or not target_language or not self.key:
+            return list(texts)
 
         translator_code = self._normalize_language_code(target_language)
         if translator_code in ("en", "english"):
-            return text
+            return list(texts)
+
+        results = list(texts)
+        misses: Dict[str, List[int]] = {}
+        for index, text in enumerate(texts):
+            if not text:
+                continue
+            cached = self._cache.get(self._cache_key(text, translator_code))
+            if cached is not None:
+                results[index] = cached
+            else:
+                misses.setdefault(text, []).append(index)
+
+        pending = list(misses)
+        for batch in self._batches(pending):
+            translated = self._request(batch, translator_code, target_language)
+            for source, target in zip(batch, translated):
+                if target is None:
+                    continue
+                self._cache.set(self._cache_key(source, translator_code), target)
+                for index in misses[source]:
+                    results[index] = target
+        return results
+
+    def _batches(self, texts: List[str]):
+        batch, chars = [], 0
+        for text in texts:
+            if batch and (len(batch) >= self.MAX_TEXTS_PER_REQUEST or chars + len(text) > self.MAX_CHARS_PER_REQUEST):
+                yield batch
+                batch, chars = [], 0
+            batch.append(text)
+            chars += len(text)
+        if batch:
+            yield batch
 
+    def _request(self, texts: List[str], translator_code: str, target_language: str) -> List[Optional[str]]:
         params = {
             "api-version": "3.0",
             "to": translator_code,
@@ -49,9 +124,9 @@ class TranslatorService:
             "Content-Type": "application/json",
             "X-ClientTraceId": str(uuid.uuid4()),
         }
-        body = [{"text": text}]
+        body = [{"text": text} for text in texts]
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.endpoint}/translate",
                 params=params,
                 headers=headers,
@@ -60,9 +135,7 @@ class TranslatorService:
             )
             response.raise_for_status()
             data = response.json()
-            return data[0]["translations"][0]["text"]
+            return [item["translations"][0]["text"] for item in data]
         except Exception as exc:  # noqa: BLE001
-            print(f"TranslatorService failed ({target_language}): {exc}")
-            return text
-
-
+            print(f"TranslatorService failed ({target_language}, {len(texts)} text(s)): {exc}")
+            return [None] * len(texts)
@@ -1,14 +1,15 @@
 import os
+import json
+import time
 import uuid
-from typing import Optional
+import hashlib
+import threading
+import unicodedata
+from collections import deque
+from typing import Optional, Dict, Iterator, Tuple
 
 try:
-    from azure.cognitiveservices.speech import (
-        SpeechConfig,
-        SpeechSynthesizer,
-        AudioConfig,
-        ResultReason
-    )
+    from azure.cognitiveservices.speech import SpeechConfig, SpeechSynthesisOutputFormat
     AZURE_TTS_AVAILABLE = True
 except ImportError:
     AZURE_TTS_AVAILABLE = False
@@ -30,6 +31,30 @@ except ImportError:
     print("WARNING: gTTS not available. Final fallback TTS will not work.")
 
 from config import Config
+from utils.background import get_executor
+from utils.circuit_breaker import CircuitBreaker
+from utils.speech_pool import AzureSynthesizerPool, PoolTimeout
+from utils.text_segmenter import segment_for_speech
+from utils.audio_join import clean_mp3_segment, join_audio_segments
+
+# Compressed output formats: file extension and MIME type per format
+AUDIO_FORMATS = {
+    "mp3": {"extension": "mp3", "mime_type": "audio/mpeg"},
+    "opus": {"extension": "ogg", "mime_type": "audio/ogg"},
+}
+
+# Azure MP3 output formats by bitrate (kbps). Azure's Ogg/Opus formats have a
+# fixed bitrate, so only the sample rate is chosen for Opus.
+AZURE_MP3_FORMATS = {
+    32: "Audio16Khz32KBitRateMonoMp3",
+    48: "Audio24Khz48KBitRateMonoMp3",
+    64: "Audio16Khz64KBitRateMonoMp3",
+    96: "Audio24Khz96KBitRateMonoMp3",
+    128: "Audio16Khz128KBitRateMonoMp3",
+    160: "Audio24Khz160KBitRateMonoMp3",
+    192: "Audio48Khz192KBitRateMonoMp3",
+}
+AZURE_OPUS_FORMAT = "Ogg24Khz16BitMonoOpus"
 
 
 class TTSService:
@@ -85,13 +110,48 @@ class TTSService:
         "as": "as",  # Assamese
     }
 
+    # In-flight syntheses shared by all instances: filename -> Event
+    _inflight: Dict[str, threading.Event] = {}
+    _inflight_lock = threading.Lock()
+
+    # Circuit breakers shared by all instances, one per provider
+    _breakers: Dict[str, CircuitBreaker] = {
+        provider: CircuitBreaker(
+            f"tts:{provider}",
+            failure_threshold=Config.TTS_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=Config.TTS_BREAKER_RESET_SECONDS,
+            window=Config.TTS_BREAKER_WINDOW,
+            error_rate_threshold=Config.TTS_BREAKER_ERROR_RATE,
+        )
+        for provider in ("azure", "openai", "gtts")
+    }
+
+    # Audio cache counters shared by all instances
+    _cache_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+    _stats_lock = threading.Lock()
+
     def __init__(self) -> None:
         self.audio_folder = Config.AUDIO_FOLDER
         os.makedirs(self.audio_folder, exist_ok=True)
+        self.pending_folder = os.path.join(self.audio_folder, "pending")
+        os.makedirs(self.pending_folder, exist_ok=True)
+        # Largest text sent to a provider in one call; longer text is segmented
         self.max_chars = getattr(Config, "TTS_MAX_CHARACTERS", 4000)
+        self.mode = Config.TTS_MODE
+        # Sentence-segmented synthesis, streamed progressively to the client
+        self.streaming = Config.TTS_STREAMING
+        self.output_format = Config.TTS_AUDIO_FORMAT if Config.TTS_AUDIO_FORMAT in AUDIO_FORMATS else "mp3"
+        if self.streaming and self.output_format != "mp3":
+            # Only MP3 frames can be joined into one progressively played stream
+            print(f"WARNING: TTS_STREAMING requires mp3 output, ignoring TTS_AUDIO_FORMAT={self.output_format}")
+            self.output_format = "mp3"
+        self.bitrate_kbps = Config.TTS_AUDIO_BITRATE_KBPS
+        self.audio_extension = AUDIO_FORMATS[self.output_format]["extension"]
+        self.mime_type = AUDIO_FORMATS[self.output_format]["mime_type"]
         
         # Initialize Azure Speech
         self.azure_speech_config = None
+        self.azure_pool = None
         if AZURE_TTS_AVAILABLE:
             try:
                 speech_key = Config.AZURE_SPEECH_KEY
@@ -102,6 +162,14 @@ class TTSService:
                     self.azure_speech_config = None
                 else:
                     self.azure_speech_config = SpeechConfig(subscription=speech_key, region=speech_region)
+                    self.azure_speech_config.set_speech_synthesis_output_format(
+                        getattr(SpeechSynthesisOutputFormat, self._azure_output_format())
+                    )
+                    self.azure_pool = AzureSynthesizerPool(
+                        self.azure_speech_config,
+                        size_per_voice=Config.AZURE_TTS_POOL_SIZE,
+                        acquire_timeout=Config.AZURE_TTS_POOL_TIMEOUT,
+                    )
                     print(f"Azure TTS initialized successfully with region: {speech_region}")
             except Exception as e:
                 print(f"ERROR: Azure TTS initialization failed: {e}")
@@ -124,6 +192,22 @@ class TTSService:
         if not GTTS_AVAILABLE:
             print("WARNING: gTTS not installed. Some languages may not have audio support.")
 
+    def _azure_output_format(self) -> str:
+        """Azure output format name closest to the configured format and bitrate"""
+        if self.output_format == "opus":
+            return AZURE_OPUS_FORMAT
+        bitrate = min(AZURE_MP3_FORMATS, key=lambda rate: abs(rate - self.bitrate_kbps))
+        return AZURE_MP3_FORMATS[bitrate]
+
+    @staticmethod
+    def mime_type_for(filename: str) -> str:
+        """MIME type of a stored audio file, from its extension"""
+        extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+        for audio_format in AUDIO_FORMATS.values():
+            if audio_format["extension"] == extension:
+                return audio_format["mime_type"]
+        return "application/octet-stream"
+
     def _is_azure_supported(self, language: str) -> bool:
         """Check if language is supported by Azure TTS"""
         normalized_lang = language
@@ -160,31 +244,33 @@ class TTSService:
         
         return voice_name
 
+    def prewarm(self, languages=None) -> None:
+        """Open pooled Azure connections for the configured languages' voices"""
+        if not self.azure_pool:
+            return
+        languages = languages if languages is not None else Config.AZURE_TTS_PREWARM_LANGUAGES
+        voices = []
+        for language in languages:
+            if self._is_azure_supported(language):
+                voice_name = self._get_azure_voice(language)
+                if voice_name and voice_name not in voices:
+                    voices.append(voice_name)
+        self.azure_pool.prewarm(voices)
+
     def _synthesize_with_azure(self, text: str, voice_name: str, file_path: str) -> bool:
-        """Synthesize audio using Azure TTS"""
+        """Synthesize audio using a pooled Azure synthesizer (in-memory result)"""
+        if not self.azure_pool:
+            return False
         try:
-            speech_config = SpeechConfig(subscription=Config.AZURE_SPEECH_KEY, region=Config.AZURE_SPEECH_REGION)
-            speech_config.speech_synthesis_voice_name = voice_name
-            audio_config = AudioConfig(filename=file_path)
-            synthesizer = SpeechSynthesizer(speech_config=speech_config, audio_config=audio_config)
-
-            result = synthesizer.speak_text_async(text).get()
-            
-            if hasattr(result, 'reason'):
-                if result.reason == ResultReason.SynthesizingAudioCompleted:
-                    print(f"Audio generated successfully using Azure voice: {voice_name}")
-                    return True
-                elif result.reason == ResultReason.Canceled:
-                    cancellation_details = result.cancellation_details
-                    error_msg = f"Azure TTS canceled: {cancellation_details.reason}"
-                    if hasattr(cancellation_details, 'error_details') and cancellation_details.error_details:
-                        error_msg += f" - {cancellation_details.error_details}"
-                    print(f"ERROR: {error_msg}")
-                else:
-                    print(f"ERROR: Azure TTS failed with reason: {result.reason}")
-            else:
-                print(f"WARNING: Unexpected Azure TTS result format")
+            audio_data = self.azure_pool.synthesize(text, voice_name)
+            if not audio_data:
                 return False
+            with open(file_path, "wb") as f:
+                f.write(audio_data)
+            print(f"Audio generated successfully using Azure voice: {voice_name}")
+            return True
+        except PoolTimeout:
+            raise
         except Exception as e:
             print(f"ERROR: Azure TTS synthesis exception: {e}")
             import traceback
@@ -203,11 +289,12 @@ class TTSService:
             
             print(f"Using OpenAI TTS for language: {base_lang} (voice: {voice})")
             
-            # OpenAI TTS API call
+            # OpenAI TTS API call ("opus" is returned in an Ogg container)
             response = self.openai_client.audio.speech.create(
                 model="tts-1",
                 voice=voice,
-                input=text
+                input=text,
+                response_format=self.output_format
             )
             
             # Save audio to file
@@ -240,22 +327,21 @@ class TTSService:
             # Generate audio with gTTS
             tts = gTTS(text=text, lang=gtts_lang, slow=False)
             
-            # Save to temporary file first
-            temp_path = file_path.replace('.mp3', '_temp.mp3')
+            # gTTS always produces MP3; save to a temporary file first
+            temp_path = f"{os.path.splitext(file_path)[0]}_temp.mp3"
             tts.save(temp_path)
             
-            # Rename to final path
-            if file_path.endswith('.mp3'):
-                os.rename(temp_path, file_path)
+            if self.output_format == "mp3":
+                os.replace(temp_path, file_path)
             else:
-                # Convert if needed
+                # Transcode to the configured format (requires ffmpeg)
                 try:
                     from pydub import AudioSegment
                     audio = AudioSegment.from_mp3(temp_path)
-                    audio.export(file_path, format="mp3")
-                    os.remove(temp_path)
-                except ImportError:
-                    os.rename(temp_path, file_path)
+                    audio.export(file_path, format="ogg", codec="libopus", bitrate=f"{self.bitrate_kbps}k")
+                finally:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
             
             print(f"Audio generated successfully using gTTS for language: {gtts_lang}")
             return True
@@ -265,6 +351,79 @@ class TTSService:
             traceback.print_exc()
             return False
 
+    def _prepare_text(self, text: str) -> str:
+        # Normalize so that trivially different strings share one audio file.
+        # Line breaks are kept since they end sentences for segmentation.
+        # There is no length cap here: long MP3 text is synthesized in segments.
+        safe_text = unicodedata.normalize("NFC", text or "")
+        safe_text = "\n".join(" ".join(line.split()) for line in safe_text.splitlines())
+        return safe_text.strip()
+
+    def _provider_voice_key(self, provider: str, language: str) -> Optional[str]:
+        """Identify the voice a provider uses for a language, for cache keys"""
+        base_lang = language.split('-')[0] if '-' in language else language
+        if provider == "azure":
+            voice_name = self._get_azure_voice(language)
+            return f"azure:{voice_name}" if voice_name else None
+        if provider == "openai":
+            return f"openai:{self.OPENAI_VOICE_MAP.get(base_lang, 'alloy')}"
+        return f"gtts:{self.NON_AZURE_LANGUAGES.get(language) or self.GTTS_LANG_MAP.get(base_lang, base_lang)}"
+
+    def _voice_key(self, language: str) -> str:
+        """
+        The voice a language is routed to when its preferred provider works.
+        Only audio from this voice is stored under the language's filename;
+        fallback output gets a filename keyed on the voice that produced it.
+        """
+        for provider in self._provider_chain(language):
+            if self._provider_available(provider):
+                voice_key = self._provider_voice_key(provider, language)
+                if voice_key:
+                    return voice_key
+        return "none"
+
+    def _stored_fallback(self, text: str, language: str) -> Optional[str]:
+        """
+        Audio a fallback voice already stored for text, reused while the
+        preferred provider's circuit is not closed (once it closes, the
+        preferred voice is synthesized again and stored under its own name)
+        """
+        chain = [provider for provider in self._provider_chain(language) if self._provider_available(provider)]
+        if not chain or TTSService._breakers[chain[0]].state == CircuitBreaker.CLOSED:
+            return None
+        voice_keys = [self._provider_voice_key(provider, language) for provider in chain[1:]]
+        if self._provider_available("azure") and not language.startswith("en"):
+            voice_keys.append(self._provider_voice_key("azure", "en-IN"))  # last resort voice
+        primary_key = self._voice_key(language)
+        for voice_key in voice_keys:
+            if not voice_key or voice_key == primary_key:
+                continue
+            filename = self.audio_filename_for(text, language, voice_key)
+            if os.path.exists(os.path.join(self.audio_folder, filename)):
+                return filename
+        return None
+
+    def audio_filename_for(self, text: str, language: str, voice_key: Optional[str] = None) -> str:
+        """Content-addressed filename: hash of (normalized text, voice, format)"""
+        safe_text = self._prepare_text(text)
+        audio_format = f"{self.output_format}@{self.bitrate_kbps}k"
+        key = "\x1f".join([safe_text, voice_key or self._voice_key(language), audio_format])
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        return f"{digest}.{self.audio_extension}"
+
+    @classmethod
+    def _count(cls, counter: str) -> None:
+        with cls._stats_lock:
+            cls._cache_stats[counter] += 1
+
+    @classmethod
+    def cache_stats(cls) -> Dict:
+        with cls._stats_lock:
+            stats = dict(cls._cache_stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
     def text_to_speech(
         self,
         text: str,
@@ -274,74 +433,434 @@ class TTSService:
         """
         Generate audio file using: Azure (primary) -> OpenAI TTS (secondary) -> gTTS (last resort)
         
+        Audio is content-addressed, so repeated text in the same voice is served
+        from the existing file without calling any provider. Audio from a
+        fallback provider or voice is stored under its own filename, so it is
+        never served (or cached by clients) as the preferred voice's audio.
+        While the preferred provider's circuit is open, that fallback audio is
+        reused instead of being synthesized again.
+        
         Args:
             text: Text to convert to speech
             language: Language code (e.g., 'en-IN', 'pa-IN', 'as-IN', etc.)
-            session_id: Optional session identifier for filename
+            session_id: Optional session identifier (unused; audio is shared across sessions)
         
         Returns:
             Audio filename if successful, None otherwise
         """
-        safe_text = (text or "").strip()
+        safe_text = self._prepare_text(text)
+        if not safe_text:
+            return None
+
+        filename = self.audio_filename_for(safe_text, language)
+        if os.path.exists(os.path.join(self.audio_folder, filename)):
+            self._count("hits")
+            return filename
+
+        self._count("misses")
+        return self._ensure(filename, lambda: {"text": safe_text, "language": language})
+
+    def defer_text_to_speech(
+        self,
+        text: str,
+        language: str = "en-IN",
+        session_id: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Reserve an audio filename without synthesizing it yet.
+
+        The text is recorded as a pending job; `ensure_audio` synthesizes it the
+        first time the file is requested. In "speculative" mode the job is also
+        queued on a single low-priority worker.
+
+        Returns:
+            Audio filename to hand to the client, None if there is nothing to say
+        """
+        safe_text = self._prepare_text(text)
         if not safe_text:
             return None
 
-        if len(safe_text) > self.max_chars:
-            safe_text = safe_text[: self.max_chars]
+        filename = self.audio_filename_for(safe_text, language)
+        if os.path.exists(os.path.join(self.audio_folder, filename)) or self.is_pending(filename):
+            self._count("hits")
+            return filename
+
+        self._count("misses")
+        # Written aside and renamed into place, so a reader in another worker
+        # never parses a half-written job
+        pending_path = self._pending_path(filename)
+        temp_path = f"{pending_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"text": safe_text, "language": language}, f, ensure_ascii=False)
+        os.replace(temp_path, pending_path)
+
+        if self.mode == "speculative":
+            get_executor("speculative-tts", 1, Config.TTS_SPECULATIVE_QUEUE_SIZE).submit_nowait(
+                self.ensure_audio, filename
+            )
+        return filename
+
+    def _pending_path(self, filename: str) -> str:
+        return os.path.join(self.pending_folder, f"{filename}.json")
+
+    def is_pending(self, filename: str) -> bool:
+        return os.path.exists(self._pending_path(filename))
+
+    def _load_pending(self, filename: str) -> Optional[Dict]:
+        try:
+            with open(self._pending_path(filename), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"ERROR: Unreadable pending TTS job {filename}: {e}")
+            return None
+
+    def ensure_audio(self, filename: str) -> Optional[str]:
+        """
+        Make sure a (possibly deferred) audio file exists on disk.
+
+        Concurrent callers for the same filename wait on a single synthesis.
 
-        filename_prefix = session_id or "audio"
-        filename = f"{filename_prefix}_{uuid.uuid4().hex[:8]}.mp3"
+        Returns:
+            `filename` if it is available; the filename of fallback audio if
+            only a fallback provider or voice could synthesize it (the job
+            stays pending, so a later request retries the preferred voice);
+            None if no audio could be produced
+        """
+        return self._ensure(filename, lambda: self._load_pending(filename))
+
+    def _ensure(self, filename: str, load_job) -> Optional[str]:
+        """Single-flight synthesis of `filename` from the job returned by load_job()"""
         file_path = os.path.join(self.audio_folder, filename)
+        if os.path.exists(file_path):
+            return filename
 
-        # Strategy 1: Azure TTS for supported languages
-        if self._is_azure_supported(language):
-            if AZURE_TTS_AVAILABLE and self.azure_speech_config:
-                voice_name = self._get_azure_voice(language)
-                if voice_name:
-                    if self._synthesize_with_azure(safe_text, voice_name, file_path):
-                        return filename
-                    else:
-                        print(f"Azure TTS failed for {language}, trying OpenAI TTS fallback")
-                        # Fallback to OpenAI if Azure fails
-                        if self._synthesize_with_openai(safe_text, language, file_path):
-                            return filename
-                        # Last resort: gTTS
-                        if self._synthesize_with_gtts(safe_text, language, file_path):
-                            return filename
-
-        # Strategy 2: Non-Azure languages (pa-IN, or-IN, bn-IN, as-IN)
-        elif self._is_non_azure_language(language):
-            print(f"Language {language} not supported by Azure, using OpenAI TTS")
-            # Try OpenAI TTS first
-            if self._synthesize_with_openai(safe_text, language, file_path):
+        is_owner, done = self._claim(filename)
+        if not is_owner:
+            done.wait(timeout=Config.TTS_PENDING_WAIT_SECONDS)
+            if os.path.exists(file_path):
                 return filename
-            # Fallback to gTTS
-            print(f"OpenAI TTS failed for {language}, trying gTTS fallback")
-            if self._synthesize_with_gtts(safe_text, language, file_path):
+            stored = getattr(done, "stored_filename", None)
+            if stored and os.path.exists(os.path.join(self.audio_folder, stored)):
+                return stored
+            return None
+
+        try:
+            if os.path.exists(file_path):
+                # Finished by another worker process in the meantime
                 return filename
+            job = load_job()
+            if not job:
+                return None
+            fallback = self._stored_fallback(job.get("text", ""), job.get("language", "en-IN"))
+            if fallback:
+                # Preferred provider still down: reuse the fallback audio, keep the job
+                done.stored_filename = fallback
+                return fallback
+            stored = self._synthesize_file(job.get("text", ""), job.get("language", "en-IN"), filename)
+            done.stored_filename = stored
+            if stored == filename:
+                try:
+                    os.remove(self._pending_path(filename))
+                except OSError:
+                    pass
+            return stored
+        finally:
+            self._release(filename, done)
+
+    @classmethod
+    def _claim(cls, filename: str):
+        """Become the single synthesizer of filename, or get the Event to wait on"""
+        with cls._inflight_lock:
+            done = cls._inflight.get(filename)
+            if done is not None:
+                return False, done
+            done = threading.Event()
+            cls._inflight[filename] = done
+            return True, done
+
+    @classmethod
+    def _is_inflight(cls, filename: str) -> bool:
+        with cls._inflight_lock:
+            return filename in cls._inflight
+
+    @classmethod
+    def _release(cls, filename: str, done: threading.Event) -> None:
+        with cls._inflight_lock:
+            cls._inflight.pop(filename, None)
+        done.set()
+
+    def stream_audio(self, filename: str) -> Optional[Iterator[bytes]]:
+        """
+        Stream a pending audio file while it is being synthesized.
+
+        Segments are synthesized concurrently and yielded in order as soon as
+        each is ready, so playback starts after the first sentence. The full
+        file is stored once the stream completes. A client arriving while
+        another is already streaming or synthesizing the same file gets None,
+        and waits for it through ensure_audio instead.
+
+        Returns:
+            Iterator of audio bytes, or None if streaming does not apply
+        """
+        if not self.streaming or self._is_inflight(filename):
+            return None
+        # Loaded before the response starts: a job the janitor has expired
+        # (or another worker has just stored) is answered by the caller with
+        # the stored file or a 404, not with an empty 200 stream
+        job = self._load_pending(filename)
+        if not job:
+            return None
+        if self._stored_fallback(job.get("text", ""), job.get("language", "en-IN")):
+            # ensure_audio hands out the stored fallback audio instead
+            return None
+        return self._stream_and_store(filename, job)
+
+    def _iter_file(self, filename: str) -> Iterator[bytes]:
+        with open(os.path.join(self.audio_folder, filename), "rb") as f:
+            for block in iter(lambda: f.read(64 * 1024), b""):
+                yield block
+
+    def _stream_and_store(self, filename: str, job: Dict) -> Iterator[bytes]:
+        # Claimed inside the generator so an unconsumed response holds no claim
+        file_path = os.path.join(self.audio_folder, filename)
+        is_owner, done = self._claim(filename)
+        if not is_owner:
+            # Lost a race with another request after stream_audio's check: wait
+            # for (or take over) its synthesis and stream the stored file
+            available = self.ensure_audio(filename)
+            if not available:
+                # Headers are already sent; fail the response rather than
+                # ending it as an empty, successful audio file
+                raise RuntimeError(f"Audio {filename} could not be synthesized")
+            yield from self._iter_file(available)
+            return
+
+        root, ext = os.path.splitext(file_path)
+        temp_path = f"{root}.{uuid.uuid4().hex[:8]}.part{ext}"
+        completed = False
+        try:
+            if os.path.exists(file_path):
+                # Stored by another worker process since the job was loaded
+                yield from self._iter_file(filename)
+                return
+            segments = self._iter_segment_audio(
+                job.get("text", ""),
+                job.get("language", "en-IN"),
+                max_chars=min(Config.TTS_SEGMENT_MAX_CHARS, self.max_chars),
+                first_max_chars=Config.TTS_FIRST_SEGMENT_MAX_CHARS,
+            )
+            primary_key = self._voice_key(job.get("language", "en-IN"))
+            degraded = False
+            with open(temp_path, "wb") as out:
+                for index, (audio, voice_key) in enumerate(segments):
+                    degraded = degraded or voice_key != primary_key
+                    if self.output_format == "mp3":
+                        # Drop per-segment tags/headers so the frames join cleanly
+                        audio = clean_mp3_segment(audio, keep_id3=(index == 0))
+                    out.write(audio)
+                    out.flush()
+                    yield audio
+            if degraded:
+                # Streamed with no-store; keep the job so a later request
+                # stores the preferred voice's audio under this filename
+                print(f"TTS stream for {filename} used a fallback voice, not storing it")
+                return
+            os.replace(temp_path, file_path)
+            completed = True
+            try:
+                os.remove(self._pending_path(filename))
+            except OSError:
+                pass
+        finally:
+            if not completed and os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            self._release(filename, done)
+
+    def _iter_segment_audio(self, text: str, language: str, max_chars: int, first_max_chars: int) -> Iterator[bytes]:
+        """
+        Synthesize sentence-aligned segments with bounded parallelism, yielding
+        (audio, voice key) in playback order. Raises if a segment cannot be
+        synthesized.
+        """
+        segments = segment_for_speech(text, max_chars=max_chars, first_max_chars=first_max_chars)
+        executor = get_executor(
+            "tts-segments", Config.TTS_SEGMENT_CONCURRENCY * 2, Config.TTS_SEGMENT_CONCURRENCY * 8
+        )
+        window = max(1, Config.TTS_SEGMENT_CONCURRENCY)
+
+        remaining = iter(segments)
+        in_flight = deque()
+        try:
+            for segment in remaining:
+                in_flight.append(executor.submit(self._synthesize_segment, segment, language))
+                if len(in_flight) >= window:
+                    break
+            while in_flight:
+                result = in_flight.popleft().result()
+                next_segment = next(remaining, None)
+                if next_segment is not None:
+                    in_flight.append(executor.submit(self._synthesize_segment, next_segment, language))
+                if not result:
+                    raise RuntimeError(f"TTS segment synthesis failed for language: {language}")
+                yield result
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def _synthesize_segment(self, text: str, language: str) -> Optional[Tuple[bytes, str]]:
+        """Synthesize one segment through the provider chain; returns (bytes, voice key)"""
+        temp_path = os.path.join(self.pending_folder, f"segment_{uuid.uuid4().hex}.{self.audio_extension}")
+        try:
+            voice_key = self._synthesize_with_fallbacks(text, language, temp_path)
+            if not voice_key:
+                return None
+            with open(temp_path, "rb") as f:
+                return f.read(), voice_key
+        finally:
+            if os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def _synthesize_file(self, text: str, language: str, filename: str) -> Optional[str]:
+        """
+        Synthesize text into the audio folder, writing through a temporary
+        file so that readers never see a partially written audio file.
 
-        # Strategy 3: Unknown language - try all methods
+        Args:
+            text: Prepared text, as hashed into filename
+            language: Language code
+            filename: Filename the caller derived from text with the preferred voice
+
+        Returns:
+            The stored filename: `filename` when the preferred voice produced
+            the audio, otherwise a filename keyed on the voice(s) that did;
+            None if synthesis failed
+        """
+        primary_key = self._voice_key(language)
+        temp_path = os.path.join(self.audio_folder, f"{uuid.uuid4().hex}.part.{self.audio_extension}")
+        spoken = text
+        try:
+            if len(spoken) > self.max_chars and self.output_format != "mp3":
+                # Ogg/Opus segments can't be joined without remuxing (each has its
+                # own serial numbers and granule positions), so synthesize one
+                # provider-sized piece, cut at a word boundary. The file is
+                # still named after the full text the caller hashed.
+                print(f"WARNING: {len(spoken)} characters exceed TTS_MAX_CHARACTERS for {self.output_format}, truncating")
+                spoken = spoken[:self.max_chars].rsplit(" ", 1)[0] or spoken[:self.max_chars]
+            if len(spoken) > self.max_chars:
+                # Longer than one provider call allows: synthesize provider-sized
+                # MP3 segments concurrently and join their frames without re-encoding
+                parts = list(self._iter_segment_audio(
+                    spoken, language, max_chars=self.max_chars, first_max_chars=self.max_chars
+                ))
+                voice_keys = sorted({voice_key for _, voice_key in parts})
+                voice_key = voice_keys[0] if len(voice_keys) == 1 else "mixed:" + ",".join(voice_keys)
+                with open(temp_path, "wb") as out:
+                    out.write(join_audio_segments([audio for audio, _ in parts], self.output_format))
+            else:
+                voice_key = self._synthesize_with_fallbacks(spoken, language, temp_path)
+                if not voice_key:
+                    return None
+
+            if voice_key != primary_key:
+                print(f"TTS for {language} fell back to {voice_key}, storing it under its own filename")
+                filename = self.audio_filename_for(text, language, voice_key)
+            file_path = os.path.join(self.audio_folder, filename)
+            if not os.path.exists(file_path):
+                os.replace(temp_path, file_path)
+            return filename
+        except Exception as e:
+            print(f"ERROR: Segmented TTS synthesis failed: {e}")
+            return None
+        finally:
+            if os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def _provider_chain(self, language: str):
+        """Providers to try for a language, in preference order"""
+        if self._is_azure_supported(language):
+            return ["azure", "openai", "gtts"]
+        if self._is_non_azure_language(language):
+            return ["openai", "gtts"]
+        # Unknown language - try all methods
+        return ["azure", "openai", "gtts"]
+
+    def _provider_available(self, provider: str) -> bool:
+        if provider == "azure":
+            return AZURE_TTS_AVAILABLE and self.azure_speech_config is not None
+        if provider == "openai":
+            return OPENAI_TTS_AVAILABLE and self.openai_client is not None
+        return GTTS_AVAILABLE
+
+    def _call_provider(self, provider: str, text: str, language: str, file_path: str) -> bool:
+        """Call one provider through its circuit breaker, recording the outcome"""
+        if provider == "azure":
+            voice_name = self._get_azure_voice(language)
+            if not voice_name:
+                return False
+            synthesize = lambda: self._synthesize_with_azure(text, voice_name, file_path)
+        elif provider == "openai":
+            synthesize = lambda: self._synthesize_with_openai(text, language, file_path)
         else:
-            print(f"Unknown language {language}, trying Azure first")
-            if AZURE_TTS_AVAILABLE and self.azure_speech_config:
-                voice_name = self._get_azure_voice(language)
-                if voice_name and self._synthesize_with_azure(safe_text, voice_name, file_path):
-                    return filename
-            
-            # Try OpenAI
-            if self._synthesize_with_openai(safe_text, language, file_path):
-                return filename
-            
-            # Try gTTS
-            if self._synthesize_with_gtts(safe_text, language, file_path):
-                return filename
+            synthesize = lambda: self._synthesize_with_gtts(text, language, file_path)
+
+        breaker = TTSService._breakers[provider]
+        if not breaker.allow_request():
+            print(f"Skipping {provider} TTS: circuit {breaker.state}")
+            return False
+
+        started = time.monotonic()
+        try:
+            succeeded = synthesize()
+        except PoolTimeout as e:
+            # Our own pool is saturated and Azure was never called, so the
+            # breaker records nothing and the chain moves on
+            print(f"Skipping {provider} TTS: {e}")
+            breaker.release()
+            return False
+        except Exception:
+            breaker.record_failure(time.monotonic() - started)
+            raise
+        if succeeded:
+            breaker.record_success(time.monotonic() - started)
+        else:
+            breaker.record_failure(time.monotonic() - started)
+        return succeeded
+
+    @classmethod
+    def provider_stats(cls) -> Dict[str, Dict]:
+        return {provider: breaker.stats() for provider, breaker in cls._breakers.items()}
+
+    def _synthesize_with_fallbacks(self, safe_text: str, language: str, file_path: str) -> Optional[str]:
+        """
+        Run the provider chain: Azure (primary) -> OpenAI TTS (secondary) -> gTTS (last resort).
+        Providers whose circuit is open are skipped without being called.
+
+        Returns:
+            Voice key of the provider/voice that produced the audio, None if all failed
+        """
+        for provider in self._provider_chain(language):
+            if not self._provider_available(provider):
+                continue
+            if self._call_provider(provider, safe_text, language, file_path):
+                return self._provider_voice_key(provider, language)
+            print(f"{provider} TTS failed for {language}, trying next provider")
 
         # Last resort: Azure English voice
-        if AZURE_TTS_AVAILABLE and self.azure_speech_config:
+        if self._provider_available("azure") and not language.startswith("en"):
             print(f"All methods failed for {language}, trying Azure English as last resort")
-            fallback_voice = self._get_azure_voice("en-IN")
-            if fallback_voice and self._synthesize_with_azure(safe_text, fallback_voice, file_path):
-                return filename
+            if self._call_provider("azure", safe_text, "en-IN", file_path):
+                return self._provider_voice_key("azure", "en-IN")
 
         print(f"ERROR: All TTS methods failed for language: {language}")
         return None
@@ -1,5 +1,8 @@
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
+import hashlib
+import threading
 import time
+import uuid
 
 from qdrant_client import QdrantClient
 from qdrant_client.models import (
@@ -10,18 +13,121 @@ from qdrant_client.models import (
     FieldCondition,
     MatchValue,
     PayloadSchemaType,
-    PointIdsList,
+    SearchRequest,
+    FilterSelector,
+    HasIdCondition,
+    HnswConfigDiff,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    SearchParams,
+    QuantizationSearchParams,
 )
 from qdrant_client.http.models import NamedVector
 
 from config import Config
 
+# Namespace for deterministic document and point ids (uuid5)
+ID_NAMESPACE = uuid.UUID("6f1d7c52-3c0e-4b8a-9a57-2f4e8d1b0c93")
+
+
+def document_id_for_hash(file_hash: str) -> str:
+    """Document id derived from the file's content hash, stable across retries"""
+    return str(uuid.uuid5(ID_NAMESPACE, f"document:{file_hash}"))
+
+
+def chunk_point_id(document_id: str, chunk_index: int, text: str) -> str:
+    """
+    Point id derived from (document_id, chunk_index, content hash), so
+    re-upserting the same chunk overwrites the point instead of adding one
+    """
+    content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return str(uuid.uuid5(ID_NAMESPACE, f"chunk:{document_id}:{chunk_index}:{content_hash}"))
+
+
+def build_quantization_config(mode: Optional[str] = None):
+    """
+    Quantization config for a collection
+
+    Args:
+        mode: 'none', 'scalar' (int8) or 'binary'; defaults to Config.QDRANT_QUANTIZATION
+
+    Returns:
+        A Qdrant quantization config, or None for no quantization
+    """
+    mode = (Config.QDRANT_QUANTIZATION if mode is None else mode or "none").lower()
+    if mode == "none":
+        return None
+    if mode == "scalar":
+        return ScalarQuantization(scalar=ScalarQuantizationConfig(
+            type=ScalarType.INT8,
+            quantile=Config.QDRANT_SCALAR_QUANTILE,
+            always_ram=Config.QDRANT_QUANTIZATION_ALWAYS_RAM,
+        ))
+    if mode == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(
+            always_ram=Config.QDRANT_QUANTIZATION_ALWAYS_RAM,
+        ))
+    raise ValueError(f"Unknown QDRANT_QUANTIZATION mode: {mode!r} (expected none, scalar or binary)")
+
+
+def collection_create_params(vector_size: int, quantization: Optional[str] = None) -> Dict:
+    """
+    Keyword arguments for client.create_collection: named vector "default"
+    (cosine), HNSW parameters, quantization and on-disk storage from Config
+    """
+    return {
+        "vectors_config": {
+            "default": VectorParams(
+                size=vector_size,
+                distance=Distance.COSINE,
+                on_disk=Config.QDRANT_VECTORS_ON_DISK,
+            )
+        },
+        "hnsw_config": HnswConfigDiff(
+            m=Config.QDRANT_HNSW_M,
+            ef_construct=Config.QDRANT_HNSW_EF_CONSTRUCT,
+            on_disk=Config.QDRANT_HNSW_ON_DISK,
+        ),
+        "quantization_config": build_quantization_config(quantization),
+        "on_disk_payload": Config.QDRANT_PAYLOAD_ON_DISK,
+    }
+
+
+def build_search_params(
+    quantization: Optional[str] = None,
+    rescore: Optional[bool] = None,
+    oversampling: Optional[float] = None,
+    hnsw_ef: Optional[int] = None,
+) -> Optional[SearchParams]:
+    """
+    Search-time parameters: HNSW ef and, for quantized collections, rescoring
+    with the original vectors over an oversampled candidate set
+
+    Returns:
+        SearchParams, or None to use the server defaults
+    """
+    mode = (Config.QDRANT_QUANTIZATION if quantization is None else quantization or "none").lower()
+    hnsw_ef = Config.QDRANT_HNSW_EF_SEARCH if hnsw_ef is None else hnsw_ef
+    quantization_params = None
+    if mode != "none":
+        quantization_params = QuantizationSearchParams(
+            rescore=Config.QDRANT_QUANTIZATION_RESCORE if rescore is None else rescore,
+            oversampling=Config.QDRANT_QUANTIZATION_OVERSAMPLING if oversampling is None else oversampling,
+        )
+    if not hnsw_ef and quantization_params is None:
+        return None
+    return SearchParams(hnsw_ef=hnsw_ef or None, quantization=quantization_params)
+
 
 class VectorStoreService:
     """Wrapper around Qdrant client for vector storage and retrieval."""
 
     _shared_client: Optional[QdrantClient] = None
     _checked_collections: set = set()
+    _bootstrap_lock = threading.Lock()
 
     def __init__(self) -> None:
         if not Config.QDRANT_URL:
@@ -40,60 +146,88 @@ class VectorStoreService:
         self.client = VectorStoreService._shared_client
         self.collection_name = Config.QDRANT_COLLECTION_NAME
         self.vector_size = Config.QDRANT_VECTOR_SIZE or 1536
+        self.search_params = build_search_params()
 
-    #  COLLECTION CREATION — uses vector name "default"
+    #  COLLECTION BOOTSTRAP — uses vector name "default"
     def create_collection_if_not_exists(self) -> None:
-        # Use collection name as key for checked collections
+        """
+        Make sure the collection exists, once per process.
+
+        After the first successful check this is a set lookup with no network
+        call. If the collection disappears later, operations notice through
+        their own not-found error (see _with_collection) and bootstrap again.
+        """
         if self.collection_name in VectorStoreService._checked_collections:
-            # Skip if we've already verified this collection exists
-            try:
-                collections = self.client.get_collections()
-                names = [c.name for c in collections.collections]
-                if self.collection_name in names:
-                    return
-                # Collection was deleted, remove from checked set
-                VectorStoreService._checked_collections.discard(self.collection_name)
-            except Exception:
-                # If we can't check, proceed to creation attempt
-                VectorStoreService._checked_collections.discard(self.collection_name)
+            return
+        with VectorStoreService._bootstrap_lock:
+            if self.collection_name in VectorStoreService._checked_collections:
+                return
+            self._bootstrap_collection()
+            VectorStoreService._checked_collections.add(self.collection_name)
 
+    def _bootstrap_collection(self) -> None:
         try:
-            collections = self.client.get_collections()
-            names = [c.name for c in collections.collections]
+            self.client.get_collection(self.collection_name)
+            print(f"✓ Collection '{self.collection_name}' already exists")
+            return
         except Exception as e:
-            print(f"Error getting collections: {e}")
-            raise
-
-        # CREATE COLLECTION ONLY IF IT DOES NOT EXIST
-        if self.collection_name not in names:
-            try:
-                # ALWAYS create collection with named vector "default"
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config={
-                        "default": VectorParams(
-                            size=self.vector_size,
-                            distance=Distance.COSINE,
-                        )
-                    }
-                )
-                print(f"✓ Created collection '{self.collection_name}' with vector_name='default' (size={self.vector_size}, distance=Cosine)")
-            except Exception as e:
-                print(f"✗ Error creating collection: {e}")
+            if not self._is_collection_missing(e):
+                print(f"Error getting collection: {e}")
                 raise
 
-            # Create payload indexes
-            try:
-                self.ensure_payload_index("document_id")
-                self.ensure_payload_index("file_hash")
-                print("✓ Payload indexes created")
-            except Exception as e:
-                print(f"⚠ Could not create payload indexes: {e}")
-        else:
-            print(f"✓ Collection '{self.collection_name}' already exists")
+        # CREATE COLLECTION ONLY IF IT DOES NOT EXIST
+        try:
+            # ALWAYS create collection with named vector "default"
+            self.client.create_collection(
+                collection_name=self.collection_name,
+                **collection_create_params(self.vector_size)
+            )
+            print(
+                f"✓ Created collection '{self.collection_name}' with vector_name='default' "
+                f"(size={self.vector_size}, distance=Cosine, quantization={Config.QDRANT_QUANTIZATION}, "
+                f"vectors_on_disk={Config.QDRANT_VECTORS_ON_DISK}, payload_on_disk={Config.QDRANT_PAYLOAD_ON_DISK})"
+            )
+        except Exception as e:
+            if "already exists" in str(e).lower():
+                # Another worker created it first
+                return
+            print(f"✗ Error creating collection: {e}")
+            raise
 
-        # Mark as checked
-        VectorStoreService._checked_collections.add(self.collection_name)
+        # Create payload indexes
+        try:
+            self.ensure_payload_index("document_id")
+            # New chunk payloads don't carry file_hash (the catalog holds it);
+            # this index only serves search_by_hash/delete_by_hash for
+            # documents uploaded before that, and can go once they are re-ingested
+            self.ensure_payload_index("file_hash")
+            print("✓ Payload indexes created")
+        except Exception as e:
+            print(f"⚠ Could not create payload indexes: {e}")
+
+    @staticmethod
+    def _is_collection_missing(exc: Exception) -> bool:
+        text = str(exc).lower()
+        if "collection" not in text:
+            return False
+        return getattr(exc, "status_code", None) == 404 or "not found" in text or "doesn't exist" in text
+
+    def _with_collection(self, operation, *args, **kwargs):
+        """
+        Run a Qdrant call, recreating the collection and retrying once if it
+        fails because the collection no longer exists.
+        """
+        self.create_collection_if_not_exists()
+        try:
+            return operation(*args, **kwargs)
+        except Exception as exc:
+            if not self._is_collection_missing(exc):
+                raise
+            print(f"⚠ Collection '{self.collection_name}' missing, recreating and retrying")
+            with VectorStoreService._bootstrap_lock:
+                VectorStoreService._checked_collections.discard(self.collection_name)
+            self.create_collection_if_not_exists()
+            return operation(*args, **kwargs)
 
     ##########################################################################
     #  PAYLOAD INDEX
@@ -112,7 +246,7 @@ class VectorStoreService:
     ##########################################################################
     #  UPSERT
     ##########################################################################
-    def upsert_points_batch(self, points: List[Dict]) -> None:
+    def upsert_points_batch(self, points: List[Dict], wait: bool = False) -> None:
         if not points:
             return
 
@@ -126,13 +260,21 @@ class VectorStoreService:
             for p in points
         ]
 
-        self.client.upsert(
+        self._with_collection(
+            self.client.upsert,
             collection_name=self.collection_name,
             points=structs,
-            wait=False
+            wait=wait
         )
 
-    def upsert_points_in_batches(self, points: List[Dict], batch_size: int = 24) -> None:
+    def upsert_points_in_batches(self, points: List[Dict], batch_size: int = 24, wait: bool = False) -> None:
+        """
+        Upsert points in batches, retrying failed batches.
+
+        Batches are not acknowledged by default; retries are safe because
+        point ids are deterministic (see chunk_point_id). Call
+        finalize_document before treating an ingest as searchable.
+        """
         if not points:
             return
 
@@ -146,7 +288,7 @@ class VectorStoreService:
             last_err = None
             for attempt in range(3):
                 try:
-                    self.upsert_points_batch(chunk)
+                    self.upsert_points_batch(chunk, wait=wait)
                     last_err = None
                     break
                 except Exception as exc:
@@ -156,6 +298,62 @@ class VectorStoreService:
             if last_err:
                 raise last_err
 
+    def count_points(self, filter_conditions: Optional[Dict] = None) -> int:
+        result = self._with_collection(
+            self.client.count,
+            collection_name=self.collection_name,
+            count_filter=self._build_filter(filter_conditions),
+            exact=True,
+        )
+        return result.count
+
+    def count_document_points(self, document_id: str) -> int:
+        return self.count_points({"document_id": document_id})
+
+    def finalize_document(self, document_id: str, point_ids: List[str], timeout: Optional[float] = None) -> int:
+        """
+        Consistency barrier after unacknowledged upserts.
+
+        Removes points of the document that are not part of this ingest
+        (left by an earlier, different ingest of the same file) with an
+        acknowledged delete, then waits until every point is searchable.
+
+        Args:
+            document_id: Document that was ingested
+            point_ids: Ids of every point upserted for it
+            timeout: Seconds to wait (defaults to Config.INGEST_CONSISTENCY_TIMEOUT_SECONDS)
+
+        Returns:
+            Number of points stored for the document
+
+        Raises:
+            TimeoutError: If the points are not all applied in time
+        """
+        timeout = Config.INGEST_CONSISTENCY_TIMEOUT_SECONDS if timeout is None else timeout
+        self._with_collection(
+            self.client.delete,
+            collection_name=self.collection_name,
+            points_selector=FilterSelector(filter=Filter(
+                must=[FieldCondition(key="document_id", match=MatchValue(value=document_id))],
+                must_not=[HasIdCondition(has_id=list(point_ids))],
+            )),
+            wait=True,
+        )
+
+        expected = len(set(point_ids))
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while True:
+            count = self.count_document_points(document_id)
+            if count >= expected:
+                return count
+            if time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"Only {count} of {expected} points for document {document_id} were applied within {timeout:.0f}s"
+                )
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
     ##########################################################################
     #  SEARCH
     ##########################################################################
@@ -197,36 +395,70 @@ class VectorStoreService:
         
         return Filter(must=conditions)
 
-    def search_similar(self, query_vector: List[float], limit: int = 5, filter_conditions: Optional[Dict] = None):
-        self.create_collection_if_not_exists()
+    def search_similar(self, query_vector: List[float], limit: int = 5, filter_conditions: Optional[Dict] = None, with_payload=True):
+        """
+        Nearest chunks to a query vector.
 
+        Args:
+            with_payload: True for the whole payload, or a list of the payload
+                fields to return (a projection keeps responses small)
+        """
         query_filter = self._build_filter(filter_conditions)
 
         # ALWAYS use named vector "default" - use NamedVector for named vectors
         named_query_vector = NamedVector(name="default", vector=query_vector)
-        results = self.client.search(
+        results = self._with_collection(
+            self.client.search,
             collection_name=self.collection_name,
             query_vector=named_query_vector,  # Named vector "default"
             limit=limit,
             query_filter=query_filter,
-            with_payload=True,
+            search_params=self.search_params,
+            with_payload=with_payload,
             with_vectors=False,
         )
 
-        formatted = []
-        for r in results:
-            formatted.append({
-                "score": r.score,
-                "payload": r.payload,
-            })
-        return formatted
+        return self._format_results(results)
+
+    @staticmethod
+    def _format_results(results) -> List[Dict]:
+        return [{"id": r.id, "score": r.score, "payload": r.payload or {}} for r in results]
+
+    def search_batch(self, searches: List[Dict]) -> List[List[Dict]]:
+        """
+        Run several searches in one request.
+
+        Args:
+            searches: Dicts with 'vector', 'limit', optional 'filter_conditions'
+                and optional 'with_payload' (True or a list of payload fields)
+
+        Returns:
+            One formatted result list per search, in order
+        """
+        if not searches:
+            return []
+        requests = [
+            SearchRequest(
+                vector=NamedVector(name="default", vector=search["vector"]),
+                filter=self._build_filter(search.get("filter_conditions")),
+                limit=search["limit"],
+                params=self.search_params,
+                with_payload=search.get("with_payload", True),
+                with_vector=False,
+            )
+            for search in searches
+        ]
+        batches = self._with_collection(
+            self.client.search_batch,
+            collection_name=self.collection_name,
+            requests=requests,
+        )
+        return [self._format_results(results) for results in batches]
 
     ##########################################################################
     #  DOCUMENT METADATA
     ##########################################################################
     def get_document_metadata_samples(self, document_id: str, limit: int = 64):
-        self.create_collection_if_not_exists()
-
         payloads = []
         try:
             filter_condition = Filter(
@@ -237,7 +469,8 @@ class VectorStoreService:
             remaining = limit
 
             while remaining > 0:
-                points, next_offset = self.client.scroll(
+                points, next_offset = self._with_collection(
+                    self.client.scroll,
                     collection_name=self.collection_name,
                     scroll_filter=filter_condition,
                     limit=remaining,
@@ -264,14 +497,13 @@ class VectorStoreService:
     #  SEARCH BY HASH
     ##########################################################################
     def search_by_hash(self, file_hash: str):
-        self.create_collection_if_not_exists()
-
         try:
             filter_condition = Filter(
                 must=[FieldCondition(key="file_hash", match=MatchValue(value=file_hash))]
             )
 
-            results, _ = self.client.scroll(
+            results, _ = self._with_collection(
+                self.client.scroll,
                 collection_name=self.collection_name,
                 scroll_filter=filter_condition,
                 limit=1,
@@ -293,31 +525,55 @@ class VectorStoreService:
             print(f"Error searching by hash: {e}")
             return []
 
-    #  DELETE BY HASH
-    def delete_by_hash(self, file_hash: str):
-        self.create_collection_if_not_exists()
-
-        try:
-            filter_condition = Filter(
-                must=[FieldCondition(key="file_hash", match=MatchValue(value=file_hash))]
-            )
+    ##########################################################################
+    #  DELETE
+    ##########################################################################
+    def delete_by_filter(self, filter_conditions: Dict, progress: Optional[Callable[[str, Dict], None]] = None) -> Dict:
+        """
+        Delete every point matching a payload filter, server side.
 
-            results, _ = self.client.scroll(
-                collection_name=self.collection_name,
-                scroll_filter=filter_condition,
-                limit=10000,
-                with_payload=False,
-                with_vectors=False,
-            )
+        Qdrant applies a filter selector to all matching points in one
+        operation, however many there are, so nothing is paged into memory.
+        The matching points are counted before and after the delete to
+        report progress and confirm that nothing was left behind.
 
-            if results:
-                ids = [p.id for p in results]
+        Args:
+            filter_conditions: Payload field -> value, e.g. {'document_id': ...}
+            progress: Optional callback(stage, report) for 'counted' and 'deleted'
 
-                self.client.delete(
-                    collection_name=self.collection_name,
-                    points_selector=PointIdsList(points=ids)
-                )
-                print(f"Deleted {len(ids)} points with hash {file_hash}")
+        Returns:
+            {'matched': points found, 'deleted': points removed, 'remaining': points left}
 
-        except Exception as e:
-            print(f"Error deleting by hash: {e}")
+        Raises:
+            ValueError: If the filter is empty (it would match every point)
+        """
+        query_filter = self._build_filter(filter_conditions)
+        if query_filter is None:
+            raise ValueError("Refusing to delete with an empty filter")
+
+        report = {'matched': self.count_points(filter_conditions), 'deleted': 0, 'remaining': 0}
+        if progress:
+            progress('counted', dict(report))
+        if report['matched']:
+            self._with_collection(
+                self.client.delete,
+                collection_name=self.collection_name,
+                points_selector=FilterSelector(filter=query_filter),
+                wait=True,
+            )
+            report['remaining'] = self.count_points(filter_conditions)
+            report['deleted'] = report['matched'] - report['remaining']
+        if progress:
+            progress('deleted', dict(report))
+        return report
+
+    def delete_document(self, document_id: str, progress: Optional[Callable[[str, Dict], None]] = None) -> Dict:
+        """Delete all points of a document (see delete_by_filter)"""
+        return self.delete_by_filter({"document_id": document_id}, progress=progress)
+
+    def delete_by_hash(self, file_hash: str) -> Dict:
+        """Delete points of documents ingested while chunk payloads carried the file hash"""
+        report = self.delete_by_filter({"file_hash": file_hash})
+        if report['deleted']:
+            print(f"Deleted {report['deleted']} points with hash {file_hash}")
+        return report
@@ -0,0 +1,342 @@
+import atexit
+import glob
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+
+class WriteBehindBuffer:
+    """
+    Buffers rows in memory and writes them in bulk from a background thread.
+
+    A flush happens when `batch_size` rows are waiting or `flush_interval`
+    seconds have passed. Failed writes are retried with exponential backoff
+    and jitter; after `max_retries` the batch is appended to a local JSONL
+    journal, which is replayed once writes succeed again (and on startup).
+    Rows should carry their own id and `write_fn` should skip ids it already
+    stored, since a batch may be written again after an ambiguous failure.
+    Remaining rows are flushed, or journaled, when the process exits.
+
+    Rows beyond `max_buffer` go straight to the journal, so an outage never
+    grows memory without bound.
+
+    Errors `is_permanent` recognises (the database refuses the rows, not the
+    connection) are not retried: the batch is written row by row and the rows
+    still refused go to a dead-letter file, so one bad row never holds back
+    the rows queued with it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        write_fn: Callable[[List[Dict]], None],
+        journal_path: str,
+        batch_size: int = 50,
+        flush_interval: float = 2.0,
+        max_buffer: int = 5000,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        is_permanent: Optional[Callable[[Exception], bool]] = None,
+        dead_letter_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            name: Used in log messages and the thread name
+            write_fn: Writes a list of rows; raises on failure
+            journal_path: JSONL file holding rows that could not be written
+            is_permanent: Whether a write error rejects the rows themselves
+                (default: every error is treated as transient)
+            dead_letter_path: JSONL file for rejected rows, with the error
+                (default: next to the journal)
+        """
+        self.name = name
+        self.write_fn = write_fn
+        self.journal_path = journal_path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_buffer = max(self.batch_size, max_buffer)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.is_permanent = is_permanent or (lambda error: False)
+        self.dead_letter_path = dead_letter_path or f"{os.path.splitext(journal_path)[0]}.dead.jsonl"
+        self._rows: deque = deque()
+        self._cond = threading.Condition()
+        self._journal_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._journal_pending = os.path.exists(journal_path)
+        self._next_replay = 0.0
+        self._stats = {'buffered': 0, 'written': 0, 'batches': 0, 'retries': 0, 'journaled': 0, 'replayed': 0, 'dead_lettered': 0}
+
+    ##########################################################################
+    #  PRODUCER
+    ##########################################################################
+    def add(self, row: Dict) -> None:
+        """Queue a row; never blocks on the database"""
+        with self._cond:
+            if len(self._rows) >= self.max_buffer:
+                overflow = True
+            else:
+                overflow = False
+                self._rows.append(row)
+                self._stats['buffered'] += 1
+                if len(self._rows) >= self.batch_size:
+                    self._cond.notify()
+        if overflow:
+            self._journal([row])
+
+    ##########################################################################
+    #  FLUSHER
+    ##########################################################################
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._reclaim_stale_replays()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def _take_batch(self) -> List[Dict]:
+        with self._cond:
+            count = min(self.batch_size, len(self._rows))
+            return [self._rows.popleft() for _ in range(count)]
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            with self._cond:
+                if len(self._rows) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+            if self._stop.is_set():
+                break
+            batch = self._take_batch()
+            if batch:
+                self._write_with_retry(batch)
+            if self._journal_pending and time.time() >= self._next_replay:
+                self._replay_journal()
+
+    def _write(self, batch: List[Dict]) -> None:
+        self.write_fn(batch)
+        with self._cond:
+            self._stats['written'] += len(batch)
+            self._stats['batches'] += 1
+
+    def _write_or_isolate(self, batch: List[Dict]) -> List[Dict]:
+        """
+        Write a batch; if the database rejects it, write its rows one by one
+        and dead-letter the rows it refuses
+
+        Returns:
+            Rows still to be written after a transient failure part-way
+            through (empty when every row was written or dead-lettered)
+
+        Raises:
+            The write error, if the whole batch failed transiently
+        """
+        try:
+            self._write(batch)
+            return []
+        except Exception as e:
+            if not self.is_permanent(e):
+                raise
+            print(f"Warning: {self.name} batch of {len(batch)} row(s) rejected, writing rows one by one: {e}")
+        for index, row in enumerate(batch):
+            try:
+                self._write([row])
+            except Exception as e:
+                if not self.is_permanent(e):
+                    return batch[index:]
+                self._dead_letter(row, e)
+        return []
+
+    def _write_with_retry(self, batch: List[Dict]) -> bool:
+        for attempt in range(self.max_retries + 1):
+            try:
+                batch = self._write_or_isolate(batch)
+                if not batch:
+                    return True
+                print(f"Warning: {self.name} write of {len(batch)} row(s) failed, journaling")
+                break
+            except Exception as e:
+                if attempt == self.max_retries or self._stop.is_set():
+                    print(f"Warning: {self.name} write of {len(batch)} row(s) failed, journaling: {e}")
+                    break
+                with self._cond:
+                    self._stats['retries'] += 1
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                self._stop.wait(delay * random.uniform(0.5, 1.0))
+        self._journal(batch)
+        self._next_replay = time.time() + self.backoff_max
+        return False
+
+    ##########################################################################
+    #  JOURNAL
+    ##########################################################################
+    def _append(self, path: str, rows: List[Dict]) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        # One O_APPEND write per batch so concurrent workers don't interleave lines
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data.encode('utf-8'))
+        finally:
+            os.close(fd)
+
+    def _journal(self, rows: List[Dict]) -> None:
+        with self._journal_lock:
+            try:
+                self._append(self.journal_path, rows)
+                self._journal_pending = True
+                with self._cond:
+                    self._stats['journaled'] += len(rows)
+            except OSError as e:
+                print(f"Error: {self.name} could not journal {len(rows)} row(s), they are lost: {e}")
+
+    def _dead_letter(self, row: Dict, error: Exception) -> None:
+        """Set aside a row the database refuses; it is never replayed"""
+        print(f"Error: {self.name} row rejected, moving it to {self.dead_letter_path}: {error}")
+        entry = {'row': row, 'error': str(error), 'failed_at': time.time()}
+        with self._journal_lock:
+            try:
+                self._append(self.dead_letter_path, [entry])
+                with self._cond:
+                    self._stats['dead_lettered'] += 1
+            except OSError as e:
+                print(f"Error: {self.name} could not dead-letter a row, it is lost: {e}")
+
+    def _replay_journal(self) -> None:
+        """Write journaled rows back; whatever still fails is journaled again"""
+        # Claim the journal by renaming it, so only one worker replays it
+        claimed = f"{self.journal_path}.{os.getpid()}.replay"
+        try:
+            os.replace(self.journal_path, claimed)
+        except FileNotFoundError:
+            self._journal_pending = False
+            return
+        except OSError as e:
+            print(f"Warning: {self.name} could not claim journal: {e}")
+            return
+        self._journal_pending = False
+
+        rows = self._read_journal(claimed)
+        replayed = 0
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            try:
+                leftover = self._write_or_isolate(batch)
+                error = None
+            except Exception as e:
+                leftover, error = batch, e
+            done = len(batch) - len(leftover)
+            replayed += done
+            with self._cond:
+                self._stats['replayed'] += done
+            if leftover:
+                print(f"Warning: {self.name} journal replay failed, will retry: {error or 'transient error'}")
+                self._journal(leftover + rows[start + len(batch):])
+                self._next_replay = time.time() + self.backoff_max
+                break
+        try:
+            os.remove(claimed)
+        except FileNotFoundError:
+            pass
+        if replayed:
+            print(f"{self.name}: replayed {replayed} journaled row(s)")
+
+    def _read_journal(self, path: str) -> List[Dict]:
+        rows = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"Warning: {self.name} skipping corrupt journal line")
+        return rows
+
+    def _reclaim_stale_replays(self) -> None:
+        """
+        Put rows from replays that never finished back into the journal
+
+        A worker that dies mid-replay leaves its `<journal>.<pid>.replay`
+        file behind. Files whose pid is not a running process (or is ours:
+        containers restart with the same pid) are folded back into the
+        journal; replays of live workers are left alone.
+        """
+        for path in glob.glob(f"{glob.escape(self.journal_path)}.*.replay"):
+            pid = path[len(self.journal_path) + 1:-len('.replay')]
+            if pid.isdigit() and int(pid) != os.getpid() and _pid_alive(int(pid)):
+                continue
+            # Rename first so two workers starting together don't both take it
+            claimed = f"{self.journal_path}.{os.getpid()}.reclaim"
+            try:
+                os.replace(path, claimed)
+            except OSError:
+                continue
+            rows = self._read_journal(claimed)
+            if rows:
+                self._journal(rows)
+                print(f"{self.name}: reclaimed {len(rows)} row(s) from an interrupted replay")
+            os.remove(claimed)
+
+    ##########################################################################
+    #  SHUTDOWN / STATS
+    ##########################################################################
+    def shutdown(self) -> None:
+        """Stop the writer and flush what's left (one attempt, then journal)"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                break
+            try:
+                leftover = self._write_or_isolate(batch)
+            except Exception as e:
+                print(f"Warning: {self.name} final flush failed, journaling: {e}")
+                leftover = batch
+            if leftover:
+                self._journal(leftover + self._take_all())
+                break
+
+    def _take_all(self) -> List[Dict]:
+        with self._cond:
+            rows = list(self._rows)
+            self._rows.clear()
+            return rows
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                **self._stats,
+                'pending': len(self._rows),
+                'journal_pending': self._journal_pending,
+            }
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name != 'posix':
+        # os.kill(pid, 0) would terminate the process on Windows; replaying
+        # twice is harmless because rows are written by id
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True